@@ -0,0 +1,27 @@
+"""
+ASGI entry point, e.g. `uvicorn task_manager.asgi:application`.
+
+Requests are resolved against task_manager.asgi_urls, which serves the hot
+read endpoints (task list and detail, dependencies/dependents, the graph
+snapshot and the event stream) with the async views in tasks.async_views
+and everything else exactly as under WSGI. Settings come from
+task_manager.settings_asgi by default.
+"""
+import os
+
+import django
+from django.core.handlers.asgi import ASGIHandler, ASGIRequest
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'task_manager.settings_asgi')
+django.setup(set_prefix=False)
+
+
+class AsyncReadRequest(ASGIRequest):
+    urlconf = 'task_manager.asgi_urls'
+
+
+class TaskManagerASGIHandler(ASGIHandler):
+    request_class = AsyncReadRequest
+
+
+application = TaskManagerASGIHandler()
@@ -29,6 +29,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'tasks.metrics.MetricsMiddleware',  # first, so it times everything below
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -37,6 +38,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'tasks.graph.GraphIndexMiddleware',  # one graph index freshness check per request
+    'tasks.database.ReadOnlyRequestMiddleware',  # routes the reads of safe requests
 ]
 
 ROOT_URLCONF = 'task_manager.urls'
@@ -65,6 +68,18 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',  # Use SQLite for testing
         'NAME': BASE_DIR / 'db.sqlite3',         # File-based database
+        # One transaction per write request: a change, its change-log rows
+        # and the graph version bump commit (or roll back) together. Safe
+        # requests run outside it (tasks.database.atomic_writes_only)
+        'ATOMIC_REQUESTS': True,
+        # Keep connections open between requests, checked before reuse
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        # Take the write lock when a transaction starts: the background job
+        # workers write concurrently with requests, and a deferred
+        # transaction that has to upgrade its lock fails at once with
+        # "database is locked" instead of waiting for the other writer
+        'OPTIONS': {'transaction_mode': 'IMMEDIATE'},
     }
     # Uncomment for MySQL (if you have MySQL installed):
     # 'default': {
@@ -74,9 +89,27 @@ DATABASES = {
     #     'PASSWORD': 'yourpassword',
     #     'HOST': 'localhost',
     #     'PORT': '3306',
+    #     'ATOMIC_REQUESTS': True,
     # }
 }
 
+# Second connection to the same database for the reads of GET requests
+# (see tasks/database.py): deferred transactions, never migrated, and a
+# mirror of "default" in tests
+DATABASES['read'] = {
+    **DATABASES['default'],
+    'ATOMIC_REQUESTS': False,
+    'OPTIONS': {},
+    'TEST': {'MIRROR': 'default'},
+}
+DATABASE_ROUTERS = ['tasks.database.ReadWriteRouter']
+TASK_READ_DATABASE = 'read'
+
+# Pragmas applied to every SQLite connection (tasks.database.SQLITE_PROFILES):
+# 'production' is WAL with synchronous=NORMAL, mmap and a busy timeout,
+# 'default' leaves SQLite's own settings
+TASK_SQLITE_PROFILE = 'production'
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -109,10 +142,60 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",  # React default port
 ]
+# Let the frontend read the graph-version ETags of the read endpoints and
+# the Server-Timing breakdowns
+CORS_EXPOSE_HEADERS = ['ETag', 'Server-Timing']
+
+# Caches. Local memory works out of the box; with several worker processes
+# switch to a shared backend so they see each other's invalidations, e.g.
+# 'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+# 'LOCATION': BASE_DIR / 'cache',
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'task-manager',
+    }
+}
 
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',  # Allow access to anyone
     ]
-}
\ No newline at end of file
+}
+
+# Task dependency graph
+# Keep a transitive closure table (tasks.TaskClosure) so cycle checks are a
+# single indexed lookup. Run `python manage.py rebuild_task_closure` after
+# turning this on.
+TASK_GRAPH_CLOSURE_ENABLED = False
+# Attempts for a dependency write that keeps conflicting with concurrent
+# inserts before the API answers 409 (see tasks/concurrency.py)
+TASK_GRAPH_WRITE_MAX_ATTEMPTS = 8
+
+# Server-Sent Events stream (/api/events/): seconds between keep-alive
+# comments, and how long one connection stays open before the client is
+# asked to reconnect
+TASK_EVENT_STREAM_HEARTBEAT_SECONDS = 15
+TASK_EVENT_STREAM_MAX_SECONDS = 300
+
+# Cache alias for serialized read responses (see tasks/caching.py), None to
+# turn the response cache off, and how long entries live
+TASK_RESPONSE_CACHE = 'default'
+TASK_RESPONSE_CACHE_TIMEOUT = 300
+
+# Per-request latency/SQL instrumentation: Server-Timing headers and the
+# Prometheus endpoint /metrics (see tasks/metrics.py). Read at startup;
+# when off, the middleware and the function timers cost nothing.
+TASK_METRICS_ENABLED = True
+
+# Background job queue for status recomputation (see tasks/jobs.py):
+# worker threads per process (0 leaves the work to `manage.py
+# run_job_worker`), how often idle workers look for work queued elsewhere,
+# how many distinct tasks one batch claims, when a claim by a dead worker
+# is taken back, and how often a failing batch is retried
+TASK_JOB_WORKERS = 2
+TASK_JOB_POLL_SECONDS = 5
+TASK_JOB_BATCH_SIZE = 200
+TASK_JOB_CLAIM_TIMEOUT_SECONDS = 300
+TASK_JOB_MAX_ATTEMPTS = 3
\ No newline at end of file
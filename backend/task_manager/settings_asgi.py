@@ -0,0 +1,14 @@
+"""
+Settings for ASGI servers: task_manager/asgi.py uses this module unless
+DJANGO_SETTINGS_MODULE says otherwise. Everything else is settings.py.
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES
+
+# Django runs the sync parts of each ASGI request (ORM calls included) in a
+# thread of its own, so a connection can't be reused by the next request:
+# close it when the request finishes instead of leaving it to the GC
+DATABASES = {
+    alias: {**database, 'CONN_MAX_AGE': 0}
+    for alias, database in DATABASES.items()
+}
@@ -1,7 +1,10 @@
 from django.contrib import admin
 from django.urls import path, include
+from tasks.database import atomic_writes
+from tasks.metrics import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('tasks.urls')),  # Include tasks app URLs
+    path('metrics', atomic_writes(metrics_view), name='metrics'),  # Prometheus scrape target
 ]
\ No newline at end of file
@@ -0,0 +1,36 @@
+# backend/tasks/apps.py
+import os
+import sys
+
+from django.apps import AppConfig
+
+
+def serves_requests():
+    """
+    Whether this process is a web server: a WSGI/ASGI server, or the
+    process of `manage.py runserver` that answers requests (not the
+    autoreloader watching it). Other management commands aren't.
+    """
+    argv = sys.argv or ['']
+    if os.path.basename(argv[0]) not in ('manage.py', 'django-admin', '__main__.py'):
+        return True
+    if argv[1:2] != ['runserver']:
+        return False
+    return os.environ.get('RUN_MAIN') == 'true' or '--noreload' in argv
+
+
+class TasksConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'tasks'
+
+    def ready(self):
+        # Connect the signal handlers that keep derived graph data in sync
+        from . import signals  # noqa: F401
+        # Apply the SQLite profile to every new connection (see database.py)
+        from django.db.backends.signals import connection_created
+        from .database import configure_sqlite
+        connection_created.connect(configure_sqlite, dispatch_uid='tasks.configure_sqlite')
+        # Background job workers (see jobs.py), in web servers only
+        if serves_requests():
+            from .jobs import worker_pool
+            worker_pool.start()
@@ -0,0 +1,187 @@
+# backend/tasks/async_views.py
+"""
+Async versions of the hot read endpoints, used when the project is served
+through task_manager/asgi.py (see task_manager/asgi_urls.py).
+
+Under ASGI a sync view occupies a thread for as long as it runs; these
+views await the database (Django's async ORM) and, for the event stream,
+the EventBroker instead, so a slow long-poll or an open stream costs a
+coroutine rather than a thread.
+
+Each URL keeps its sync DRF view for everything else: async_read_view()
+answers plain JSON GETs itself and hands writes, HEAD/OPTIONS and the
+browsable API to the sync view in a thread. Responses are the same bytes,
+ETags and cache entries as the sync views'.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.db import connections, transaction
+from django.http import Http404, HttpResponse, JsonResponse
+from django.utils.cache import patch_vary_headers
+from django.views import View
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.views import exception_handler
+from .models import Task, TaskDependency
+from .serializers import TaskRowSerializer, TaskDependencyRowSerializer
+from .renderers import FastJSONRenderer
+from .pagination import TaskCursorPagination
+from .filters import TaskFilterBackend
+from .database import SAFE_METHODS, atomic_view
+from .versioning import async_etag_by_graph_version
+from .caching import acached_data
+from .events import alatest_event_id, astream_events
+from .views import GraphSnapshotView, TaskEventStreamView
+
+JSON_MEDIA_TYPES = ('*/*', 'application/*', 'application/json')
+NO_TASK_MESSAGE = "No Task matches the given query."
+
+renderer = FastJSONRenderer()
+
+
+def wants_plain_json(request):
+    """Whether content negotiation would pick compact JSON for request"""
+    format = request.GET.get('format')
+    if format is not None:
+        return format == 'json'
+    accept = request.headers.get('Accept') or '*/*'
+    media_types = [media_type.split(';')[0].strip() for media_type in accept.split(',')]
+    return (
+        'indent' not in accept
+        and 'text/html' not in media_types
+        and any(media_type in JSON_MEDIA_TYPES for media_type in media_types)
+    )
+
+
+def json_response(data, status=200):
+    response = HttpResponse(renderer.render(data), status=status, content_type='application/json')
+    patch_vary_headers(response, ['Accept'])
+    return response
+
+
+def api_errors(view):
+    """Turn the exceptions DRF handles into the responses DRF would give"""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            return await view(request, *args, **kwargs)
+        except (APIException, Http404) as exc:
+            response = exception_handler(exc, {})
+            return json_response(response.data, status=response.status_code)
+    return wrapper
+
+
+def async_read_view(async_view, sync_view):
+    """
+    One URL, two implementations: plain JSON GETs go to async_view, every
+    other request to sync_view (in a thread, writes inside the
+    ATOMIC_REQUESTS transaction the handler would have opened).
+    """
+    read_view = sync_to_async(sync_view)
+    write_view = sync_to_async(atomic_view(sync_view))
+    async_view = api_errors(async_view)
+
+    async def view(request, *args, **kwargs):
+        if request.method == 'GET' and wants_plain_json(request):
+            return await async_view(request, *args, **kwargs)
+        if request.method in SAFE_METHODS:
+            return await read_view(request, *args, **kwargs)
+        return await write_view(request, *args, **kwargs)
+
+    view.csrf_exempt = True  # as DRF's views; SessionAuthentication enforces CSRF itself
+    # The handler can't wrap an async view in a transaction; write_view has its own
+    view._non_atomic_requests = set(connections.settings)
+    return view
+
+
+def _task_queryset():
+    return Task.objects.all().order_by('-created_at', '-id').with_dependency_counts()
+
+
+def _task_pk(pk):
+    # get_object() answers a malformed pk with a bare 404
+    try:
+        return int(pk)
+    except ValueError:
+        raise Http404
+
+
+@async_etag_by_graph_version
+async def task_list(request):
+    """GET /api/tasks/"""
+    async def compute():
+        drf_request = Request(request)
+        row_serializer = TaskRowSerializer()
+        # filter_list() may introspect the database (full-text search)
+        queryset = await sync_to_async(TaskFilterBackend().filter_list)(drf_request, _task_queryset())
+        paginator = TaskCursorPagination()
+        page = await paginator.apaginate_queryset(row_serializer.fetch(queryset), drf_request)
+        return paginator.get_paginated_response(row_serializer.to_representation(page)).data
+
+    return json_response(await acached_data(request, 'tasks', 'graph', compute))
+
+
+@async_etag_by_graph_version
+async def task_detail(request, pk):
+    """GET /api/tasks/{id}/"""
+    row_serializer = TaskRowSerializer()
+    row = await row_serializer.fetch(_task_queryset().filter(pk=_task_pk(pk))).afirst()
+    if row is None:
+        raise Http404(NO_TASK_MESSAGE)
+    return json_response(row_serializer.to_representation([row])[0])
+
+
+async def _task_edges(request, pk, endpoint, lookup):
+    task_id = _task_pk(pk)
+
+    async def compute():
+        if not await Task.objects.filter(pk=task_id).aexists():
+            raise Http404(NO_TASK_MESSAGE)
+        row_serializer = TaskDependencyRowSerializer()
+        queryset = row_serializer.fetch(TaskDependency.objects.filter(**{lookup: task_id}))
+        return row_serializer.to_representation([row async for row in queryset])
+
+    return json_response(await acached_data(request, endpoint, 'task', compute, task_id=pk))
+
+
+@async_etag_by_graph_version
+async def task_dependencies(request, pk):
+    """GET /api/tasks/{id}/dependencies/"""
+    return await _task_edges(request, pk, 'dependencies', 'task_id')
+
+
+@async_etag_by_graph_version
+async def task_dependents(request, pk):
+    """GET /api/tasks/{id}/dependents/"""
+    return await _task_edges(request, pk, 'dependents', 'depends_on_id')
+
+
+@async_etag_by_graph_version
+async def graph_snapshot(request):
+    """GET /api/graph/"""
+    task_rows, edge_rows = GraphSnapshotView.querysets()
+    # Fetched whole rather than with aiterator(), which runs values_list()
+    # queries outside sync_to_async
+    return json_response(GraphSnapshotView.build(
+        [row async for row in task_rows],
+        [row async for row in edge_rows]
+    ))
+
+
+class AsyncTaskEventStreamView(View):
+    """TaskEventStreamView waiting on the broker without holding a thread"""
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # The handler refuses to wrap async views in ATOMIC_REQUESTS
+        return transaction.non_atomic_requests(super().as_view(**initkwargs))
+
+    async def get(self, request):
+        try:
+            last_event_id = TaskEventStreamView.requested_event_id(request)
+        except ValueError:
+            return JsonResponse({"error": "Invalid last event id"}, status=400)
+        if last_event_id is None:
+            last_event_id = await alatest_event_id()
+        return TaskEventStreamView.stream_response(astream_events(last_event_id))
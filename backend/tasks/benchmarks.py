@@ -0,0 +1,375 @@
+# backend/tasks/benchmarks.py
+"""
+In-process benchmarks of the task API on synthetic dependency graphs.
+
+Each scenario seeds a graph of one shape into an empty database, then drives
+the API through the Django test client and records, per operation, latency
+percentiles, database queries per request and the peak Python heap of one
+extra traced run. Used by `manage.py benchmark_tasks`, which runs them
+against a throwaway SQLite test database and prints JSON.
+
+ConcurrencyBenchmark measures throughput instead: reader threads hammer the
+list and graph endpoints, first alone and then while writer threads add
+dependencies and edit tasks (`manage.py benchmark_concurrency`).
+
+Every generated edge goes from a later task to an earlier one (task i
+depends on task j with j < i), so the graphs are acyclic by construction and
+any such pair can be added without creating a cycle.
+"""
+import random
+import threading
+import time
+import tracemalloc
+
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from .caching import get_response_cache
+from .graph import graph_index
+from .versioning import bump_graph_version, get_graph_version
+from .jobs import run_pending
+
+SHAPES = ('chain', 'fan', 'random')
+SEED_BATCH_SIZE = 2000
+
+
+def chain_edges(task_count, rng):
+    """0 <- 1 <- 2 <- ...: the deepest possible graph"""
+    return [(i, i - 1) for i in range(1, task_count)]
+
+
+def fan_edges(task_count, rng):
+    """One root, every middle task depends on it, one sink depends on all of them"""
+    sink = task_count - 1
+    edges = [(i, 0) for i in range(1, sink)]
+    edges += [(sink, i) for i in range(1, sink)]
+    return edges
+
+
+def random_edges(task_count, rng, edge_count=None):
+    """edge_count distinct random edges (default: 5 per task)"""
+    if edge_count is None:
+        edge_count = 5 * task_count
+    edge_count = min(edge_count, task_count * (task_count - 1) // 2)
+    edges = set()
+    while len(edges) < edge_count:
+        a, b = rng.randrange(task_count), rng.randrange(task_count)
+        if a != b:
+            edges.add((max(a, b), min(a, b)))
+    return sorted(edges)
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies, query_counts, statuses, peak_bytes):
+    latencies = sorted(latencies)
+    ms = lambda seconds: round(seconds * 1000, 3)
+    return {
+        'runs': len(latencies),
+        'latency_ms': {
+            'p50': ms(percentile(latencies, 0.50)),
+            'p90': ms(percentile(latencies, 0.90)),
+            'p99': ms(percentile(latencies, 0.99)),
+            'max': ms(latencies[-1]),
+            'mean': ms(sum(latencies) / len(latencies)),
+        },
+        'queries': {
+            'min': min(query_counts),
+            'max': max(query_counts),
+            'mean': round(sum(query_counts) / len(query_counts), 2),
+        },
+        'peak_memory_kib': round(peak_bytes / 1024, 1),
+        'status_codes': sorted(set(statuses)),
+    }
+
+
+class Scenario:
+    """One seeded graph and the operations measured on it"""
+
+    def __init__(self, shape, task_count, edge_count=None, repeat=20, seed=0):
+        self.shape = shape
+        self.task_count = task_count
+        self.edge_count = edge_count
+        self.repeat = repeat
+        self.rng = random.Random(seed)
+        self.client = Client()
+        self.task_ids = []
+        self.edges = set()
+
+    # Seeding
+    def generate_edges(self):
+        if self.shape == 'chain':
+            return chain_edges(self.task_count, self.rng)
+        if self.shape == 'fan':
+            return fan_edges(self.task_count, self.rng)
+        return random_edges(self.task_count, self.rng, self.edge_count)
+
+    def seed(self):
+        from .models import Task, TaskDependency
+
+        clear_graph()
+        for start in range(0, self.task_count, SEED_BATCH_SIZE):
+            batch = [
+                Task(title=f'{self.shape} task {i}', description=f'Synthetic task number {i}')
+                for i in range(start, min(start + SEED_BATCH_SIZE, self.task_count))
+            ]
+            self.task_ids.extend(task.id for task in Task.objects.bulk_create(batch))
+
+        index_edges = self.generate_edges()
+        for start in range(0, len(index_edges), SEED_BATCH_SIZE):
+            TaskDependency.objects.bulk_create([
+                TaskDependency(task_id=self.task_ids[i], depends_on_id=self.task_ids[j])
+                for i, j in index_edges[start:start + SEED_BATCH_SIZE]
+            ])
+        self.edges = set(index_edges)
+        bump_graph_version()
+        graph_index.invalidate()
+        graph_index.ensure_fresh()
+
+    # Requests
+    def new_edge(self):
+        """A (task index, depends_on index) pair that isn't in the graph yet"""
+        for _attempt in range(1000):
+            a, b = self.rng.randrange(self.task_count), self.rng.randrange(self.task_count)
+            pair = (max(a, b), min(a, b))
+            if a != b and pair not in self.edges:
+                self.edges.add(pair)
+                return pair
+        raise RuntimeError("Could not find a free pair of tasks")
+
+    def add_dependency(self, run):
+        i, j = self.new_edge()
+        return self.client.post(
+            f'/api/tasks/{self.task_ids[i]}/add_dependency/',
+            {'depends_on_id': self.task_ids[j]}, content_type='application/json'
+        )
+
+    def pick_cycle_target(self):
+        """The newest task that has ancestors, and those ancestors"""
+        for task_id in reversed(self.task_ids):
+            ancestors = graph_index.ancestors(task_id)
+            if ancestors:
+                return task_id, sorted(ancestors)
+        return None, []
+
+    def reject_cycle(self, run):
+        # Make an ancestor of the target depend on the target
+        ancestor = self.cycle_ancestors[run % len(self.cycle_ancestors)]
+        return self.client.post(
+            f'/api/tasks/{ancestor}/add_dependency/',
+            {'depends_on_id': self.cycle_target}, content_type='application/json'
+        )
+
+    def propagate(self, run):
+        # Block the root, then unblock it: every task below it changes twice
+        # The recomputation is a background job: run it here, so it is
+        # part of the measurement
+        new_status = 'blocked' if run % 2 == 0 else 'pending'
+        response = self.client.patch(
+            f'/api/tasks/{self.task_ids[0]}/', {'status': new_status},
+            content_type='application/json'
+        )
+        run_pending()
+        return response
+
+    def list_tasks(self, run):
+        return self.client.get('/api/tasks/')
+
+    def list_tasks_large_page(self, run):
+        return self.client.get('/api/tasks/?page_size=500')
+
+    def graph_snapshot(self, run):
+        return self.client.get('/api/graph/')
+
+    def graph_layout(self, run):
+        # Drop the per-version entry, so every run lays the graph out (its
+        # components still come from the cache after the first run)
+        cache = get_response_cache()
+        if cache is not None:
+            cache.delete(f'tasks:layout:{get_graph_version()}')
+        return self.client.get('/api/graph/layout/')
+
+    def task_stats(self, run):
+        return self.client.get('/api/stats/')
+
+    def operations(self):
+        # Reads first, so they see the seeded graph
+        operations = [
+            ('list', self.list_tasks),
+            ('list_page_500', self.list_tasks_large_page),
+            ('graph', self.graph_snapshot),
+            ('graph_layout', self.graph_layout),
+            ('stats', self.task_stats),
+            ('add_dependency', self.add_dependency),
+            ('cycle_rejection', self.reject_cycle),
+            ('status_propagation', self.propagate),
+        ]
+        if not self.cycle_ancestors:
+            operations = [op for op in operations if op[0] != 'cycle_rejection']
+        return operations
+
+    # Measurement
+    def measure(self, operation):
+        latencies, query_counts, statuses = [], [], []
+        for run in range(self.repeat):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = operation(run)
+                latencies.append(time.perf_counter() - started)
+            query_counts.append(len(queries))
+            statuses.append(response.status_code)
+
+        # One more traced run for memory: tracemalloc slows everything down
+        tracemalloc.start()
+        try:
+            response = operation(self.repeat)
+            _current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        statuses.append(response.status_code)
+        return summarize(latencies, query_counts, statuses, peak)
+
+    def run(self):
+        started = time.perf_counter()
+        self.seed()
+        seed_seconds = time.perf_counter() - started
+        self.cycle_target, self.cycle_ancestors = self.pick_cycle_target()
+
+        return {
+            'shape': self.shape,
+            'tasks': self.task_count,
+            'edges': len(self.edges),
+            'seed_seconds': round(seed_seconds, 3),
+            'operations': {name: self.measure(operation) for name, operation in self.operations()},
+        }
+
+
+def clear_graph():
+    """Empty the task tables without going through signals"""
+    from .models import Task, TaskDependency, TaskClosure, ChangeEvent, Job, JobItem
+
+    with connection.cursor() as cursor:
+        for model in (JobItem, Job, TaskClosure, TaskDependency, ChangeEvent, Task):
+            cursor.execute(f'DELETE FROM {connection.ops.quote_name(model._meta.db_table)}')
+    bump_graph_version()
+    graph_index.invalidate()
+
+
+def run_benchmarks(shapes=SHAPES, task_count=1000, edge_count=None, repeat=20, seed=0):
+    """Run one Scenario per shape and return the JSON-ready report"""
+    return [
+        Scenario(shape, task_count, edge_count=edge_count, repeat=repeat, seed=seed).run()
+        for shape in shapes
+    ]
+
+
+class ConcurrencyBenchmark:
+    """
+    Read throughput with and without sustained writes on one seeded random
+    DAG. Every thread has its own client and database connections.
+    """
+
+    def __init__(self, task_count, readers=4, writers=1, seconds=5.0, seed=0):
+        self.scenario = Scenario('random', task_count, seed=seed)
+        self.readers = readers
+        self.writers = writers
+        self.seconds = seconds
+        self.edge_lock = threading.Lock()
+
+    def read(self, client, run):
+        if run % 2:
+            return client.get('/api/graph/')
+        return client.get('/api/tasks/')
+
+    def write(self, client, run):
+        scenario = self.scenario
+        if run % 2:
+            with self.edge_lock:
+                i, j = scenario.new_edge()
+            return client.post(
+                f'/api/tasks/{scenario.task_ids[i]}/add_dependency/',
+                {'depends_on_id': scenario.task_ids[j]}, content_type='application/json'
+            )
+        with self.edge_lock:
+            task_id = scenario.rng.choice(scenario.task_ids)
+        return client.patch(
+            f'/api/tasks/{task_id}/', {'title': f'Edited at run {run}'},
+            content_type='application/json'
+        )
+
+    def worker(self, operation, start, deadline, results):
+        # Server errors (database is locked, ...) are counted, not raised
+        client = Client(raise_request_exception=False)
+        latencies, statuses = [], []
+        run = 0
+        start.wait()
+        try:
+            while time.perf_counter() < deadline[0]:
+                started = time.perf_counter()
+                response = operation(client, run)
+                latencies.append(time.perf_counter() - started)
+                statuses.append(response.status_code)
+                run += 1
+        finally:
+            connections.close_all()
+        results.append((latencies, statuses))
+
+    def run_phase(self, writers):
+        start = threading.Barrier(self.readers + writers + 1)
+        deadline = [None]
+        read_results, write_results = [], []
+        threads = [
+            threading.Thread(target=self.worker, args=(self.read, start, deadline, read_results))
+            for _reader in range(self.readers)
+        ] + [
+            threading.Thread(target=self.worker, args=(self.write, start, deadline, write_results))
+            for _writer in range(writers)
+        ]
+        for thread in threads:
+            thread.start()
+        deadline[0] = time.perf_counter() + self.seconds
+        start.wait()
+        for thread in threads:
+            thread.join()
+
+        phase = {'reads': summarize_throughput(read_results, self.seconds)}
+        if writers:
+            phase['writes'] = summarize_throughput(write_results, self.seconds)
+        return phase
+
+    def run(self):
+        self.scenario.seed()
+        return {
+            'tasks': self.scenario.task_count,
+            'edges': len(self.scenario.edges),
+            'readers': self.readers,
+            'writers': self.writers,
+            'seconds': self.seconds,
+            'reads_only': self.run_phase(writers=0),
+            'reads_during_writes': self.run_phase(writers=self.writers),
+        }
+
+
+def summarize_throughput(results, seconds):
+    latencies = sorted(latency for thread_latencies, _statuses in results for latency in thread_latencies)
+    statuses = [code for _latencies, thread_statuses in results for code in thread_statuses]
+    ok = sum(1 for code in statuses if code < 400)
+    ms = lambda value: None if value is None else round(value * 1000, 3)
+    return {
+        'requests': len(statuses),
+        'ok_per_second': round(ok / seconds, 1),
+        'errors': len(statuses) - ok,
+        'latency_ms': {
+            'p50': ms(percentile(latencies, 0.50)),
+            'p90': ms(percentile(latencies, 0.90)),
+            'p99': ms(percentile(latencies, 0.99)),
+            'max': ms(latencies[-1] if latencies else None),
+        },
+        'status_codes': sorted(set(statuses)),
+    }
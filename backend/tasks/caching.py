@@ -0,0 +1,217 @@
+# backend/tasks/caching.py
+"""
+Cache of serialized read responses.
+
+Entries live in the Django cache named by settings.TASK_RESPONSE_CACHE and
+are keyed by endpoint, the full request URI and a generation:
+
+- "graph" scope (the task list): the graph version, so any committed write
+  (including bulk imports and propagated status changes, which bump it
+  explicitly) moves the list to a new key.
+- "task" scope (/tasks/{id}/dependencies/ and /dependents/): a per-task
+  token kept in the same cache and replaced after each commit that touches
+  the task, one of its edges or a neighbouring task (record_events() hands
+  every change here, see invalidate_for_events()).
+
+With a per-process backend (local memory) per-task entries only see writes
+made by the same process; use a shared backend (file-based, memcached,
+redis) when running several workers.
+"""
+import hashlib
+import threading
+import uuid
+from collections import defaultdict
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+from .graph import graph_index
+from .versioning import get_request_graph_version, aget_request_graph_version
+
+KEY_PREFIX = 'tasks:response'
+
+
+def get_response_cache():
+    """The configured cache, or None when response caching is off"""
+    alias = getattr(settings, 'TASK_RESPONSE_CACHE', None)
+    return caches[alias] if alias else None
+
+
+def _timeout():
+    return getattr(settings, 'TASK_RESPONSE_CACHE_TIMEOUT', 300)
+
+
+class CacheStats:
+    """Process-level hit/miss counters, per endpoint"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = defaultdict(int)
+        self.misses = defaultdict(int)
+        self.invalidations = 0  # per-task generations replaced
+
+    def record(self, endpoint, hit):
+        with self._lock:
+            if hit:
+                self.hits[endpoint] += 1
+            else:
+                self.misses[endpoint] += 1
+
+    def record_invalidations(self, count):
+        with self._lock:
+            self.invalidations += count
+
+    def snapshot(self):
+        with self._lock:
+            hits, misses = sum(self.hits.values()), sum(self.misses.values())
+            endpoints = sorted(set(self.hits) | set(self.misses))
+            return {
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+                'invalidations': self.invalidations,
+                'endpoints': {
+                    endpoint: {'hits': self.hits[endpoint], 'misses': self.misses[endpoint]}
+                    for endpoint in endpoints
+                },
+            }
+
+
+cache_stats = CacheStats()
+
+
+def _generation_key(task_id):
+    return f'{KEY_PREFIX}:gen:{task_id}'
+
+
+def _task_generation(cache, task_id):
+    # Random tokens rather than counters: an evicted generation can't come
+    # back with a value that old entries were stored under
+    key = _generation_key(task_id)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+async def _atask_generation(cache, task_id):
+    key = _generation_key(task_id)
+    generation = await cache.aget(key)
+    if generation is None:
+        await cache.aadd(key, uuid.uuid4().hex, timeout=None)
+        generation = await cache.aget(key)
+    return generation
+
+
+def _response_key(endpoint, generation, request):
+    uri = hashlib.md5(request.build_absolute_uri().encode('utf-8')).hexdigest()
+    return f'{KEY_PREFIX}:{endpoint}:{generation}:{uri}'
+
+
+def invalidate_tasks(task_ids):
+    """Drop the cached per-task responses of task_ids"""
+    cache = get_response_cache()
+    task_ids = set(task_ids)
+    if cache is None or not task_ids:
+        return
+    cache.set_many(
+        {_generation_key(task_id): uuid.uuid4().hex for task_id in task_ids},
+        timeout=None
+    )
+    cache_stats.record_invalidations(len(task_ids))
+
+
+def affected_task_ids(events):
+    """
+    Tasks whose dependencies/dependents responses change with events.
+
+    An edge shows up under both of its ends; a task's title shows up in the
+    responses of its neighbours as well as its own.
+    """
+    from .models import ChangeEvent
+
+    task_ids, changed_tasks = set(), set()
+    for kind, object_id, data in events:
+        if kind in (ChangeEvent.DEPENDENCY_ADDED, ChangeEvent.DEPENDENCY_REMOVED):
+            task_ids.update((data['task'], data['depends_on']))
+        else:
+            changed_tasks.add(object_id)
+
+    task_ids |= changed_tasks
+    if changed_tasks:
+        with graph_index.lock:
+            for task_id in changed_tasks:
+                task_ids.update(graph_index.forward.get(task_id, ()))
+                task_ids.update(graph_index.reverse.get(task_id, ()))
+    return task_ids
+
+
+def invalidate_for_events(events):
+    """Called after the commit that recorded events (see record_events())"""
+    if get_response_cache() is not None:
+        invalidate_tasks(affected_task_ids(events))
+
+
+def cached_response(endpoint, scope):
+    """
+    Decorator for viewset methods returning a Response with serialized data.
+
+    Args:
+        endpoint: name used in the cache key and the hit/miss counters
+        scope: 'graph' (keyed by graph version) or 'task' (keyed by the
+            generation of the task in kwargs['pk'])
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            cache = get_response_cache()
+            if cache is None:
+                return view_method(self, request, *args, **kwargs)
+
+            # Read the generation before the data, so a write committing
+            # in between leaves this entry under a dead key
+            if scope == 'task':
+                generation = _task_generation(cache, kwargs.get('pk'))
+            else:
+                generation = get_request_graph_version(request)
+            key = _response_key(endpoint, generation, request)
+
+            data = cache.get(key)
+            cache_stats.record(endpoint, hit=data is not None)
+            if data is not None:
+                return Response(data)
+
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response.data, timeout=_timeout())
+            return response
+        return wrapper
+    return decorator
+
+
+async def acached_data(request, endpoint, scope, compute, task_id=None):
+    """
+    cached_response() for async views: the data of `await compute()`, from
+    the cache when possible. Shares keys (and counters) with the sync
+    views; compute raising (e.g. Http404) caches nothing.
+    """
+    cache = get_response_cache()
+    if cache is None:
+        return await compute()
+
+    if scope == 'task':
+        generation = await _atask_generation(cache, task_id)
+    else:
+        generation = await aget_request_graph_version(request)
+    key = _response_key(endpoint, generation, request)
+
+    data = await cache.aget(key)
+    cache_stats.record(endpoint, hit=data is not None)
+    if data is not None:
+        return data
+
+    data = await compute()
+    await cache.aset(key, data, timeout=_timeout())
+    return data
@@ -0,0 +1,140 @@
+# backend/tasks/closure.py
+"""
+Transitive closure table for the dependency graph.
+
+When settings.TASK_GRAPH_CLOSURE_ENABLED is on, every (ancestor, descendant)
+pair of the graph is stored in TaskClosure, so a cycle check is a single
+indexed EXISTS query. Rows are added/removed incrementally by the
+TaskDependency signals; `manage.py rebuild_task_closure` recomputes the
+table from scratch and `manage.py check_task_closure` verifies it.
+"""
+from collections import defaultdict
+from django.conf import settings
+from django.db import transaction
+from .graph import graph_index
+
+BATCH_SIZE = 1000
+
+
+def closure_enabled():
+    return getattr(settings, 'TASK_GRAPH_CLOSURE_ENABLED', False)
+
+
+def is_ancestor(ancestor_id, descendant_id):
+    """True if descendant_id depends on ancestor_id (directly or not)"""
+    from .models import TaskClosure
+
+    return TaskClosure.objects.filter(
+        ancestor_id=ancestor_id, descendant_id=descendant_id
+    ).exists()
+
+
+def get_upstream_ids(task_id):
+    """Every task that task_id depends on, directly or transitively"""
+    from .models import TaskClosure
+
+    return set(
+        TaskClosure.objects.filter(descendant_id=task_id)
+        .values_list('ancestor_id', flat=True)
+    )
+
+
+def get_downstream_ids(task_id):
+    """Every task that depends on task_id, directly or transitively"""
+    from .models import TaskClosure
+
+    return set(
+        TaskClosure.objects.filter(ancestor_id=task_id)
+        .values_list('descendant_id', flat=True)
+    )
+
+
+def add_edge_to_closure(task_id, depends_on_id):
+    """
+    Record the new edge task -> depends_on.
+
+    depends_on and all of its ancestors become ancestors of task and of
+    every task below it.
+    """
+    from .models import TaskClosure
+
+    ancestors = get_upstream_ids(depends_on_id) | {depends_on_id}
+    descendants = get_downstream_ids(task_id) | {task_id}
+
+    rows = [
+        TaskClosure(ancestor_id=ancestor_id, descendant_id=descendant_id)
+        for ancestor_id in ancestors
+        for descendant_id in descendants
+    ]
+    TaskClosure.objects.bulk_create(rows, batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+
+def remove_edge_from_closure(task_id):
+    """
+    Forget an edge task -> X that was just deleted from the database.
+
+    Only pairs whose descendant is task (or below it) can disappear.
+    """
+    reconcile_closure(get_downstream_ids(task_id) | {task_id})
+
+
+def reconcile_closure(descendant_ids):
+    """
+    Drop the stored ancestors of descendant_ids that the graph no longer
+    connects them to. Pairs still reachable another way are kept.
+    """
+    from .models import TaskClosure
+
+    stored = defaultdict(set)
+    rows = TaskClosure.objects.filter(descendant_id__in=descendant_ids)
+    for ancestor_id, descendant_id in rows.values_list('ancestor_id', 'descendant_id'):
+        stored[descendant_id].add(ancestor_id)
+
+    reachable = graph_index.ancestors_by_task(stored)
+    for descendant_id, ancestor_ids in stored.items():
+        lost = ancestor_ids - reachable[descendant_id]
+        if lost:
+            TaskClosure.objects.filter(
+                descendant_id=descendant_id, ancestor_id__in=lost
+            ).delete()
+
+
+def compute_closure_pairs():
+    """Yield every (ancestor_id, descendant_id) pair of the current graph"""
+    for task_id, ancestor_ids in graph_index.ancestors_by_task().items():
+        for ancestor_id in ancestor_ids:
+            yield ancestor_id, task_id
+
+
+def rebuild_closure():
+    """Recompute the whole closure table. Returns the number of rows written."""
+    from .models import TaskClosure
+
+    count = 0
+    with transaction.atomic():
+        TaskClosure.objects.all().delete()
+        batch = []
+        for ancestor_id, descendant_id in compute_closure_pairs():
+            batch.append(TaskClosure(ancestor_id=ancestor_id, descendant_id=descendant_id))
+            if len(batch) >= BATCH_SIZE:
+                TaskClosure.objects.bulk_create(batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            TaskClosure.objects.bulk_create(batch)
+            count += len(batch)
+    return count
+
+
+def check_closure():
+    """
+    Compare the closure table with the graph.
+
+    Returns:
+        (missing, extra): sets of (ancestor_id, descendant_id) pairs
+    """
+    from .models import TaskClosure
+
+    expected = set(compute_closure_pairs())
+    stored = set(TaskClosure.objects.values_list('ancestor_id', 'descendant_id'))
+    return expected - stored, stored - expected
@@ -0,0 +1,166 @@
+# backend/tasks/concurrency.py
+"""
+Optimistic concurrency control for writes that add dependency edges.
+
+A cycle check and the insert it guards are not atomic on their own: two
+requests adding A->B and B->A can both pass the check and commit a cycle.
+Instead of a global lock, each write runs in its own transaction that reads
+GraphVersion.dependency_version first, checks and inserts, then bumps the
+version with a compare-and-swap. If another edge insert committed in
+between, the swap matches no row, the transaction rolls back and the whole
+write (including the check) is retried against the new graph. Database
+serialization errors (SQLite "database is locked", deadlocks) are retried
+the same way.
+
+Every other edge write (deletes, bulk writes) moves the version too, with
+bump_dependency_version(): it is also what tells the graph index whether
+it is current (see graph.py).
+"""
+import contextvars
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db import OperationalError, transaction
+from django.db.models import F
+from .graph import graph_index
+
+# Set inside optimistic_graph_write(): its claim moves the version
+_claiming = contextvars.ContextVar('dependency_version_claiming', default=False)
+
+
+class WriteConflict(Exception):
+    """The write kept conflicting with concurrent edge inserts"""
+
+
+class _VersionMoved(Exception):
+    pass
+
+
+class WriteStats:
+    """Process-level counters for optimistic dependency writes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.writes = 0       # successful writes
+        self.attempts = 0     # transactions started
+        self.conflicts = 0    # attempts rolled back and retried
+        self.rejected = 0     # writes refused by their own checks (cycles, ...)
+        self.failures = 0     # writes that ran out of attempts
+
+    def record(self, attempts, outcome):
+        """outcome is 'write', 'rejected' or 'failure'"""
+        with self._lock:
+            self.attempts += attempts
+            if outcome == 'failure':
+                self.conflicts += attempts
+                self.failures += 1
+            else:
+                self.conflicts += attempts - 1
+                if outcome == 'write':
+                    self.writes += 1
+                else:
+                    self.rejected += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'writes': self.writes,
+                'rejected': self.rejected,
+                'attempts': self.attempts,
+                'conflicts': self.conflicts,
+                'failures': self.failures,
+                'retry_rate': self.conflicts / self.attempts if self.attempts else 0.0,
+            }
+
+
+write_stats = WriteStats()
+
+
+def _read_dependency_version():
+    from .models import GraphVersion
+
+    version = (
+        GraphVersion.objects.filter(pk=GraphVersion.SINGLETON_ID)
+        .values_list('dependency_version', flat=True)
+        .first()
+    )
+    if version is None:
+        GraphVersion.objects.get_or_create(pk=GraphVersion.SINGLETON_ID)
+        version = 0
+    return version
+
+
+def _claim_dependency_version(version):
+    from .models import GraphVersion
+
+    claimed = GraphVersion.objects.filter(
+        pk=GraphVersion.SINGLETON_ID, dependency_version=version
+    ).update(dependency_version=F('dependency_version') + 1)
+    if claimed:
+        graph_index.version_moved(version + 1)
+    return claimed
+
+
+def bump_dependency_version(mirrored=True):
+    """
+    Unconditionally move dependency_version (inside the caller's
+    transaction) after an edge write: concurrent optimistic writes that
+    read the old version will conflict and re-check, and graph indexes
+    notice the change. Inside optimistic_graph_write() the claim does it.
+
+    mirrored: the edges were written through the signals, so this
+    process's graph index already has them (False for bulk writes)
+    """
+    from .models import GraphVersion
+
+    if _claiming.get():
+        return
+    GraphVersion.objects.filter(pk=GraphVersion.SINGLETON_ID).update(
+        dependency_version=F('dependency_version') + 1
+    )
+    graph_index.version_moved(_read_dependency_version(), mirrored=mirrored)
+
+
+def optimistic_graph_write(write):
+    """
+    Run write() (check + insert edges) in its own transaction, retrying on
+    conflicting concurrent edge inserts.
+
+    Must not be called inside another transaction: each attempt needs a
+    fresh view of the graph. Exceptions raised by write() itself (validation
+    errors, DependencyGraphError, ...) roll back and propagate unchanged.
+
+    Returns:
+        Whatever write() returns
+    Raises:
+        WriteConflict when every attempt conflicted
+    """
+    max_attempts = getattr(settings, 'TASK_GRAPH_WRITE_MAX_ATTEMPTS', 8)
+
+    for attempt in range(1, max_attempts + 1):
+        token = _claiming.set(True)
+        try:
+            with transaction.atomic():
+                version = _read_dependency_version()
+                # The checks in write() look at the graph as of this version
+                graph_index.ensure_fresh(version)
+                result = write()
+                if not _claim_dependency_version(version):
+                    raise _VersionMoved()
+        except (_VersionMoved, OperationalError):
+            if attempt == max_attempts:
+                write_stats.record(attempt, 'failure')
+                raise WriteConflict()
+            # Randomized exponential backoff so the retries don't collide again
+            time.sleep(random.uniform(0, 0.01 * 2 ** attempt))
+            continue
+        except Exception:
+            write_stats.record(attempt, 'rejected')
+            raise
+        finally:
+            _claiming.reset(token)
+
+        write_stats.record(attempt, 'write')
+        return result
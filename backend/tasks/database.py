@@ -0,0 +1,174 @@
+# backend/tasks/database.py
+"""
+Database connections: read/write routing and the SQLite profile.
+
+Reads of GET/HEAD/OPTIONS requests go to settings.TASK_READ_DATABASE, a
+second connection to the same database; everything else uses the primary
+("default"). ReadOnlyRequestMiddleware marks safe requests and
+ReadWriteRouter sends their ORM reads to the read alias (without one they
+stay on the primary). The app's URL patterns go through
+atomic_writes_only(), which keeps ATOMIC_REQUESTS for unsafe methods only,
+so a read never holds a transaction on the primary (with IMMEDIATE
+transactions that would take the write lock).
+Writes, and the reads inside write requests, stay on the primary and see
+their own changes.
+
+configure_sqlite() runs on every new SQLite connection (connection_created)
+and applies the pragmas of settings.TASK_SQLITE_PROFILE. The "production"
+profile switches to WAL, where readers don't block the writer and the
+writer doesn't block readers. The read connection is also made query_only,
+so a write routed there by mistake fails instead of contending for the
+lock.
+"""
+import contextvars
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.urls import URLResolver
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+SQLITE_PROFILES = {
+    # SQLite's own defaults (rollback journal, synchronous=FULL)
+    'default': {},
+    'production': {
+        'journal_mode': 'WAL',
+        # Durable at checkpoints instead of every commit; safe with WAL
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        'busy_timeout': 5000,
+        'cache_size': -64000,  # KiB
+        'temp_store': 'MEMORY',
+    },
+}
+
+_read_only_request = contextvars.ContextVar('task_read_only_request', default=False)
+
+
+def read_database():
+    """Alias of the read connection (the primary when there is none)"""
+    alias = getattr(settings, 'TASK_READ_DATABASE', None)
+    if alias and alias in settings.DATABASES:
+        return alias
+    return DEFAULT_DB_ALIAS
+
+
+class ReadWriteRouter:
+    """ORM reads of read-only requests go to the read connection"""
+
+    def db_for_read(self, model, **hints):
+        if _read_only_request.get():
+            return read_database()
+        return None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases are the same database
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db != DEFAULT_DB_ALIAS and db == read_database():
+            return False
+        return None
+
+
+class ReadOnlyRequestMiddleware:
+    """
+    Marks safe requests read-only for ReadWriteRouter while the rest of the
+    stack (later middleware, the view) handles them
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if request.method not in SAFE_METHODS:
+            return self.get_response(request)
+        token = _read_only_request.set(True)
+        try:
+            return self.get_response(request)
+        finally:
+            _read_only_request.reset(token)
+
+    async def __acall__(self, request):
+        if request.method not in SAFE_METHODS:
+            return await self.get_response(request)
+        # sync_to_async copies the context: sync views see the mark too
+        token = _read_only_request.set(True)
+        try:
+            return await self.get_response(request)
+        finally:
+            _read_only_request.reset(token)
+
+
+def atomic_view(view):
+    """What BaseHandler.make_view_atomic() does, for views called by hand"""
+    non_atomic = getattr(view, '_non_atomic_requests', set())
+    for alias, settings_dict in connections.settings.items():
+        if settings_dict['ATOMIC_REQUESTS'] and alias not in non_atomic:
+            view = transaction.atomic(using=alias)(view)
+    return view
+
+
+def atomic_writes(view):
+    """
+    ATOMIC_REQUESTS for the unsafe methods only: safe requests run view as
+    is, the others inside the transactions the handler would have opened
+    (which it no longer does for the returned view)
+    """
+    write_view = atomic_view(view)
+    if write_view is view:
+        return view
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method in SAFE_METHODS:
+            return view(request, *args, **kwargs)
+        return write_view(request, *args, **kwargs)
+
+    wrapper._non_atomic_requests = set(connections.settings)
+    return wrapper
+
+
+def atomic_writes_only(patterns):
+    """Apply atomic_writes() to the views of URL patterns (and includes), in place"""
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            atomic_writes_only(pattern.url_patterns)
+        else:
+            pattern.callback = atomic_writes(pattern.callback)
+    return patterns
+
+
+def sqlite_pragmas(alias):
+    pragmas = dict(SQLITE_PROFILES[getattr(settings, 'TASK_SQLITE_PROFILE', 'default')])
+    if alias != DEFAULT_DB_ALIAS and alias == read_database():
+        pragmas['query_only'] = 'ON'
+    return pragmas
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """connection_created receiver: apply the SQLite profile"""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = sqlite_pragmas(connection.alias)
+    with connection.cursor() as cursor:
+        # The journal mode is stored in the database file; switching it
+        # needs an exclusive lock, so only try when it isn't set yet
+        journal_mode = pragmas.pop('journal_mode', None)
+        if journal_mode:
+            cursor.execute('PRAGMA journal_mode')
+            if cursor.fetchone()[0].upper() not in (journal_mode.upper(), 'MEMORY'):
+                cursor.execute(f'PRAGMA journal_mode = {journal_mode}')
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
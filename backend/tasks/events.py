@@ -0,0 +1,265 @@
+# backend/tasks/events.py
+"""
+Change events for tasks and dependencies, and the Server-Sent Events stream
+that pushes them to clients.
+
+Events are rows of the ChangeEvent table written by the model signals (and
+explicitly by the bulk code paths that skip signals), so they commit or roll
+back together with the change. After a commit the in-process broker wakes
+up the streams of this process; streams also re-check the table every few
+seconds, which picks up events committed by other processes. Clients resume
+from the Last-Event-ID header without missing anything.
+"""
+import asyncio
+import json
+import threading
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from .caching import invalidate_for_events
+
+# Events sent per database query while catching up
+STREAM_BATCH_SIZE = 200
+
+
+def task_event_data(task):
+    return {
+        'id': task.id,
+        'title': task.title,
+        'description': task.description,
+        'status': task.status,
+        'estimated_duration': task.estimated_duration,
+        'created_at': task.created_at,
+        'updated_at': task.updated_at,
+    }
+
+
+def dependency_event_data(dependency):
+    return {
+        'id': dependency.id,
+        'task': dependency.task_id,
+        'depends_on': dependency.depends_on_id,
+    }
+
+
+def _encode(data):
+    # Store JSON-friendly values only (datetimes as ISO strings)
+    return json.loads(json.dumps(data, cls=DjangoJSONEncoder))
+
+
+def record_events(events, invalidate_cache=True):
+    """
+    Append events to the change log.
+
+    Args:
+        events: iterable of (kind, object_id, data) tuples
+        invalidate_cache: drop the cached responses these events affect
+            after the commit (bulk writers may do that themselves)
+    """
+    from .models import ChangeEvent
+
+    rows = [
+        ChangeEvent(kind=kind, object_id=object_id, data=_encode(data))
+        for kind, object_id, data in events
+    ]
+    if not rows:
+        return
+    ChangeEvent.objects.bulk_create(rows, batch_size=500)
+    transaction.on_commit(broker.notify)
+    if invalidate_cache:
+        transaction.on_commit(partial(invalidate_for_events, [
+            (row.kind, row.object_id, row.data) for row in rows
+        ]))
+
+
+def record_event(kind, object_id, data):
+    record_events([(kind, object_id, data)])
+
+
+class EventBroker:
+    """
+    In-process fan-out: streams wait on a condition that is notified after
+    every commit that recorded events. Async streams wait on an
+    asyncio.Event of their own event loop instead, set from the committing
+    thread.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._generation = 0
+        self._async_waiters = set()  # (loop, asyncio.Event)
+
+    @property
+    def generation(self):
+        return self._generation
+
+    def notify(self):
+        with self._condition:
+            self._generation += 1
+            self._condition.notify_all()
+            waiters = list(self._async_waiters)
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass  # the loop is closed
+
+    def wait(self, generation, timeout):
+        """Block until notified after `generation` or until timeout"""
+        with self._condition:
+            self._condition.wait_for(lambda: self._generation != generation, timeout)
+            return self._generation
+
+    async def await_change(self, generation, timeout):
+        """wait() without blocking the event loop"""
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._condition:
+            if self._generation != generation:
+                return self._generation
+            self._async_waiters.add(waiter)
+        try:
+            await asyncio.wait_for(waiter[1].wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._condition:
+                self._async_waiters.discard(waiter)
+        return self._generation
+
+
+broker = EventBroker()
+
+
+def latest_event_id():
+    from .models import ChangeEvent
+
+    return ChangeEvent.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+
+async def alatest_event_id():
+    from .models import ChangeEvent
+
+    return await ChangeEvent.objects.order_by('-id').values_list('id', flat=True).afirst() or 0
+
+
+def format_event(event):
+    payload = json.dumps({'id': event.object_id, 'data': event.data}, cls=DjangoJSONEncoder)
+    return f"id: {event.id}\nevent: {event.kind}\ndata: {payload}\n\n"
+
+
+def stream_events(last_event_id):
+    """
+    Generator of SSE frames for every event after last_event_id.
+
+    Ends after TASK_EVENT_STREAM_MAX_SECONDS so the connection (and the
+    worker serving it) is recycled; EventSource reconnects by itself and
+    sends the last id it saw.
+    """
+    from .models import ChangeEvent
+
+    heartbeat = getattr(settings, 'TASK_EVENT_STREAM_HEARTBEAT_SECONDS', 15)
+    deadline = time.monotonic() + getattr(settings, 'TASK_EVENT_STREAM_MAX_SECONDS', 300)
+
+    yield "retry: 3000\n\n"
+    while time.monotonic() < deadline:
+        generation = broker.generation
+        events = list(
+            ChangeEvent.objects.filter(id__gt=last_event_id).order_by('id')[:STREAM_BATCH_SIZE]
+        )
+        for event in events:
+            yield format_event(event)
+            last_event_id = event.id
+        if len(events) == STREAM_BATCH_SIZE:
+            continue
+
+        if broker.wait(generation, heartbeat) == generation:
+            # Nothing from this process; comment line keeps proxies from
+            # closing the connection, the loop re-checks the table
+            yield ": keep-alive\n\n"
+
+
+async def astream_events(last_event_id):
+    """stream_events() as an async generator: an idle stream holds no thread"""
+    from .models import ChangeEvent
+
+    heartbeat = getattr(settings, 'TASK_EVENT_STREAM_HEARTBEAT_SECONDS', 15)
+    deadline = time.monotonic() + getattr(settings, 'TASK_EVENT_STREAM_MAX_SECONDS', 300)
+
+    yield "retry: 3000\n\n"
+    while time.monotonic() < deadline:
+        generation = broker.generation
+        events = [
+            event async for event in
+            ChangeEvent.objects.filter(id__gt=last_event_id).order_by('id')[:STREAM_BATCH_SIZE]
+        ]
+        for event in events:
+            yield format_event(event)
+            last_event_id = event.id
+        if len(events) == STREAM_BATCH_SIZE:
+            continue
+
+        if await broker.await_change(generation, heartbeat) == generation:
+            yield ": keep-alive\n\n"
+
+
+class ChangeLogPruned(Exception):
+    """The requested version is older than the oldest event still kept"""
+
+
+class UnknownVersion(Exception):
+    """The requested version is newer than any event recorded"""
+
+
+def changes_since(since, limit):
+    """
+    Collapse the change log after `since` into the objects it touched.
+
+    Returns:
+        dict with the version reached ("version"), whether more events are
+        left ("has_more") and the touched "task_ids"/"dependency_ids"
+    """
+    from django.db.models import Max, Min
+    from .models import ChangeEvent
+
+    # prune_events() keeps the newest event, so the log always knows the
+    # last id it handed out even when everything before has been pruned
+    bounds = ChangeEvent.objects.aggregate(oldest=Min('id'), latest=Max('id'))
+    latest = bounds['latest'] or 0
+    if since > latest:
+        raise UnknownVersion()
+    if bounds['oldest'] is not None and since < bounds['oldest'] - 1:
+        raise ChangeLogPruned()
+
+    rows = list(
+        ChangeEvent.objects.filter(id__gt=since).order_by('id')
+        .values_list('id', 'kind', 'object_id')[:limit + 1]
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    task_kinds = {ChangeEvent.TASK_CREATED, ChangeEvent.TASK_UPDATED, ChangeEvent.TASK_DELETED}
+    task_ids, dependency_ids = set(), set()
+    for _event_id, kind, object_id in rows:
+        (task_ids if kind in task_kinds else dependency_ids).add(object_id)
+
+    return {
+        'version': rows[-1][0] if rows else latest,
+        'has_more': has_more,
+        'task_ids': task_ids,
+        'dependency_ids': dependency_ids,
+    }
+
+
+def prune_events(before):
+    """
+    Delete events created before the given datetime, except the newest one:
+    it marks how far the log went, so clients behind it still get a 410.
+    Returns the count.
+    """
+    from .models import ChangeEvent
+
+    deleted, _ = ChangeEvent.objects.filter(created_at__lt=before, id__lt=latest_event_id()).delete()
+    return deleted
@@ -0,0 +1,85 @@
+# backend/tasks/filters.py
+from datetime import datetime, time
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+from .models import Task
+from .search import search_tasks
+
+
+def parse_statuses(value):
+    """Statuses of a comma separated ?status= value (ValidationError if unknown)"""
+    statuses = [status.strip() for status in value.split(',') if status.strip()]
+    valid = {status for status, _label in Task.STATUS_CHOICES}
+    invalid = [status for status in statuses if status not in valid]
+    if invalid:
+        raise ValidationError({"error": f"Unknown status: {', '.join(invalid)}"})
+    return statuses
+
+
+class TaskFilterBackend(BaseFilterBackend):
+    """
+    Query parameters for the task list:
+    - status: one or more statuses, comma separated
+    - created_after / created_before / updated_after / updated_before:
+      ISO date or datetime
+    - min_dependencies / max_dependencies / min_dependents / max_dependents
+    - search: words matched against title and description (see search.py)
+    """
+    date_filters = {
+        'created_after': 'created_at__gte',
+        'created_before': 'created_at__lt',
+        'updated_after': 'updated_at__gte',
+        'updated_before': 'updated_at__lt',
+    }
+    count_filters = {
+        'min_dependencies': 'dependency_count__gte',
+        'max_dependencies': 'dependency_count__lte',
+        'min_dependents': 'dependent_count__gte',
+        'max_dependents': 'dependent_count__lte',
+    }
+
+    def filter_queryset(self, request, queryset, view):
+        # Detail routes share get_queryset(); only the list is filtered
+        if getattr(view, 'action', None) != 'list':
+            return queryset
+        return self.filter_list(request, queryset)
+
+    def filter_list(self, request, queryset):
+        params = request.query_params
+
+        if params.get('status'):
+            queryset = queryset.filter(status__in=parse_statuses(params['status']))
+
+        for param, lookup in self.date_filters.items():
+            if params.get(param):
+                queryset = queryset.filter(**{lookup: self._parse_date(param, params[param])})
+
+        # The counts are annotated by Task.objects.with_dependency_counts()
+        for param, lookup in self.count_filters.items():
+            if params.get(param):
+                try:
+                    value = int(params[param])
+                except ValueError:
+                    raise ValidationError({"error": f"{param} must be an integer"})
+                queryset = queryset.filter(**{lookup: value})
+
+        if params.get('search'):
+            queryset = search_tasks(queryset, params['search'])
+
+        return queryset
+
+    @staticmethod
+    def _parse_date(param, value):
+        try:
+            parsed = parse_datetime(value) or parse_date(value)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise ValidationError({"error": f"{param} must be an ISO date or datetime"})
+        if not isinstance(parsed, datetime):
+            parsed = datetime.combine(parsed, time.min)
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
@@ -0,0 +1,393 @@
+# backend/tasks/graph.py
+import contextvars
+import threading
+from collections import defaultdict
+from functools import partial
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+# Set for the duration of a request by GraphIndexMiddleware
+_request_scope = contextvars.ContextVar('graph_index_request_scope', default=None)
+
+
+def _primary_connection():
+    # Edge writes always go to the primary (see database.ReadWriteRouter)
+    from django.db import DEFAULT_DB_ALIAS, connections
+
+    return connections[DEFAULT_DB_ALIAS]
+
+
+def read_dependency_version():
+    """GraphVersion.dependency_version, one primary key lookup"""
+    from .models import GraphVersion
+
+    version = (
+        GraphVersion.objects.filter(pk=GraphVersion.SINGLETON_ID)
+        .values_list('dependency_version', flat=True)
+        .first()
+    )
+    return version or 0
+
+
+def find_path(dependencies, start_id, target_id):
+    """
+    DFS from start_id following "depends on" edges until target_id is reached.
+
+    Args:
+        dependencies: mapping {task_id: iterable of dependency ids}
+        start_id: task id to start walking from
+        target_id: task id we are looking for
+
+    Returns:
+        The path [start_id, ..., target_id] or an empty list if unreachable
+    """
+    visited = set()
+    stack = [(start_id, [start_id])]  # (current_node, path)
+
+    while stack:
+        current_node, path = stack.pop()
+
+        if current_node == target_id:
+            return path
+
+        visited.add(current_node)
+
+        for neighbor in dependencies.get(current_node, ()):
+            if neighbor not in visited:
+                stack.append((neighbor, path + [neighbor]))
+
+    return []
+
+
+def find_cycle(start_nodes, get_neighbors):
+    """
+    DFS-based topological sort that stops at the first cycle.
+
+    Args:
+        start_nodes: nodes to start walking from
+        get_neighbors: function node -> iterable of nodes it depends on
+
+    Returns:
+        The cycle as [n0, n1, ..., n0] or an empty list if there is none
+    """
+    ACTIVE, DONE = 1, 2
+    state = {}
+
+    for start in start_nodes:
+        if start in state:
+            continue
+        state[start] = ACTIVE
+        path = [start]
+        stack = [iter(get_neighbors(start))]
+
+        while stack:
+            for neighbor in stack[-1]:
+                neighbor_state = state.get(neighbor)
+                if neighbor_state == ACTIVE:
+                    # Back edge: the path from neighbor to here is a cycle
+                    return path[path.index(neighbor):] + [neighbor]
+                if neighbor_state is None:
+                    state[neighbor] = ACTIVE
+                    path.append(neighbor)
+                    stack.append(iter(get_neighbors(neighbor)))
+                    break
+            else:
+                state[path.pop()] = DONE
+                stack.pop()
+
+    return []
+
+
+class _OpenTransaction:
+    """What the index knows about a transaction that hasn't committed yet"""
+
+    def __init__(self):
+        self.start = None     # dependency_version before its first bump
+        self.version = None   # dependency_version after its last bump
+        self.mirrored = True  # its edge changes are in the index
+
+
+class _RequestScope:
+    checked = False
+
+
+class DependencyGraphIndex:
+    """
+    Process-level adjacency index of the TaskDependency table.
+
+    forward[task_id] -> ids of the tasks it depends on
+    reverse[task_id] -> ids of the tasks that depend on it
+
+    The index is built lazily on first use and kept up to date by the
+    TaskDependency post_save/post_delete signals (see signals.py), so a
+    transaction sees its own edges. Every edge write also moves
+    GraphVersion.dependency_version in its transaction (see concurrency.py),
+    and the index remembers the committed version it reflects plus the
+    version each open transaction of this process moved it to. Freshness is
+    one primary key read of the version, compared with what the calling
+    connection should see; a mismatch (writes of other processes, bulk
+    writes the signals don't see) triggers a rebuild, and so does a
+    transaction that ends without committing changes it made to the index.
+    Inside GraphIndexMiddleware the check runs once per request.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        # {token: connection} of the transactions with changes in the index
+        # that haven't committed yet
+        self._uncommitted = {}
+        self._open = {}  # {connection: _OpenTransaction}
+        self._reset()
+
+    def _reset(self):
+        self.forward = defaultdict(set)
+        self.reverse = defaultdict(set)
+        self._edges = {}  # {dependency_id: (task_id, depends_on_id)}
+        self._version = 0  # committed dependency_version the index reflects
+        self._loaded = False
+
+    @property
+    def lock(self):
+        """Hold this while reading forward/reverse directly"""
+        return self._lock
+
+    def _track_transaction(self):
+        """
+        Remember that the index holds changes of the current transaction.
+        Returns its _OpenTransaction, None outside a transaction.
+        """
+        from django.db import transaction
+
+        connection = _primary_connection()
+        if not connection.in_atomic_block:
+            return None
+        token = object()
+        self._uncommitted[token] = connection
+        transaction.on_commit(partial(self._committed, token))
+        return self._open.setdefault(connection, _OpenTransaction())
+
+    def _committed(self, token):
+        with self._lock:
+            connection = self._uncommitted.pop(token, None)
+            state = self._open.pop(connection, None)
+            if state is None:
+                # Handled by an earlier callback of the same commit
+                return
+            if not state.mirrored:
+                self._loaded = False
+            elif state.start is not None:
+                if state.start == self._version:
+                    self._version = state.version
+                else:
+                    # Someone else's commit came first; the index missed it
+                    self._loaded = False
+
+    def _sweep(self):
+        # A transaction that is over but never ran its on_commit callback
+        # rolled back (or is running it right now: rebuilding is harmless)
+        ended = [token for token, conn in self._uncommitted.items() if not conn.in_atomic_block]
+        for token in ended:
+            del self._uncommitted[token]
+        for conn in [conn for conn in self._open if not conn.in_atomic_block]:
+            del self._open[conn]
+        if ended:
+            self._loaded = False
+
+    def version_moved(self, version, mirrored=True):
+        """
+        The current transaction moved dependency_version to version.
+
+        mirrored: its edge changes went through add_edge()/remove_edge();
+        False for bulk writers, the index then reloads after their commit
+        """
+        with self._lock:
+            state = self._track_transaction()
+            if state is None:
+                # Autocommit: the change is already committed
+                if mirrored and version == self._version + 1:
+                    self._version = version
+                else:
+                    self._loaded = False
+                return
+            if state.start is None:
+                state.start = version - 1
+            state.version = version
+            state.mirrored = state.mirrored and mirrored
+
+    def rebuild(self):
+        """Reload every edge from the database"""
+        from .models import TaskDependency
+
+        with self._lock:
+            # The version first: a commit between the two reads leaves the
+            # index marked older than it is, which costs a rebuild, never
+            # a missed edge
+            version = read_dependency_version()
+            rows = TaskDependency.objects.values_list('id', 'task_id', 'depends_on_id')
+            self._reset()
+            for dep_id, task_id, depends_on_id in rows.iterator(chunk_size=5000):
+                self._add(dep_id, task_id, depends_on_id)
+            self._loaded = True
+
+            # Uncommitted rows of other connections aren't in here any more
+            connection = _primary_connection()
+            for conn, state in self._open.items():
+                if conn is not connection:
+                    state.mirrored = False
+            # Rows this transaction wrote are
+            state = self._track_transaction()
+            if state is None or state.start is None:
+                self._version = version
+            else:
+                # It holds the version row: nobody committed since it began
+                state.mirrored = True
+                self._version = state.start
+
+    def ensure_fresh(self, version=None):
+        """
+        Rebuild the index if it was never loaded, holds changes of a rolled
+        back transaction or doesn't match the dependency_version the current
+        connection sees.
+
+        version: that version when the caller just read it (skips the read
+        and the once-per-request shortcut)
+        """
+        with self._lock:
+            self._sweep()
+            state = self._open.get(_primary_connection())
+            mirrored = state is None or state.mirrored
+            scope = _request_scope.get()
+            if version is None:
+                if self._loaded and mirrored and scope is not None and scope.checked:
+                    return
+                version = read_dependency_version()
+            expected = state.version if state is not None and state.version is not None else self._version
+            if not self._loaded or not mirrored or version != expected:
+                self.rebuild()
+            if scope is not None:
+                scope.checked = True
+
+    def invalidate(self):
+        """Force a rebuild on next use"""
+        with self._lock:
+            self._loaded = False
+
+    def _add(self, dep_id, task_id, depends_on_id):
+        edge = self._edges.get(dep_id)
+        if edge == (task_id, depends_on_id):
+            return
+        if edge is not None:
+            # The id now names another edge (moved, or reused after a rollback)
+            self._remove(dep_id)
+        self._edges[dep_id] = (task_id, depends_on_id)
+        self.forward[task_id].add(depends_on_id)
+        self.reverse[depends_on_id].add(task_id)
+
+    def _remove(self, dep_id):
+        edge = self._edges.pop(dep_id, None)
+        if edge is None:
+            return
+        task_id, depends_on_id = edge
+        self.forward[task_id].discard(depends_on_id)
+        if not self.forward[task_id]:
+            del self.forward[task_id]
+        self.reverse[depends_on_id].discard(task_id)
+        if not self.reverse[depends_on_id]:
+            del self.reverse[depends_on_id]
+
+    def add_edge(self, dep_id, task_id, depends_on_id):
+        """Record a newly inserted TaskDependency row"""
+        with self._lock:
+            # Nothing to keep in sync until the index has been built
+            if self._loaded:
+                self._add(dep_id, task_id, depends_on_id)
+                self._track_transaction()
+
+    def remove_edge(self, dep_id):
+        """Forget a deleted TaskDependency row"""
+        with self._lock:
+            if self._loaded:
+                self._remove(dep_id)
+                self._track_transaction()
+
+    def direct_dependencies(self, task_id):
+        """Ids of the tasks task_id directly depends on"""
+        with self._lock:
+            self.ensure_fresh()
+            return set(self.forward.get(task_id, ()))
+
+    def find_path(self, start_id, target_id):
+        """DFS over the forward edges, see find_path()"""
+        with self._lock:
+            self.ensure_fresh()
+            return find_path(self.forward, start_id, target_id)
+
+    @staticmethod
+    def _reachable(adjacency, start_id):
+        seen = set()
+        stack = list(adjacency.get(start_id, ()))
+        while stack:
+            node = stack.pop()
+            if node not in seen:
+                seen.add(node)
+                stack.extend(adjacency.get(node, ()))
+        return seen
+
+    def ancestors(self, task_id):
+        """Ids of every task task_id depends on, directly or transitively"""
+        with self._lock:
+            self.ensure_fresh()
+            return self._reachable(self.forward, task_id)
+
+    def ancestors_by_task(self, task_ids=None):
+        """
+        {task_id: ancestors(task_id)} for many tasks with one freshness check.
+        Defaults to every task that has at least one dependency.
+        """
+        with self._lock:
+            self.ensure_fresh()
+            if task_ids is None:
+                task_ids = list(self.forward)
+            return {task_id: self._reachable(self.forward, task_id) for task_id in task_ids}
+
+    def descendants(self, task_id):
+        """Ids of every task that depends on task_id, directly or transitively"""
+        with self._lock:
+            self.ensure_fresh()
+            return self._reachable(self.reverse, task_id)
+
+
+# Shared by every request handled by this process
+graph_index = DependencyGraphIndex()
+
+
+class GraphIndexMiddleware:
+    """
+    Checks graph_index against the database once per request instead of on
+    every lookup: within a request the index only changes through the
+    request's own (mirrored) writes
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _request_scope.set(_RequestScope())
+        try:
+            return self.get_response(request)
+        finally:
+            _request_scope.reset(token)
+
+    async def __acall__(self, request):
+        # sync_to_async copies the context: sync views share the scope
+        token = _request_scope.set(_RequestScope())
+        try:
+            return await self.get_response(request)
+        finally:
+            _request_scope.reset(token)
@@ -0,0 +1,286 @@
+# backend/tasks/jobs.py
+"""
+Background job queue for status recomputation.
+
+Requests that change statuses or remove edges don't walk the downstream
+graph themselves any more. They call enqueue_recompute(), which writes a
+Job and one JobItem per task in the request's transaction and answers with
+the job id; once the transaction commits, a pool of worker threads in the
+same process is woken up. There is no broker: the job tables are the
+queue, so queued work survives restarts and any process (or
+`manage.py run_job_worker`) can pick it up.
+
+A worker claims up to TASK_JOB_BATCH_SIZE distinct task ids at a time and
+with them every queued item for those tasks, across all jobs. Ten edits of
+the same task before a worker gets to it are one recomputation, and one
+batch is a single propagate_status_changes() pass over the union of their
+downstream subgraphs. The propagation and marking the items done commit
+together, so an item left "running" by a crashed worker is simply claimed
+again after TASK_JOB_CLAIM_TIMEOUT_SECONDS (recomputing is idempotent).
+"""
+import logging
+import threading
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Min
+from django.utils import timezone
+from .graph import graph_index
+from .metrics import timed
+from .propagation import propagate_status_changes
+from .utils import QUERY_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class JobStats:
+    """Process-level counters for the job queue"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.enqueued = 0    # items written
+        self.processed = 0   # items finished (done or failed)
+        self.coalesced = 0   # items that shared a recomputation with another item of the same task
+        self.batches = 0     # propagation passes
+        self.failures = 0    # batches that raised
+
+    def record(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'enqueued': self.enqueued,
+                'processed': self.processed,
+                'coalesced': self.coalesced,
+                'batches': self.batches,
+                'failures': self.failures,
+            }
+
+
+job_stats = JobStats()
+
+
+def enqueue_recompute(task_ids, include_self=True):
+    """
+    Queue a status recomputation for task_ids and everything downstream.
+
+    Args:
+        task_ids: ids of the tasks whose status or dependencies changed
+        include_self: also re-derive task_ids themselves (False when their
+            status was just set by hand, only their dependents need a look)
+
+    Returns:
+        The Job, or None when there is nothing to do. Workers are woken
+        when the current transaction commits.
+    """
+    from .models import Job, JobItem
+
+    task_ids = sorted(set(task_ids))
+    if not task_ids:
+        return None
+
+    job = Job.objects.create(kind=Job.RECOMPUTE_STATUS, task_ids=task_ids)
+    JobItem.objects.bulk_create(
+        [JobItem(job=job, task_id=task_id, include_self=include_self) for task_id in task_ids],
+        batch_size=QUERY_BATCH_SIZE
+    )
+    job_stats.record(enqueued=len(task_ids))
+    transaction.on_commit(worker_pool.notify)
+    return job
+
+
+def _requeue_stale_items():
+    """Put back items whose worker died while running them"""
+    from .models import Job, JobItem
+
+    cutoff = timezone.now() - timedelta(seconds=_setting('TASK_JOB_CLAIM_TIMEOUT_SECONDS', 300))
+    return JobItem.objects.filter(state=Job.RUNNING, claimed_at__lt=cutoff).update(
+        state=Job.QUEUED, claim='', claimed_at=None
+    )
+
+
+def _claim_batch(batch_size):
+    """
+    Claim every queued item of the (at most) batch_size tasks that have
+    waited longest. Returns the claimed items.
+    """
+    from .models import Job, JobItem
+
+    with transaction.atomic():
+        _requeue_stale_items()
+        task_ids = list(
+            JobItem.objects.filter(state=Job.QUEUED)
+            .values('task_id')
+            .annotate(first_id=Min('id'))
+            .order_by('first_id')
+            .values_list('task_id', flat=True)[:batch_size]
+        )
+        if not task_ids:
+            return []
+
+        # The state condition makes the claim exclusive: items another
+        # worker took in the meantime don't match any more
+        token = uuid.uuid4().hex
+        now = timezone.now()
+        JobItem.objects.filter(state=Job.QUEUED, task_id__in=task_ids).update(
+            state=Job.RUNNING, claim=token, claimed_at=now
+        )
+        items = list(JobItem.objects.filter(claim=token))
+        Job.objects.filter(
+            id__in={item.job_id for item in items}, state=Job.QUEUED
+        ).update(state=Job.RUNNING, started_at=now)
+    return items
+
+
+def _recompute_roots(items):
+    """The tasks to re-derive for a batch of items"""
+    roots = {item.task_id for item in items if item.include_self}
+    with graph_index.lock:
+        graph_index.ensure_fresh()
+        for item in items:
+            if not item.include_self:
+                roots.update(graph_index.reverse.get(item.task_id, ()))
+    return roots
+
+
+def _finish_jobs(job_ids, updated_task_ids=(), error=''):
+    """Record the outcome on the jobs and close those with no open items"""
+    from .models import Job, JobItem
+
+    now = timezone.now()
+    jobs = list(Job.objects.filter(id__in=job_ids))
+    open_job_ids = set(
+        JobItem.objects.filter(job_id__in=job_ids, state__in=[Job.QUEUED, Job.RUNNING])
+        .values_list('job_id', flat=True)
+    )
+    for job in jobs:
+        if updated_task_ids:
+            previous = job.result.get('updated_task_ids', [])
+            job.result = {'updated_task_ids': sorted(set(previous) | set(updated_task_ids))}
+        if error:
+            job.error = error
+        if job.id not in open_job_ids:
+            failed = error or JobItem.objects.filter(job=job, state=Job.FAILED).exists()
+            job.state = Job.FAILED if failed else Job.DONE
+            job.finished_at = now
+    Job.objects.bulk_update(jobs, ['result', 'error', 'state', 'finished_at'])
+
+
+@timed
+def run_batch(batch_size=None):
+    """
+    Claim and process one batch of queued items.
+
+    Returns:
+        Number of items processed (0 when the queue is empty)
+    """
+    from .models import Job, JobItem
+
+    items = _claim_batch(batch_size or _setting('TASK_JOB_BATCH_SIZE', 200))
+    if not items:
+        return 0
+    claimed = JobItem.objects.filter(claim=items[0].claim)
+    job_ids = {item.job_id for item in items}
+
+    try:
+        with transaction.atomic():
+            updated_task_ids = propagate_status_changes(_recompute_roots(items))
+            claimed.update(state=Job.DONE)
+            _finish_jobs(job_ids, updated_task_ids)
+    except Exception as exc:
+        logger.exception("Status recomputation failed for jobs %s", sorted(job_ids))
+        max_attempts = _setting('TASK_JOB_MAX_ATTEMPTS', 3)
+        with transaction.atomic():
+            claimed.update(attempts=F('attempts') + 1)
+            failed = claimed.filter(attempts__gte=max_attempts)
+            failed_job_ids = set(failed.values_list('job_id', flat=True))
+            failed_count = failed.update(state=Job.FAILED)
+            claimed.filter(state=Job.RUNNING).update(state=Job.QUEUED, claim='', claimed_at=None)
+            if failed_job_ids:
+                _finish_jobs(failed_job_ids, error=str(exc) or exc.__class__.__name__)
+        job_stats.record(processed=failed_count, batches=1, failures=1)
+        return len(items)
+
+    task_count = len({item.task_id for item in items})
+    job_stats.record(processed=len(items), coalesced=len(items) - task_count, batches=1)
+    return len(items)
+
+
+def run_pending(batch_size=None):
+    """Process queued items in this thread until the queue is empty"""
+    total = 0
+    while True:
+        processed = run_batch(batch_size)
+        if not processed:
+            return total
+        total += processed
+
+
+class WorkerPool:
+    """
+    TASK_JOB_WORKERS daemon threads draining the queue. Server processes
+    start it when the app loads (see apps.py); management commands and
+    migrations don't, their jobs wait for a server or `manage.py
+    run_job_worker`. With TASK_JOB_WORKERS = 0 nothing runs in the web
+    process and run_job_worker does the work.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._threads = []
+        self._pending = False
+
+    def notify(self):
+        """Wake the workers, if this process runs any"""
+        with self._condition:
+            self._pending = True
+            self._condition.notify_all()
+
+    def start(self):
+        """
+        Start the worker threads (once); False when there are none to start.
+        The first round runs at once: it picks up the items queued while no
+        worker was running and reclaims the expired claims of dead ones.
+        """
+        count = _setting('TASK_JOB_WORKERS', 2)
+        with self._condition:
+            if not self._threads and count:
+                self._pending = True
+                for number in range(count):
+                    thread = threading.Thread(
+                        target=self._run, name=f'task-job-worker-{number}', daemon=True
+                    )
+                    thread.start()
+                    self._threads.append(thread)
+        return bool(self._threads)
+
+    def _wait(self):
+        # Woken by notify(); the timeout also picks up items queued by other
+        # processes and stale claims
+        with self._condition:
+            if not self._pending:
+                self._condition.wait(_setting('TASK_JOB_POLL_SECONDS', 5))
+            self._pending = False
+
+    def _run(self):
+        while True:
+            self._wait()
+            try:
+                run_pending()
+            except Exception:
+                # Database trouble while claiming; try again on the next round
+                logger.exception("Job worker failed")
+            finally:
+                close_old_connections()
+
+
+worker_pool = WorkerPool()
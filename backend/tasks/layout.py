@@ -0,0 +1,437 @@
+# backend/tasks/layout.py
+"""
+Layered (Sugiyama-style) layout of the dependency graph for the graph view.
+
+Each weakly connected component is laid out on its own:
+
+1. Layering: longest path from the tasks without dependencies, so every
+   task sits below all of its dependencies, then tightened so tasks sit
+   right above their highest dependent. Edges still spanning several
+   layers get a dummy vertex in each layer in between; the dummies become
+   the bends of the edge's route.
+2. Crossing reduction: alternating down/up sweeps that sort each layer by
+   the barycenter of its neighbours in the layer just fixed. The ordering
+   with the fewest crossings seen is kept.
+3. Coordinate assignment: each layer is pulled towards the mean x of its
+   neighbours in the adjacent layers, keeping its order and minimum
+   separations; every pass is solved exactly as an isotonic regression
+   (pool adjacent violators).
+
+The components are then packed into rows. Component layouts are cached
+under a digest of their nodes and edges, so after a small edit only the
+component that changed is laid out again; the assembled layout is cached
+per graph version, like the schedule. Both live in the response cache
+(settings.TASK_RESPONSE_CACHE); with caching off everything is computed.
+"""
+import hashlib
+from collections import defaultdict, namedtuple
+
+from .caching import get_response_cache
+from .metrics import timed
+from .versioning import get_graph_version
+
+CACHE_TIMEOUT = 60 * 60
+
+# Distances in pixels, between centres
+NODE_SEPARATION = 180
+DUMMY_SEPARATION = 40
+LAYER_SEPARATION = 140
+COMPONENT_SEPARATION = 180
+MARGIN = 100
+ROW_WIDTH = 2000  # components are packed into rows about this wide
+
+MAX_SWEEPS = 12
+COORDINATE_PASSES = 4
+
+ComponentLayout = namedtuple('ComponentLayout', ['width', 'height', 'positions', 'routes'])
+
+
+def longest_path_layers(nodes, edges):
+    """
+    {task_id: layer}; layer 0 holds the tasks without dependencies.
+
+    Args:
+        nodes: task ids
+        edges: (task_id, depends_on_id) pairs
+    """
+    dependents = defaultdict(list)
+    remaining = dict.fromkeys(nodes, 0)
+    for task_id, depends_on_id in edges:
+        dependents[depends_on_id].append(task_id)
+        remaining[task_id] += 1
+
+    layers = {node: 0 for node, count in remaining.items() if count == 0}
+    queue = list(layers)
+    while queue:
+        node = queue.pop()
+        for child in dependents[node]:
+            layers[child] = max(layers.get(child, 0), layers[node] + 1)
+            remaining[child] -= 1
+            if remaining[child] == 0:
+                queue.append(child)
+
+    # Only a cycle leaves tasks unplaced; put them on top rather than fail
+    for node in nodes:
+        layers.setdefault(node, 0)
+    return layers
+
+
+def tighten_layers(layers, edges):
+    """
+    Move every task that has dependents down to the layer just above its
+    highest dependent. Longest-path layering puts every task as high as
+    it can go, which stretches the edges of shallow tasks with deep
+    dependents over many layers (each one a dummy vertex to order and
+    place); this keeps the layering valid and the edges short.
+    """
+    dependents = defaultdict(list)
+    for task_id, depends_on_id in edges:
+        dependents[depends_on_id].append(task_id)
+
+    layers = dict(layers)
+    for node in sorted(layers, key=layers.get, reverse=True):
+        children = dependents.get(node)
+        if children:
+            layers[node] = min(layers[child] for child in children) - 1
+    return layers
+
+
+def count_crossings(upper, lower_size, position, lower_neighbors):
+    """
+    Crossings between the edges of a layer and the layer below it (with
+    lower_size vertices), in O(E log V): inversions of the edges' lower ends
+    when they are listed in the order of their upper ends.
+    """
+    tree = [0] * (lower_size + 1)
+    crossings = seen = 0
+    for vertex in upper:
+        adjacent = lower_neighbors[vertex]
+        ends = [position[adjacent[0]]] if len(adjacent) == 1 else sorted([position[u] for u in adjacent])
+        for lower in ends:
+            # Earlier edges ending further right cross this one
+            index, not_greater = lower + 1, 0
+            while index > 0:
+                not_greater += tree[index]
+                index -= index & -index
+            crossings += seen - not_greater
+            index = lower + 1
+            while index <= lower_size:
+                tree[index] += 1
+                index += index & -index
+            seen += 1
+    return crossings
+
+
+def _isotonic_placement(targets, offsets):
+    """
+    x minimising sum((x[i] - targets[i]) ** 2) subject to
+    x[i + 1] - x[i] >= offsets[i + 1] - offsets[i]
+    """
+    blocks = []  # [sum, count]
+    for target, offset in zip(targets, offsets):
+        blocks.append([target - offset, 1])
+        while len(blocks) > 1 and blocks[-2][0] * blocks[-1][1] > blocks[-1][0] * blocks[-2][1]:
+            total, count = blocks.pop()
+            blocks[-1][0] += total
+            blocks[-1][1] += count
+
+    placement = []
+    for total, count in blocks:
+        placement.extend([total / count] * count)
+    return [value + offset for value, offset in zip(placement, offsets)]
+
+
+class _LayeredGraph:
+    """A component with dummy vertices: vertex i < real_count is nodes[i]"""
+
+    def __init__(self, nodes, edges):
+        node_layers = tighten_layers(longest_path_layers(nodes, edges), edges)
+        self.real_count = len(nodes)
+        index = {node: number for number, node in enumerate(nodes)}
+        self.layer_of = [node_layers[node] for node in nodes]
+        self.upper = [[] for _ in nodes]   # neighbours one layer up
+        self.lower = [[] for _ in nodes]   # neighbours one layer down
+        self.chains = {}                   # {(task_id, depends_on_id): [vertex, ...] top to bottom}
+
+        for task_id, depends_on_id in edges:
+            top, bottom = index[depends_on_id], index[task_id]
+            chain = [top]
+            if self.layer_of[bottom] > self.layer_of[top]:
+                for layer in range(self.layer_of[top] + 1, self.layer_of[bottom]):
+                    chain.append(self._add_dummy(layer))
+                chain.append(bottom)
+                for above, below in zip(chain, chain[1:]):
+                    self.lower[above].append(below)
+                    self.upper[below].append(above)
+            else:
+                chain.append(bottom)  # only after a cycle: drawn straight, not layered
+            self.chains[task_id, depends_on_id] = chain
+
+        self.layers = [[] for _ in range(max(self.layer_of, default=-1) + 1)]
+        for vertex, layer in enumerate(self.layer_of):
+            self.layers[layer].append(vertex)
+
+    def _add_dummy(self, layer):
+        self.layer_of.append(layer)
+        self.upper.append([])
+        self.lower.append([])
+        return len(self.layer_of) - 1
+
+    def is_dummy(self, vertex):
+        return vertex >= self.real_count
+
+    def positions(self):
+        position = [0] * len(self.layer_of)
+        for layer in self.layers:
+            for number, vertex in enumerate(layer):
+                position[vertex] = number
+        return position
+
+    def crossings(self, position):
+        return sum(
+            count_crossings(upper, len(lower), position, self.lower)
+            for upper, lower in zip(self.layers, self.layers[1:])
+        )
+
+    def reduce_crossings(self):
+        """Barycenter sweeps; leaves self.layers in the best order found"""
+        position = self.positions()
+        best_layers = [list(layer) for layer in self.layers]
+        best = self.crossings(position)
+        stale = 0
+        for _sweep in range(MAX_SWEEPS):
+            if best == 0 or stale == 2:
+                break
+            for number in range(1, len(self.layers)):
+                self._sort_layer(number, self.upper, position)
+            for number in range(len(self.layers) - 2, -1, -1):
+                self._sort_layer(number, self.lower, position)
+            crossings = self.crossings(position)
+            if crossings < best:
+                best, stale = crossings, 0
+                best_layers = [list(layer) for layer in self.layers]
+            else:
+                stale += 1
+        self.layers = best_layers
+        return best
+
+    def _sort_layer(self, number, neighbors, position):
+        keyed = []
+        for vertex in self.layers[number]:
+            adjacent = neighbors[vertex]
+            if len(adjacent) == 1:
+                barycenter = position[adjacent[0]]
+            elif adjacent:
+                barycenter = sum([position[u] for u in adjacent]) / len(adjacent)
+            else:
+                barycenter = position[vertex]  # no pull: stay where it is
+            keyed.append((barycenter, position[vertex], vertex))
+        keyed.sort()
+        layer = [vertex for _barycenter, _position, vertex in keyed]
+        for index, vertex in enumerate(layer):
+            position[vertex] = index
+        self.layers[number] = layer
+
+    def assign_coordinates(self):
+        """x of every vertex, leftmost at 0"""
+        x = [0.0] * len(self.layer_of)
+        layer_offsets = []
+        for layer in self.layers:
+            offsets, offset, previous = [], 0.0, None
+            for vertex in layer:
+                if previous is not None:
+                    offset += self._separation(previous, vertex)
+                offsets.append(offset)
+                previous = vertex
+            layer_offsets.append(offsets)
+            for vertex, offset in zip(layer, offsets):
+                x[vertex] = offset
+
+        passes = [self.upper, self.lower] * COORDINATE_PASSES
+        passes.append(None)  # finally balance between both sides
+        for neighbors in passes:
+            for layer, offsets in zip(self.layers, layer_offsets):
+                targets = []
+                for vertex in layer:
+                    adjacent = (self.upper[vertex] + self.lower[vertex]) if neighbors is None else neighbors[vertex]
+                    targets.append(sum(x[u] for u in adjacent) / len(adjacent) if adjacent else x[vertex])
+                for vertex, value in zip(layer, _isotonic_placement(targets, offsets)):
+                    x[vertex] = value
+
+        left = min(x, default=0.0)
+        return [value - left for value in x]
+
+    def _separation(self, left, right):
+        if self.is_dummy(left) and self.is_dummy(right):
+            return DUMMY_SEPARATION
+        if self.is_dummy(left) or self.is_dummy(right):
+            return (NODE_SEPARATION + DUMMY_SEPARATION) / 2
+        return NODE_SEPARATION
+
+
+def layout_component(nodes, edges):
+    """
+    Lay out one connected component.
+
+    Args:
+        nodes: sorted task ids
+        edges: sorted (task_id, depends_on_id) pairs between them
+
+    Returns:
+        ComponentLayout with coordinates relative to the component's top
+        left corner; routes go from the task to the task it depends on
+    """
+    if len(nodes) == 1:
+        return ComponentLayout(0, 0, {nodes[0]: (0, 0)}, {})
+
+    graph = _LayeredGraph(nodes, edges)
+    graph.reduce_crossings()
+    x = graph.assign_coordinates()
+
+    def point(vertex):
+        return round(x[vertex], 1), graph.layer_of[vertex] * LAYER_SEPARATION
+
+    positions = {node: point(vertex) for vertex, node in enumerate(nodes)}
+    routes = {}
+    for edge, chain in graph.chains.items():
+        coordinates = []
+        for vertex in reversed(chain):
+            coordinates.extend(point(vertex))
+        routes[edge] = coordinates
+    return ComponentLayout(
+        width=round(max(x, default=0.0), 1),
+        height=(len(graph.layers) - 1) * LAYER_SEPARATION,
+        positions=positions,
+        routes=routes,
+    )
+
+
+def connected_components(nodes, edges):
+    """[(sorted nodes, sorted edges)], largest first"""
+    parent = {node: node for node in nodes}
+
+    def find(node):
+        root = node
+        while parent[root] != root:
+            root = parent[root]
+        while parent[node] != root:
+            parent[node], node = root, parent[node]
+        return root
+
+    for task_id, depends_on_id in edges:
+        a, b = find(task_id), find(depends_on_id)
+        if a != b:
+            parent[max(a, b)] = min(a, b)
+
+    members, component_edges = defaultdict(list), defaultdict(list)
+    for node in nodes:
+        members[find(node)].append(node)
+    for edge in edges:
+        component_edges[find(edge[0])].append(edge)
+    components = [
+        (sorted(members[root]), sorted(component_edges[root]))
+        for root in members
+    ]
+    components.sort(key=lambda component: (-len(component[0]), component[0][0]))
+    return components
+
+
+def _component_key(nodes, edges):
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(nodes).encode('ascii'))
+    digest.update(repr(edges).encode('ascii'))
+    return f'tasks:layout:component:{digest.hexdigest()}'
+
+
+def _cached_component_layouts(components):
+    """Layouts of components, from the cache where their structure is unchanged"""
+    cache = get_response_cache()
+    if cache is None:
+        return [layout_component(nodes, edges) for nodes, edges in components], len(components)
+    keys = [_component_key(nodes, edges) if edges else None for nodes, edges in components]
+    cached = cache.get_many([key for key in keys if key])
+    layouts, fresh = [], {}
+    for key, (nodes, edges) in zip(keys, components):
+        component_layout = cached.get(key) if key else None
+        if component_layout is None:
+            component_layout = layout_component(nodes, edges)
+            if key:
+                fresh[key] = component_layout
+        layouts.append(component_layout)
+    if fresh:
+        cache.set_many(fresh, CACHE_TIMEOUT)
+    return layouts, len(fresh)
+
+
+@timed
+def compute_layout():
+    """
+    Returns:
+        dict with the canvas size, node coordinates and edge routes as
+        parallel arrays (like the graph snapshot); a route is a flat
+        [x0, y0, x1, y1, ...] list from the task to its dependency, through
+        the bends of edges spanning several layers
+    """
+    from .models import Task, TaskDependency
+
+    nodes = list(Task.objects.order_by('id').values_list('id', flat=True).iterator(chunk_size=5000))
+    edge_rows = list(
+        TaskDependency.objects.order_by('id')
+        .values_list('id', 'task_id', 'depends_on_id').iterator(chunk_size=5000)
+    )
+    # An edge whose task was deleted in between the two queries has no route
+    known = set(nodes)
+    edges = [
+        (task_id, depends_on_id) for _edge_id, task_id, depends_on_id in edge_rows
+        if task_id in known and depends_on_id in known
+    ]
+
+    components = connected_components(nodes, edges)
+    layouts, recomputed = _cached_component_layouts(components)
+
+    # Shelf packing: left to right, a new row when this one is full
+    row_width = max([ROW_WIDTH] + [component_layout.width for component_layout in layouts])
+    node_ids, xs, ys, routes = [], [], [], {}
+    left = top = row_height = width = 0
+    for component_layout in layouts:
+        if left and left + component_layout.width > row_width:
+            top += row_height + LAYER_SEPARATION
+            left = row_height = 0
+        for node, (x, y) in component_layout.positions.items():
+            node_ids.append(node)
+            xs.append(round(MARGIN + left + x, 1))
+            ys.append(MARGIN + top + y)
+        for edge, coordinates in component_layout.routes.items():
+            routes[edge] = [
+                round(value + (MARGIN + left if number % 2 == 0 else MARGIN + top), 1)
+                for number, value in enumerate(coordinates)
+            ]
+        width = max(width, left + component_layout.width)
+        row_height = max(row_height, component_layout.height)
+        left += component_layout.width + COMPONENT_SEPARATION
+
+    return {
+        'width': width + 2 * MARGIN,
+        'height': top + row_height + 2 * MARGIN,
+        'nodes': {'id': node_ids, 'x': xs, 'y': ys},
+        'edges': {
+            'id': [edge_id for edge_id, _task_id, _depends_on_id in edge_rows],
+            'points': [routes.get((task_id, depends_on_id), []) for _edge_id, task_id, depends_on_id in edge_rows],
+        },
+        'components': len(components),
+        'recomputed_components': recomputed,
+    }
+
+
+def get_layout():
+    """compute_layout() cached under the current graph version"""
+    version = get_graph_version()
+    cache = get_response_cache()
+    if cache is None:
+        return version, compute_layout()
+    key = f'tasks:layout:{version}'
+    layout = cache.get(key)
+    if layout is None:
+        layout = compute_layout()
+        cache.set(key, layout, CACHE_TIMEOUT)
+    return version, layout
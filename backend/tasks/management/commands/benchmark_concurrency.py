@@ -0,0 +1,117 @@
+# backend/tasks/management/commands/benchmark_concurrency.py
+import json
+import logging
+import os
+import shutil
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from tasks.benchmarks import ConcurrencyBenchmark
+from tasks.database import SQLITE_PROFILES, read_database
+from .benchmark_tasks import Command as BenchmarkTasksCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure read throughput alone and during sustained writes, once per "
+        "SQLite profile, in a throwaway database file; prints JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--profiles', default='default,production',
+            help=f"Comma separated SQLite profiles to compare ({', '.join(SQLITE_PROFILES)})"
+        )
+        parser.add_argument('--tasks', type=int, default=2000, help="Tasks in the random DAG")
+        parser.add_argument('--readers', type=int, default=4, help="Reader threads")
+        parser.add_argument('--writers', type=int, default=1, help="Writer threads")
+        parser.add_argument('--seconds', type=float, default=5.0, help="Duration of each phase")
+        parser.add_argument(
+            '--no-read-database', action='store_true',
+            help="Send the reads to the primary connection too"
+        )
+        parser.add_argument('--seed', type=int, default=0, help="Random seed")
+        parser.add_argument('--output', help="Write the JSON report to this file instead of stdout")
+
+    def handle(self, *args, **options):
+        profiles = [profile.strip() for profile in options['profiles'].split(',') if profile.strip()]
+        unknown = set(profiles) - set(SQLITE_PROFILES)
+        if unknown:
+            raise CommandError(f"Unknown profiles: {', '.join(sorted(unknown))}")
+        if options['tasks'] < 3:
+            raise CommandError("--tasks must be at least 3")
+        if connections[DEFAULT_DB_ALIAS].vendor != 'sqlite':
+            raise CommandError("The benchmarks run on SQLite only")
+
+        request_logger = logging.getLogger('django.request')
+        log_level = request_logger.level
+        request_logger.setLevel(logging.CRITICAL)
+
+        read_alias = None if options['no_read_database'] else read_database()
+        directory = tempfile.mkdtemp(prefix='task-benchmark-')
+        setup_test_environment()
+        try:
+            runs = []
+            for profile in profiles:
+                # Measure the database, not response cache hits or job workers
+                with override_settings(
+                    TASK_SQLITE_PROFILE=profile, TASK_READ_DATABASE=read_alias,
+                    TASK_RESPONSE_CACHE=None, TASK_JOB_WORKERS=0,
+                ):
+                    path = os.path.join(directory, f'{profile}.sqlite3')
+                    result = self.run_profile(path, read_alias, options)
+                runs.append({'profile': profile, **result})
+        finally:
+            teardown_test_environment()
+            request_logger.setLevel(log_level)
+            shutil.rmtree(directory, ignore_errors=True)
+
+        report = {
+            'meta': {
+                'commit': BenchmarkTasksCommand.git_commit(),
+                'read_database': read_alias,
+                'options': {
+                    key: options[key]
+                    for key in ('profiles', 'tasks', 'readers', 'writers', 'seconds', 'seed')
+                },
+            },
+            'runs': runs,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+            self.stderr.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+    def run_profile(self, path, read_alias, options):
+        """Create a database file at path, point both connections at it and run"""
+        primary = connections[DEFAULT_DB_ALIAS]
+        test_settings = primary.settings_dict.setdefault('TEST', {})
+        old_test_name = test_settings.get('NAME')
+        test_settings['NAME'] = path
+        old_name = primary.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+
+        reader = connections[read_alias] if read_alias and read_alias != DEFAULT_DB_ALIAS else None
+        if reader is not None:
+            reader.close()
+            old_read_name = reader.settings_dict['NAME']
+            reader.settings_dict['NAME'] = path
+        try:
+            with primary.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                journal_mode = cursor.fetchone()[0]
+            benchmark = ConcurrencyBenchmark(
+                options['tasks'], readers=options['readers'], writers=options['writers'],
+                seconds=options['seconds'], seed=options['seed'],
+            )
+            return {'journal_mode': journal_mode, **benchmark.run()}
+        finally:
+            if reader is not None:
+                reader.close()
+                reader.settings_dict['NAME'] = old_read_name
+            primary.creation.destroy_test_db(old_name, verbosity=0)
+            test_settings['NAME'] = old_test_name
@@ -0,0 +1,101 @@
+# backend/tasks/management/commands/benchmark_tasks.py
+import json
+import logging
+import platform
+import sqlite3
+import subprocess
+from datetime import datetime, timezone
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from tasks.benchmarks import SHAPES, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the task API in-process on synthetic graphs (chains, fans, "
+        "random DAGs) in a throwaway SQLite test database; prints JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--shapes', default=','.join(SHAPES),
+            help=f"Comma separated graph shapes to run ({', '.join(SHAPES)})"
+        )
+        parser.add_argument('--tasks', type=int, default=1000, help="Tasks per graph")
+        parser.add_argument(
+            '--edges', type=int, default=None,
+            help="Edges of the random DAG (default: 5 per task)"
+        )
+        parser.add_argument('--repeat', type=int, default=20, help="Requests per operation")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed")
+        parser.add_argument('--output', help="Write the JSON report to this file instead of stdout")
+
+    def handle(self, *args, **options):
+        shapes = [shape.strip() for shape in options['shapes'].split(',') if shape.strip()]
+        unknown = set(shapes) - set(SHAPES)
+        if unknown:
+            raise CommandError(f"Unknown shapes: {', '.join(sorted(unknown))}")
+        if options['tasks'] < 3:
+            raise CommandError("--tasks must be at least 3")
+        if connection.vendor != 'sqlite':
+            raise CommandError("The benchmarks run on SQLite only")
+
+        # Cycle rejections are expected 400s, don't log each of them
+        request_logger = logging.getLogger('django.request')
+        log_level = request_logger.level
+        request_logger.setLevel(logging.ERROR)
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            # Measure the real work, not response cache hits; background jobs
+            # run inside the measured operations, not in worker threads
+            # (and only the test database, which the read connection isn't
+            # pointed at)
+            with override_settings(TASK_RESPONSE_CACHE=None, TASK_JOB_WORKERS=0, TASK_READ_DATABASE=None):
+                scenarios = run_benchmarks(
+                    shapes=shapes,
+                    task_count=options['tasks'],
+                    edge_count=options['edges'],
+                    repeat=options['repeat'],
+                    seed=options['seed'],
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            request_logger.setLevel(log_level)
+
+        report = {
+            'meta': {
+                'commit': self.git_commit(),
+                'created_at': datetime.now(timezone.utc).isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'sqlite': sqlite3.sqlite_version,
+                'options': {
+                    key: options[key] for key in ('shapes', 'tasks', 'edges', 'repeat', 'seed')
+                },
+            },
+            'scenarios': scenarios,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+            self.stderr.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+    @staticmethod
+    def git_commit():
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR,
+                capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,28 @@
+# backend/tasks/management/commands/check_task_closure.py
+from django.core.management.base import BaseCommand, CommandError
+from tasks.closure import check_closure
+
+
+class Command(BaseCommand):
+    help = "Verify that the TaskClosure table matches the current dependencies"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--show', type=int, default=10,
+            help="How many bad pairs of each kind to print"
+        )
+
+    def handle(self, *args, **options):
+        missing, extra = check_closure()
+        if not missing and not extra:
+            self.stdout.write(self.style.SUCCESS("Closure table is consistent"))
+            return
+
+        for label, pairs in (("Missing", missing), ("Unexpected", extra)):
+            for ancestor_id, descendant_id in sorted(pairs)[:options['show']]:
+                self.stdout.write(f"{label}: task {descendant_id} -> task {ancestor_id}")
+
+        raise CommandError(
+            f"Closure table is inconsistent: {len(missing)} missing, {len(extra)} unexpected rows. "
+            "Run `python manage.py rebuild_task_closure` to fix it."
+        )
@@ -0,0 +1,23 @@
+# backend/tasks/management/commands/export_tasks.py
+from django.core.management.base import BaseCommand
+from tasks.transfer import export_lines
+
+
+class Command(BaseCommand):
+    help = "Write every task and dependency as NDJSON (see tasks/transfer.py)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help="File to write (default: stdout)")
+
+    def handle(self, *args, **options):
+        if not options['output']:
+            for line in export_lines():
+                self.stdout.write(line, ending='')
+            return
+
+        count = 0
+        with open(options['output'], 'w', encoding='utf-8') as f:
+            for line in export_lines():
+                f.write(line)
+                count += 1
+        self.stderr.write(self.style.SUCCESS(f"Wrote {count} lines to {options['output']}"))
@@ -0,0 +1,41 @@
+# backend/tasks/management/commands/import_tasks.py
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from tasks.jobs import run_pending
+from tasks.transfer import import_lines, GraphImportError, IMPORT_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = "Load an NDJSON export (see tasks/transfer.py), keeping ids; all or nothing"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="NDJSON file, or - for stdin")
+        parser.add_argument(
+            '--batch-size', type=int, default=IMPORT_BATCH_SIZE,
+            help="Rows written per INSERT"
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1")
+
+        try:
+            if options['path'] == '-':
+                result = import_lines(sys.stdin, batch_size=options['batch_size'])
+            else:
+                with open(options['path'], encoding='utf-8') as f:
+                    result = import_lines(f, batch_size=options['batch_size'])
+        except OSError as exc:
+            raise CommandError(str(exc))
+        except GraphImportError as exc:
+            raise CommandError(f"Nothing imported: {json.dumps(exc.detail)}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result['tasks']} tasks and {result['dependencies']} dependencies"
+        ))
+        if result['job_id']:
+            # No worker pool in a management command: do the job here
+            run_pending()
+            self.stdout.write(f"Statuses of existing tasks re-derived (job {result['job_id']})")
@@ -0,0 +1,17 @@
+# backend/tasks/management/commands/prune_change_events.py
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from tasks.events import prune_events
+
+
+class Command(BaseCommand):
+    help = "Delete old change-log events (clients further behind get a 410 and reload)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help="Keep events newer than this")
+
+    def handle(self, *args, **options):
+        deleted = prune_events(timezone.now() - timedelta(days=options['days']))
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} events"))
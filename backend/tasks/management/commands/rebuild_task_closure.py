@@ -0,0 +1,11 @@
+# backend/tasks/management/commands/rebuild_task_closure.py
+from django.core.management.base import BaseCommand
+from tasks.closure import rebuild_closure
+
+
+class Command(BaseCommand):
+    help = "Recompute the TaskClosure table from the current dependencies"
+
+    def handle(self, *args, **options):
+        count = rebuild_closure()
+        self.stdout.write(self.style.SUCCESS(f"Closure rebuilt with {count} rows"))
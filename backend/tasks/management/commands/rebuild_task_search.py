@@ -0,0 +1,14 @@
+# backend/tasks/management/commands/rebuild_task_search.py
+from django.core.management.base import BaseCommand
+from django.db import connection
+from tasks.search import install_fts
+
+
+class Command(BaseCommand):
+    help = "Recreate the task full-text search table and its triggers, then reindex"
+
+    def handle(self, *args, **options):
+        if install_fts(connection):
+            self.stdout.write(self.style.SUCCESS("Task search index rebuilt"))
+        else:
+            self.stdout.write("Full-text search table is only used on SQLite, nothing to do")
@@ -0,0 +1,14 @@
+# backend/tasks/management/commands/rebuild_task_stats.py
+from django.core.management.base import BaseCommand
+from django.db import connection
+from tasks.stats import install_stats
+
+
+class Command(BaseCommand):
+    help = "Recreate the task counter triggers, then recount every counter"
+
+    def handle(self, *args, **options):
+        if install_stats(connection):
+            self.stdout.write(self.style.SUCCESS("Task counters rebuilt"))
+        else:
+            self.stdout.write("Task counters are only kept on SQLite (counted on every read elsewhere), nothing to do")
@@ -0,0 +1,39 @@
+# backend/tasks/management/commands/run_job_worker.py
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from tasks.jobs import run_pending
+
+
+class Command(BaseCommand):
+    help = (
+        "Process queued background jobs (status recomputation); use with "
+        "TASK_JOB_WORKERS = 0 to keep that work out of the web processes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Drain the queue once and exit")
+        parser.add_argument(
+            '--interval', type=float, default=None,
+            help="Seconds between polls of an empty queue (default: TASK_JOB_POLL_SECONDS)"
+        )
+
+    def handle(self, *args, **options):
+        if options['once']:
+            processed = run_pending()
+            self.stdout.write(self.style.SUCCESS(f"Processed {processed} job items"))
+            return
+
+        interval = options['interval'] or getattr(settings, 'TASK_JOB_POLL_SECONDS', 5)
+        self.stdout.write(f"Waiting for jobs, polling every {interval}s (Ctrl+C to stop)")
+        try:
+            while True:
+                processed = run_pending()
+                if processed:
+                    self.stdout.write(f"Processed {processed} job items")
+                close_old_connections()
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
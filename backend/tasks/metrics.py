@@ -0,0 +1,290 @@
+# backend/tasks/metrics.py
+"""
+Per-request performance instrumentation.
+
+When settings.TASK_METRICS_ENABLED is on:
+
+- MetricsMiddleware times every request, counts its SQL queries and SQL
+  time (connection.execute_wrapper on every database alias) and adds a
+  Server-Timing header, e.g.
+  `app;dur=12.4, db;dur=3.1;desc="4 queries", check_circular_dependency;dur=0.8`.
+- Functions decorated with @timed are timed too, per request (Server-Timing)
+  and overall.
+- Everything is aggregated into process-level histograms served in the
+  Prometheus text format by metrics_view (/metrics), together with the
+  optimistic write, response cache and job queue counters.
+
+When it is off the middleware removes itself (MiddlewareNotUsed) and
+@timed returns the function unchanged, so there is no per-call cost. The
+setting is read at startup.
+"""
+import contextvars
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpResponse
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def metrics_enabled():
+    return getattr(settings, 'TASK_METRICS_ENABLED', False)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in (*zip(names, values), *extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels, Prometheus style"""
+
+    def __init__(self, name, documentation, labelnames, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # {label values: [bucket counts..., sum, count]}
+        self._series = {}
+
+    def observe(self, labels, value):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted(self._series.items())
+            series = [(labels, list(values)) for labels, values in series]
+        for labels, values in series:
+            for bound, count in zip(self.buckets, values):
+                le = _format_labels(self.labelnames, labels, [('le', repr(float(bound)))])
+                lines.append(f'{self.name}_bucket{le} {count}')
+            inf = _format_labels(self.labelnames, labels, [('le', '+Inf')])
+            lines.append(f'{self.name}_bucket{inf} {values[-1]}')
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f'{self.name}_sum{label_text} {values[-2]!r}')
+            lines.append(f'{self.name}_count{label_text} {values[-1]}')
+        return lines
+
+
+request_duration = Histogram(
+    'task_http_request_duration_seconds', 'Time spent handling requests, by view.',
+    ('view', 'method', 'status'), LATENCY_BUCKETS
+)
+request_queries = Histogram(
+    'task_http_request_sql_queries', 'SQL queries run per request, by view.',
+    ('view', 'method'), QUERY_COUNT_BUCKETS
+)
+request_sql_duration = Histogram(
+    'task_http_request_sql_duration_seconds', 'Time spent in SQL per request, by view.',
+    ('view', 'method'), LATENCY_BUCKETS
+)
+function_duration = Histogram(
+    'task_function_duration_seconds', 'Time spent in instrumented functions.',
+    ('function',), LATENCY_BUCKETS
+)
+HISTOGRAMS = (request_duration, request_queries, request_sql_duration, function_duration)
+
+
+class RequestMetrics:
+    """What one request spent its time on"""
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.functions = defaultdict(lambda: [0, 0.0])  # {name: [calls, seconds]}
+
+    def sql_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_seconds += time.perf_counter() - started
+            self.sql_count += 1
+
+    def server_timing(self, total_seconds):
+        entries = [
+            f'app;dur={total_seconds * 1000:.1f}',
+            f'db;dur={self.sql_seconds * 1000:.1f};desc="{self.sql_count} queries"',
+        ]
+        for name, (calls, seconds) in self.functions.items():
+            entries.append(f'{name};dur={seconds * 1000:.1f};desc="{calls} calls"')
+        return ', '.join(entries)
+
+
+_current_request = contextvars.ContextVar('task_request_metrics', default=None)
+
+
+def timed(func):
+    """Time func per request (Server-Timing) and overall (histogram)"""
+    if not metrics_enabled():
+        return func
+
+    name = func.__name__
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            function_duration.observe((name,), elapsed)
+            current = _current_request.get()
+            if current is not None:
+                calls = current.functions[name]
+                calls[0] += 1
+                calls[1] += elapsed
+    return wrapper
+
+
+def _dispatch_sql(execute, sql, params, many, context):
+    current = _current_request.get()
+    if current is None:
+        return execute(sql, params, many, context)
+    return current.sql_wrapper(execute, sql, params, many, context)
+
+
+def _install_sql_dispatch():
+    """
+    Under ASGI the queries of a request run in sync_to_async threads, which
+    concurrent requests may share: rather than wrapping connections per
+    request, leave one wrapper on them that finds the request's metrics
+    through the context (sync_to_async carries it over).
+    """
+    for connection in connections.all():
+        if _dispatch_sql not in connection.execute_wrappers:
+            connection.execute_wrappers.append(_dispatch_sql)
+
+
+class MetricsMiddleware:
+    """Records latency and SQL usage of every request, see the module docstring"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not metrics_enabled():
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current_request.set(metrics)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics.sql_wrapper))
+                response = self.get_response(request)
+        finally:
+            _current_request.reset(token)
+        return self.record(request, response, metrics, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current_request.set(metrics)
+        started = time.perf_counter()
+        try:
+            await sync_to_async(_install_sql_dispatch)()
+            response = await self.get_response(request)
+        finally:
+            _current_request.reset(token)
+        return self.record(request, response, metrics, time.perf_counter() - started)
+
+    def record(self, request, response, metrics, elapsed):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else '<unresolved>'
+        request_duration.observe((view, request.method, str(response.status_code)), elapsed)
+        request_queries.observe((view, request.method), metrics.sql_count)
+        request_sql_duration.observe((view, request.method), metrics.sql_seconds)
+
+        response['Server-Timing'] = metrics.server_timing(elapsed)
+        return response
+
+
+def _counter_lines(name, documentation, samples):
+    """samples: list of (labels dict, value)"""
+    lines = [f'# HELP {name} {documentation}', f'# TYPE {name} counter']
+    for labels, value in samples:
+        label_text = _format_labels(labels.keys(), labels.values())
+        lines.append(f'{name}{label_text} {value}')
+    return lines
+
+
+def render_metrics():
+    """Every metric of this process in the Prometheus text format"""
+    from .caching import cache_stats
+    from .concurrency import write_stats
+    from .jobs import job_stats
+
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+
+    writes = write_stats.snapshot()
+    lines += _counter_lines(
+        'task_dependency_writes_total', 'Optimistic dependency writes, by outcome.',
+        [({'outcome': outcome}, writes[key]) for outcome, key in (
+            ('written', 'writes'), ('rejected', 'rejected'), ('failed', 'failures'))]
+    )
+    lines += _counter_lines(
+        'task_dependency_write_attempts_total', 'Transactions started by dependency writes.',
+        [({}, writes['attempts'])]
+    )
+    lines += _counter_lines(
+        'task_dependency_write_conflicts_total', 'Dependency write attempts rolled back and retried.',
+        [({}, writes['conflicts'])]
+    )
+
+    cache = cache_stats.snapshot()
+    lines += _counter_lines(
+        'task_response_cache_requests_total', 'Response cache lookups, by endpoint and result.',
+        [({'endpoint': endpoint, 'result': result}, counts[key])
+         for endpoint, counts in cache['endpoints'].items()
+         for result, key in (('hit', 'hits'), ('miss', 'misses'))]
+    )
+    lines += _counter_lines(
+        'task_response_cache_invalidations_total', 'Per-task response cache generations replaced.',
+        [({}, cache['invalidations'])]
+    )
+
+    jobs = job_stats.snapshot()
+    lines += _counter_lines(
+        'task_job_items_total', 'Background job items, by stage.',
+        [({'stage': stage}, jobs[stage]) for stage in ('enqueued', 'processed', 'coalesced')]
+    )
+    lines += _counter_lines(
+        'task_job_batches_total', 'Background job batches run, by outcome.',
+        [({'outcome': 'ok'}, jobs['batches'] - jobs['failures']), ({'outcome': 'failed'}, jobs['failures'])]
+    )
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    return HttpResponse(render_metrics(), content_type=PROMETHEUS_CONTENT_TYPE)
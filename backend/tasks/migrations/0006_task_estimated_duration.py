@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0005_changeevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='estimated_duration',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
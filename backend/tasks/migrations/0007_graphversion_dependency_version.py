@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0006_task_estimated_duration'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='graphversion',
+            name='dependency_version',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
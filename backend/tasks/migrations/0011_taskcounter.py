@@ -0,0 +1,209 @@
+# Generated by Django 5.2.18 on 2026-10-17 05:22
+
+from django.db import migrations, models
+
+# The triggers as of this migration, frozen here: tasks/stats.py may change
+# later, this migration must keep creating what it created
+TRIGGERS = {
+    'tasks_stats_task_ai': """CREATE TRIGGER tasks_stats_task_ai AFTER INSERT ON tasks_task BEGIN
+        UPDATE tasks_taskcounter SET value = value + (CASE name WHEN NEW.status THEN 1 WHEN 'ready' THEN (CASE WHEN NEW.status IN ('pending', 'in_progress') AND NOT EXISTS (
+        SELECT 1 FROM tasks_taskdependency dep_edge CROSS JOIN tasks_task dep
+        WHERE dep_edge.task_id = NEW.id AND dep.id = dep_edge.depends_on_id
+        AND dep.status != 'completed'
+    ) THEN 1 ELSE 0 END) + (CASE WHEN (CASE WHEN NEW.status = 'completed' THEN 1 ELSE 0 END) != 1 THEN ((CASE WHEN NEW.status = 'completed' THEN 1 ELSE 0 END) - 1) * (
+        SELECT COUNT(*) FROM tasks_taskdependency edge CROSS JOIN tasks_task dependent
+        WHERE edge.depends_on_id = NEW.id AND dependent.id = edge.task_id
+        AND dependent.status IN ('pending', 'in_progress')
+        AND NOT EXISTS (
+        SELECT 1 FROM tasks_taskdependency dep_edge CROSS JOIN tasks_task dep
+        WHERE dep_edge.task_id = dependent.id AND dep.id = dep_edge.depends_on_id
+        AND dep.status != 'completed' AND dep.id != NEW.id
+    )
+    ) ELSE 0 END) WHEN 'blocked_roots' THEN (CASE WHEN NEW.status = 'blocked' AND NOT EXISTS (
+        SELECT 1 FROM tasks_taskdependency dep_edge CROSS JOIN tasks_task dep
+        WHERE dep_edge.task_id = NEW.id AND dep.id = dep_edge.depends_on_id
+        AND dep.status = 'blocked'
+    ) THEN 1 ELSE 0 END) + (CASE WHEN (CASE WHEN NEW.status != 'blocked' THEN 1 ELSE 0 END) != 1 THEN ((CASE WHEN NEW.status != 'blocked' THEN 1 ELSE 0 END) - 1) * (
+        SELECT COUNT(*) FROM tasks_taskdependency edge CROSS JOIN tasks_task dependent
+        WHERE edge.depends_on_id = NEW.id AND dependent.id = edge.task_id
+        AND dependent.status = 'blocked'
+        AND NOT EXISTS (
+        SELECT 1 FROM tasks_taskdependency dep_edge CROSS JOIN tasks_task dep
+        WHERE dep_edge.task_id = dependent.id AND dep.id = dep_edge.depends_on_id
+        AND dep.status = 'blocked' AND dep.id != NEW.id
+    )
+    ) ELSE 0 END) ELSE 0 END) WHERE name IN (NEW.status, 'ready', 'blocked_roots');
+    END""",
+    'tasks_stats_task_au': """CREATE TRIGGER tasks_stats_task_au AFTER UPDATE OF status ON tasks_task WHEN OLD.status IS NOT NEW.status BEGIN
+        UPDATE tasks_taskcounter SET value = value + (CASE name WHEN NEW.status THEN 1 WHEN OLD.status THEN -1 WHEN 'ready' THEN (CASE WHEN NEW.status IN ('pending', 'in_progress') AND NOT EXISTS (
+        SELECT 1 FROM tasks_taskdependency dep_edge CROSS JOIN tasks_task dep
+        WHERE dep_edge.task_id = NEW.id AND dep.id = dep_edge.depends_on_id
+        AND dep.status != 'completed'
+    ) THEN 1 ELSE 0 END) - (CASE WHEN OLD.status IN ('pending', 'in_progress') AND NOT EXISTS (
+        SELECT 1 FROM tasks_taskdependency dep_edge CROSS JOIN tasks_task dep
+        WHERE dep_edge.task_id = OLD.id AND dep.id = dep_edge.depends_on_id
+        AND dep.status != 'completed'
+    ) THEN 1 ELSE 0 END) + (CASE WHEN (CASE WHEN NEW.status = 'completed' THEN 1 ELSE 0 END) != (CASE WHEN OLD.status = 'completed' THEN 1 ELSE 0 END) THEN ((CASE WHEN NEW.status = 'completed' THEN 1 ELSE 0 END) - (CASE WHEN OLD.status = 'completed' THEN 1 ELSE 0 END)) * (
+        SELECT COUNT(*) FROM tasks_taskdependency edge CROSS JOIN tasks_task dependent
+        WHERE edge.depends_on_id = NEW.id AND dependent.id = edge.task_id
+        AND dependent.status IN ('pending', 'in_progress')
+        AND NOT EXISTS (
+        SELECT 1 FROM tasks_taskdependency dep_edge CROSS JOIN tasks_task dep
+        WHERE dep_edge.task_id = dependent.id AND dep.id = dep_edge.depends_on_id
+        AND dep.status != 'completed' AND dep.id != NEW.id
+    )
+    ) ELSE 0 END) WHEN 'blocked_roots' THEN (CASE WHEN NEW.status = 'blocked' AND NOT EXISTS (
+        SELECT 1 FROM tasks_taskdependency dep_edge CROSS JOIN tasks_task dep
+        WHERE dep_edge.task_id = NEW.id AND dep.id = dep_edge.depends_on_id
+        AND dep.status = 'blocked'
+    ) THEN 1 ELSE 0 END) - (CASE WHEN OLD.status = 'blocked' AND NOT EXISTS (
+        SELECT 1 FROM tasks_taskdependency dep_edge CROSS JOIN tasks_task dep
+        WHERE dep_edge.task_id = OLD.id AND dep.id = dep_edge.depends_on_id
+        AND dep.status = 'blocked'
+    ) THEN 1 ELSE 0 END) + (CASE WHEN (CASE WHEN NEW.status != 'blocked' THEN 1 ELSE 0 END) != (CASE WHEN OLD.status != 'blocked' THEN 1 ELSE 0 END) THEN ((CASE WHEN NEW.status != 'blocked' THEN 1 ELSE 0 END) - (CASE WHEN OLD.status != 'blocked' THEN 1 ELSE 0 END)) * (
+        SELECT COUNT(*) FROM tasks_taskdependency edge CROSS JOIN tasks_task dependent
+        WHERE edge.depends_on_id = NEW.id AND dependent.id = edge.task_id
+        AND dependent.status = 'blocked'
+        AND NOT EXISTS (
+        SELECT 1 FROM tasks_taskdependency dep_edge CROSS JOIN tasks_task dep
+        WHERE dep_edge.task_id = dependent.id AND dep.id = dep_edge.depends_on_id
+        AND dep.status = 'blocked' AND dep.id != NEW.id
+    )
+    ) ELSE 0 END) ELSE 0 END) WHERE name IN (NEW.status, OLD.status, 'ready', 'blocked_roots');
+    END""",
+    'tasks_stats_task_ad': """CREATE TRIGGER tasks_stats_task_ad AFTER DELETE ON tasks_task BEGIN
+        UPDATE tasks_taskcounter SET value = value + (CASE name WHEN OLD.status THEN -1 WHEN 'ready' THEN - (CASE WHEN OLD.status IN ('pending', 'in_progress') AND NOT EXISTS (
+        SELECT 1 FROM tasks_taskdependency dep_edge CROSS JOIN tasks_task dep
+        WHERE dep_edge.task_id = OLD.id AND dep.id = dep_edge.depends_on_id
+        AND dep.status != 'completed'
+    ) THEN 1 ELSE 0 END) + (CASE WHEN 1 != (CASE WHEN OLD.status = 'completed' THEN 1 ELSE 0 END) THEN (1 - (CASE WHEN OLD.status = 'completed' THEN 1 ELSE 0 END)) * (
+        SELECT COUNT(*) FROM tasks_taskdependency edge CROSS JOIN tasks_task dependent
+        WHERE edge.depends_on_id = OLD.id AND dependent.id = edge.task_id
+        AND dependent.status IN ('pending', 'in_progress')
+        AND NOT EXISTS (
+        SELECT 1 FROM tasks_taskdependency dep_edge CROSS JOIN tasks_task dep
+        WHERE dep_edge.task_id = dependent.id AND dep.id = dep_edge.depends_on_id
+        AND dep.status != 'completed' AND dep.id != OLD.id
+    )
+    ) ELSE 0 END) WHEN 'blocked_roots' THEN - (CASE WHEN OLD.status = 'blocked' AND NOT EXISTS (
+        SELECT 1 FROM tasks_taskdependency dep_edge CROSS JOIN tasks_task dep
+        WHERE dep_edge.task_id = OLD.id AND dep.id = dep_edge.depends_on_id
+        AND dep.status = 'blocked'
+    ) THEN 1 ELSE 0 END) + (CASE WHEN 1 != (CASE WHEN OLD.status != 'blocked' THEN 1 ELSE 0 END) THEN (1 - (CASE WHEN OLD.status != 'blocked' THEN 1 ELSE 0 END)) * (
+        SELECT COUNT(*) FROM tasks_taskdependency edge CROSS JOIN tasks_task dependent
+        WHERE edge.depends_on_id = OLD.id AND dependent.id = edge.task_id
+        AND dependent.status = 'blocked'
+        AND NOT EXISTS (
+        SELECT 1 FROM tasks_taskdependency dep_edge CROSS JOIN tasks_task dep
+        WHERE dep_edge.task_id = dependent.id AND dep.id = dep_edge.depends_on_id
+        AND dep.status = 'blocked' AND dep.id != OLD.id
+    )
+    ) ELSE 0 END) ELSE 0 END) WHERE name IN (OLD.status, 'ready', 'blocked_roots');
+    END""",
+    'tasks_stats_edge_ai': """CREATE TRIGGER tasks_stats_edge_ai AFTER INSERT ON tasks_taskdependency BEGIN
+        UPDATE tasks_taskcounter SET value = value + (CASE name WHEN 'ready' THEN - (CASE WHEN (SELECT status FROM tasks_task WHERE id = NEW.task_id) IN ('pending', 'in_progress') AND (SELECT status FROM tasks_task WHERE id = NEW.depends_on_id) != 'completed' AND NOT EXISTS (
+        SELECT 1 FROM tasks_taskdependency dep_edge CROSS JOIN tasks_task dep
+        WHERE dep_edge.task_id = NEW.task_id AND dep.id = dep_edge.depends_on_id
+        AND dep.status != 'completed' AND dep_edge.id != NEW.id
+    ) THEN 1 ELSE 0 END) WHEN 'blocked_roots' THEN - (CASE WHEN (SELECT status FROM tasks_task WHERE id = NEW.task_id) = 'blocked' AND (SELECT status FROM tasks_task WHERE id = NEW.depends_on_id) = 'blocked' AND NOT EXISTS (
+        SELECT 1 FROM tasks_taskdependency dep_edge CROSS JOIN tasks_task dep
+        WHERE dep_edge.task_id = NEW.task_id AND dep.id = dep_edge.depends_on_id
+        AND dep.status = 'blocked' AND dep_edge.id != NEW.id
+    ) THEN 1 ELSE 0 END) ELSE 0 END) WHERE name IN ('ready', 'blocked_roots');
+    END""",
+    'tasks_stats_edge_au': """CREATE TRIGGER tasks_stats_edge_au AFTER UPDATE OF task_id, depends_on_id ON tasks_taskdependency BEGIN
+        UPDATE tasks_taskcounter SET value = value + (CASE name WHEN 'ready' THEN + (CASE WHEN (SELECT status FROM tasks_task WHERE id = OLD.task_id) IN ('pending', 'in_progress') AND (SELECT status FROM tasks_task WHERE id = OLD.depends_on_id) != 'completed' AND NOT EXISTS (
+        SELECT 1 FROM tasks_taskdependency dep_edge CROSS JOIN tasks_task dep
+        WHERE dep_edge.task_id = OLD.task_id AND dep.id = dep_edge.depends_on_id
+        AND dep.status != 'completed' AND dep_edge.id != OLD.id
+    ) THEN 1 ELSE 0 END) WHEN 'blocked_roots' THEN + (CASE WHEN (SELECT status FROM tasks_task WHERE id = OLD.task_id) = 'blocked' AND (SELECT status FROM tasks_task WHERE id = OLD.depends_on_id) = 'blocked' AND NOT EXISTS (
+        SELECT 1 FROM tasks_taskdependency dep_edge CROSS JOIN tasks_task dep
+        WHERE dep_edge.task_id = OLD.task_id AND dep.id = dep_edge.depends_on_id
+        AND dep.status = 'blocked' AND dep_edge.id != OLD.id
+    ) THEN 1 ELSE 0 END) ELSE 0 END) WHERE name IN ('ready', 'blocked_roots'); UPDATE tasks_taskcounter SET value = value + (CASE name WHEN 'ready' THEN - (CASE WHEN (SELECT status FROM tasks_task WHERE id = NEW.task_id) IN ('pending', 'in_progress') AND (SELECT status FROM tasks_task WHERE id = NEW.depends_on_id) != 'completed' AND NOT EXISTS (
+        SELECT 1 FROM tasks_taskdependency dep_edge CROSS JOIN tasks_task dep
+        WHERE dep_edge.task_id = NEW.task_id AND dep.id = dep_edge.depends_on_id
+        AND dep.status != 'completed' AND dep_edge.id != NEW.id
+    ) THEN 1 ELSE 0 END) WHEN 'blocked_roots' THEN - (CASE WHEN (SELECT status FROM tasks_task WHERE id = NEW.task_id) = 'blocked' AND (SELECT status FROM tasks_task WHERE id = NEW.depends_on_id) = 'blocked' AND NOT EXISTS (
+        SELECT 1 FROM tasks_taskdependency dep_edge CROSS JOIN tasks_task dep
+        WHERE dep_edge.task_id = NEW.task_id AND dep.id = dep_edge.depends_on_id
+        AND dep.status = 'blocked' AND dep_edge.id != NEW.id
+    ) THEN 1 ELSE 0 END) ELSE 0 END) WHERE name IN ('ready', 'blocked_roots');
+    END""",
+    'tasks_stats_edge_ad': """CREATE TRIGGER tasks_stats_edge_ad AFTER DELETE ON tasks_taskdependency BEGIN
+        UPDATE tasks_taskcounter SET value = value + (CASE name WHEN 'ready' THEN + (CASE WHEN (SELECT status FROM tasks_task WHERE id = OLD.task_id) IN ('pending', 'in_progress') AND (SELECT status FROM tasks_task WHERE id = OLD.depends_on_id) != 'completed' AND NOT EXISTS (
+        SELECT 1 FROM tasks_taskdependency dep_edge CROSS JOIN tasks_task dep
+        WHERE dep_edge.task_id = OLD.task_id AND dep.id = dep_edge.depends_on_id
+        AND dep.status != 'completed' AND dep_edge.id != OLD.id
+    ) THEN 1 ELSE 0 END) WHEN 'blocked_roots' THEN + (CASE WHEN (SELECT status FROM tasks_task WHERE id = OLD.task_id) = 'blocked' AND (SELECT status FROM tasks_task WHERE id = OLD.depends_on_id) = 'blocked' AND NOT EXISTS (
+        SELECT 1 FROM tasks_taskdependency dep_edge CROSS JOIN tasks_task dep
+        WHERE dep_edge.task_id = OLD.task_id AND dep.id = dep_edge.depends_on_id
+        AND dep.status = 'blocked' AND dep_edge.id != OLD.id
+    ) THEN 1 ELSE 0 END) ELSE 0 END) WHERE name IN ('ready', 'blocked_roots');
+    END""",
+}
+
+COUNTERS = ('pending', 'in_progress', 'completed', 'blocked', 'ready', 'blocked_roots')
+
+COUNT_SQL = """SELECT status, COUNT(*) FROM tasks_task GROUP BY status
+UNION ALL
+SELECT 'ready', COUNT(*) FROM tasks_task task
+WHERE task.status IN ('pending', 'in_progress') AND NOT EXISTS (
+    SELECT 1 FROM tasks_taskdependency dep_edge CROSS JOIN tasks_task dep
+    WHERE dep_edge.task_id = task.id AND dep.id = dep_edge.depends_on_id
+    AND dep.status != 'completed'
+)
+UNION ALL
+SELECT 'blocked_roots', COUNT(*) FROM tasks_task task
+WHERE task.status = 'blocked' AND NOT EXISTS (
+    SELECT 1 FROM tasks_taskdependency dep_edge CROSS JOIN tasks_task dep
+    WHERE dep_edge.task_id = task.id AND dep.id = dep_edge.depends_on_id
+    AND dep.status = 'blocked'
+)
+"""
+
+
+def create_stats(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for name, sql in TRIGGERS.items():
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+            cursor.execute(sql)
+        # Count the tasks that already exist
+        counts = dict.fromkeys(COUNTERS, 0)
+        cursor.execute(COUNT_SQL)
+        counts.update(cursor.fetchall())
+        cursor.execute("DELETE FROM tasks_taskcounter")
+        cursor.executemany(
+            "INSERT INTO tasks_taskcounter (name, value) VALUES (%s, %s)", list(counts.items())
+        )
+
+
+def drop_stats(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for name in TRIGGERS:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+    # Counters behind /api/stats/ and, on SQLite, the triggers that keep
+    # them (see tasks/stats.py). Other databases count on every read.
+
+    dependencies = [
+        ('tasks', '0010_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=32, unique=True)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_stats, drop_stats),
+    ]
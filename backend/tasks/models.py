@@ -1,5 +1,33 @@
 # backend/tasks/models.py
 from django.db import models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def _dependency_count_subquery(field):
+    # SELECT COUNT(*) FROM tasks_taskdependency WHERE <field> = task.id
+    rows = (
+        TaskDependency.objects
+        .filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    return Coalesce(Subquery(rows), Value(0))
+
+
+class TaskQuerySet(models.QuerySet):
+    def with_dependency_counts(self):
+        """
+        Annotate dependency_count/dependent_count in the same query, so
+        serializing a list doesn't cost two COUNT queries per task.
+        """
+        return self.annotate(
+            dependency_count=_dependency_count_subquery('task'),
+            dependent_count=_dependency_count_subquery('depends_on'),
+        )
+
 
 class Task(models.Model):
     # Status choices
@@ -23,14 +51,24 @@ class Task(models.Model):
         choices=STATUS_CHOICES,
         default=PENDING
     )
+    # Optional estimate in hours, used to weight the critical path
+    estimated_duration = models.PositiveIntegerField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = TaskQuerySet.as_manager()
+    
     def __str__(self):
         return f"{self.id}: {self.title} ({self.status})"
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Backs the keyset pagination of the task list (pagination.py)
+            models.Index(fields=['-created_at', '-id'], name='task_created_id_idx'),
+            # Status filter on the task list, in list order
+            models.Index(fields=['status', '-created_at', '-id'], name='task_status_created_idx'),
+        ]
 
 
 class TaskDependency(models.Model):
@@ -55,4 +93,145 @@ class TaskDependency(models.Model):
         verbose_name_plural = 'Task dependencies'
     
     def __str__(self):
-        return f"{self.task.title} depends on {self.depends_on.title}"
\ No newline at end of file
+        return f"{self.task.title} depends on {self.depends_on.title}"
+
+class TaskClosure(models.Model):
+    # Transitive closure of TaskDependency (only kept when
+    # TASK_GRAPH_CLOSURE_ENABLED is on, see closure.py).
+    # One row per pair where "descendant" depends on "ancestor",
+    # directly or through other tasks.
+    ancestor = models.ForeignKey(
+        Task,
+        on_delete=models.CASCADE,
+        related_name='closure_descendants'
+    )
+    descendant = models.ForeignKey(
+        Task,
+        on_delete=models.CASCADE,
+        related_name='closure_ancestors'
+    )
+    
+    class Meta:
+        unique_together = ['ancestor', 'descendant']
+    
+    def __str__(self):
+        return f"{self.descendant_id} depends on {self.ancestor_id} (transitively)"
+
+
+class GraphVersion(models.Model):
+    # Single row holding a counter that is bumped on every write to tasks or
+    # dependencies (see versioning.py). Read endpoints use it as their ETag.
+    # dependency_version only moves when edges are written, is
+    # compare-and-swapped by dependency inserts (see concurrency.py) and
+    # tells the graph index whether it is current (see graph.py).
+    SINGLETON_ID = 1
+    
+    version = models.BigIntegerField(default=0)
+    dependency_version = models.BigIntegerField(default=0)
+    
+    def __str__(self):
+        return f"Graph version {self.version}"
+
+
+class TaskCounter(models.Model):
+    # Task counts by status, ready tasks and blocked roots, kept up to date
+    # by triggers on every write to tasks or dependencies (see stats.py).
+    # One row per counter.
+    name = models.CharField(max_length=32, unique=True)
+    value = models.BigIntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+
+
+class ChangeEvent(models.Model):
+    # Append-only log of every change to tasks and dependencies, written in
+    # the same transaction as the change (see events.py). The id doubles as
+    # the event id clients resume from.
+    TASK_CREATED = 'task_created'
+    TASK_UPDATED = 'task_updated'
+    TASK_DELETED = 'task_deleted'
+    DEPENDENCY_ADDED = 'dependency_added'
+    DEPENDENCY_REMOVED = 'dependency_removed'
+    
+    KIND_CHOICES = [
+        (TASK_CREATED, 'Task created'),
+        (TASK_UPDATED, 'Task updated'),
+        (TASK_DELETED, 'Task deleted'),
+        (DEPENDENCY_ADDED, 'Dependency added'),
+        (DEPENDENCY_REMOVED, 'Dependency removed'),
+    ]
+    
+    kind = models.CharField(max_length=32, choices=KIND_CHOICES)
+    # Plain id, not a foreign key: deleted objects keep their events
+    object_id = models.BigIntegerField()
+    data = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['id']
+    
+    def __str__(self):
+        return f"#{self.id} {self.kind} {self.object_id}"
+
+class Job(models.Model):
+    # Background work requested by an API call and done by the worker pool
+    # (see jobs.py). The API answers with the job id right away; clients
+    # poll /api/jobs/<id>/ for the state.
+    RECOMPUTE_STATUS = 'recompute_status'
+    
+    KIND_CHOICES = [
+        (RECOMPUTE_STATUS, 'Recompute statuses'),
+    ]
+    
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    
+    STATE_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+    
+    kind = models.CharField(max_length=32, choices=KIND_CHOICES, default=RECOMPUTE_STATUS)
+    state = models.CharField(max_length=20, choices=STATE_CHOICES, default=QUEUED)
+    # The task ids the job was enqueued for, and what came out of it
+    task_ids = models.JSONField(default=list)
+    result = models.JSONField(default=dict)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-id']
+    
+    def __str__(self):
+        return f"Job {self.id} {self.kind} ({self.state})"
+
+
+class JobItem(models.Model):
+    # One task of a job. Workers claim queued items by task, so items of
+    # different jobs for the same task are processed (and counted) once.
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='items')
+    # Plain id, not a foreign key: the task may be gone by the time the
+    # item runs (dependents of a deleted task)
+    task_id = models.BigIntegerField()
+    # Re-derive the task itself, or only the tasks that depend on it
+    include_self = models.BooleanField(default=True)
+    state = models.CharField(max_length=20, choices=Job.STATE_CHOICES, default=Job.QUEUED)
+    claim = models.CharField(max_length=32, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['state', 'task_id'], name='jobitem_state_task_idx'),
+            models.Index(fields=['claim'], name='jobitem_claim_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Job {self.job_id} task {self.task_id} ({self.state})"
@@ -0,0 +1,132 @@
+# backend/tasks/propagation.py
+from collections import deque
+from django.db import transaction
+from django.utils import timezone
+from .graph import graph_index
+from .utils import QUERY_BATCH_SIZE, derive_status
+from .versioning import bump_graph_version
+from .events import record_events
+from .metrics import timed
+
+
+def _downstream_subgraph(task_ids):
+    """
+    Collect every task reachable from task_ids through "dependent" edges.
+
+    Returns:
+        (nodes, forward, reverse) where forward/reverse are the adjacency
+        lists of the subgraph, copied so the index lock can be released
+    """
+    with graph_index.lock:
+        graph_index.ensure_fresh()
+        nodes = set(task_ids)
+        stack = list(task_ids)
+        while stack:
+            node = stack.pop()
+            for child in graph_index.reverse.get(node, ()):
+                if child not in nodes:
+                    nodes.add(child)
+                    stack.append(child)
+
+        forward = {node: list(graph_index.forward.get(node, ())) for node in nodes}
+        reverse = {node: list(graph_index.reverse.get(node, ())) for node in nodes}
+    return nodes, forward, reverse
+
+
+def _topological_order(nodes, forward, reverse):
+    """Kahn's algorithm restricted to the subgraph"""
+    in_degree = {
+        node: sum(1 for parent in forward[node] if parent in nodes)
+        for node in nodes
+    }
+    queue = deque(node for node, degree in in_degree.items() if degree == 0)
+    order = []
+    while queue:
+        node = queue.popleft()
+        order.append(node)
+        for child in reverse[node]:
+            in_degree[child] -= 1
+            if in_degree[child] == 0:
+                queue.append(child)
+    return order
+
+
+def _load_statuses(task_ids):
+    from .models import Task
+
+    task_ids = list(task_ids)
+    statuses = {}
+    for start in range(0, len(task_ids), QUERY_BATCH_SIZE):
+        batch = task_ids[start:start + QUERY_BATCH_SIZE]
+        statuses.update(Task.objects.filter(id__in=batch).values_list('id', 'status'))
+    return statuses
+
+
+@timed
+def propagate_status_changes(task_ids, include_roots=True):
+    """
+    Re-derive statuses for everything downstream of task_ids.
+
+    The affected subgraph is walked in topological order, so a change to a
+    task is seen by its dependents (and their dependents, ...) in the same
+    pass. New statuses are computed in memory and saved with a single
+    bulk_update inside one transaction.
+
+    Args:
+        task_ids: ids of the tasks whose status or dependencies changed
+        include_roots: also re-derive the status of task_ids themselves
+            (False when a root's status was just set by hand)
+
+    Returns:
+        Set of ids of the tasks whose status changed
+    """
+    from .models import Task, ChangeEvent
+
+    task_ids = set(task_ids)
+    if not task_ids:
+        return set()
+
+    with transaction.atomic():
+        nodes, forward, reverse = _downstream_subgraph(task_ids)
+
+        # Statuses of the subgraph plus of every dependency feeding into it
+        involved = set(nodes)
+        for parents in forward.values():
+            involved.update(parents)
+        statuses = _load_statuses(involved)
+
+        if include_roots:
+            dirty = set(task_ids)
+        else:
+            dirty = {child for root in task_ids for child in reverse[root]}
+
+        changed = set()
+        for node in _topological_order(nodes, forward, reverse):
+            if node not in dirty or node not in statuses:
+                continue
+            new_status = derive_status(
+                statuses[node],
+                [statuses[parent] for parent in forward[node] if parent in statuses]
+            )
+            if new_status != statuses[node]:
+                statuses[node] = new_status
+                changed.add(node)
+                # Only dependents of a changed task need another look
+                dirty.update(reverse[node])
+
+        if changed:
+            now = timezone.now()
+            Task.objects.bulk_update(
+                [Task(id=task_id, status=statuses[task_id], updated_at=now) for task_id in changed],
+                ['status', 'updated_at'],
+                batch_size=QUERY_BATCH_SIZE
+            )
+            # bulk_update doesn't send post_save
+            record_events(
+                (ChangeEvent.TASK_UPDATED, task_id,
+                 {'id': task_id, 'status': statuses[task_id], 'updated_at': now})
+                for task_id in changed
+            )
+            bump_graph_version()
+
+    return changed
@@ -0,0 +1,113 @@
+# backend/tasks/scheduling.py
+"""
+Scheduling analytics over the whole dependency graph: topological order,
+depth levels, the "ready" frontier and the critical (longest) path.
+
+Everything is computed in one pass from a values_list() of the tasks plus
+the graph index, and cached per graph version in the response cache
+(settings.TASK_RESPONSE_CACHE), so repeated dashboard loads only cost the
+version lookup and a cache hit.
+"""
+import heapq
+
+from .caching import get_response_cache
+from .graph import graph_index
+from .utils import is_ready
+from .versioning import get_graph_version
+
+CACHE_TIMEOUT = 60 * 60
+
+
+def compute_schedule(weighted=True):
+    """
+    Args:
+        weighted: weight the critical path by estimated_duration (tasks
+            without an estimate count as 1); otherwise every task counts 1
+
+    Returns:
+        dict with "order", "levels", "ready" and "critical_path"
+    """
+    from .models import Task
+
+    rows = Task.objects.values_list('id', 'status', 'estimated_duration')
+    statuses, weights = {}, {}
+    for task_id, task_status, duration in rows.iterator(chunk_size=5000):
+        statuses[task_id] = task_status
+        weights[task_id] = (duration or 1) if weighted else 1
+
+    with graph_index.lock:
+        graph_index.ensure_fresh()
+        dependencies = {
+            task_id: [dep for dep in graph_index.forward.get(task_id, ()) if dep in statuses]
+            for task_id in statuses
+        }
+        dependents = {
+            task_id: [dep for dep in graph_index.reverse.get(task_id, ()) if dep in statuses]
+            for task_id in statuses
+        }
+
+    # Kahn's algorithm; the heap keeps the order deterministic (lowest id
+    # first among the tasks that are free at the same time)
+    remaining = {task_id: len(deps) for task_id, deps in dependencies.items()}
+    heap = [task_id for task_id, count in remaining.items() if count == 0]
+    heapq.heapify(heap)
+    order = []
+    while heap:
+        task_id = heapq.heappop(heap)
+        order.append(task_id)
+        for child in dependents[task_id]:
+            remaining[child] -= 1
+            if remaining[child] == 0:
+                heapq.heappush(heap, child)
+
+    depth = {}
+    finish = {}        # length of the longest path ending at the task
+    predecessor = {}
+    for task_id in order:
+        deps = dependencies[task_id]
+        depth[task_id] = 1 + max((depth[dep] for dep in deps), default=-1)
+        longest_dep = max(deps, key=lambda dep: finish[dep], default=None)
+        predecessor[task_id] = longest_dep
+        finish[task_id] = weights[task_id] + (finish[longest_dep] if longest_dep else 0)
+
+    levels = [[] for _ in range(max(depth.values(), default=-1) + 1)]
+    for task_id in order:
+        levels[depth[task_id]].append(task_id)
+
+    ready = [
+        task_id for task_id in order
+        if is_ready(statuses[task_id], (statuses[dep] for dep in dependencies[task_id]))
+    ]
+
+    path = []
+    if finish:
+        node = max(finish, key=lambda task_id: (finish[task_id], -task_id))
+        while node is not None:
+            path.append(node)
+            node = predecessor[node]
+        path.reverse()
+
+    return {
+        'order': order,
+        'levels': levels,
+        'ready': ready,
+        'critical_path': {
+            'weighted': weighted,
+            'length': finish[path[-1]] if path else 0,
+            'path': path,
+        },
+    }
+
+
+def get_schedule(weighted=True):
+    """compute_schedule() cached under the current graph version"""
+    version = get_graph_version()
+    cache = get_response_cache()
+    if cache is None:
+        return version, compute_schedule(weighted)
+    key = f"tasks:schedule:{version}:{int(weighted)}"
+    schedule = cache.get(key)
+    if schedule is None:
+        schedule = compute_schedule(weighted)
+        cache.set(key, schedule, CACHE_TIMEOUT)
+    return version, schedule
@@ -0,0 +1,85 @@
+# backend/tasks/search.py
+"""
+Full-text search over task titles and descriptions.
+
+On SQLite the search uses an FTS5 external-content table (tasks_task_fts)
+that triggers keep in sync with tasks_task on every insert, update and
+delete, including bulk_create/bulk_update (installed with triggers.py;
+repair them with `python manage.py rebuild_task_search`). Other databases,
+or an SQLite build without FTS5, fall back to icontains filters.
+"""
+import re
+
+from django.db import connection, connections, transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from .triggers import install_triggers, uninstall_triggers
+
+FTS_TABLE = 'tasks_task_fts'
+
+CREATE_FTS_TABLE_SQL = f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+    title, description, content='tasks_task', content_rowid='id'
+)"""
+
+_INDEX_NEW = f"""INSERT INTO {FTS_TABLE}(rowid, title, description)
+    VALUES (new.id, new.title, new.description);"""
+_UNINDEX_OLD = f"""INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+    VALUES ('delete', old.id, old.title, old.description);"""
+
+FTS_TRIGGERS = {
+    f'{FTS_TABLE}_ai': ("AFTER INSERT ON tasks_task", [_INDEX_NEW]),
+    f'{FTS_TABLE}_ad': ("AFTER DELETE ON tasks_task", [_UNINDEX_OLD]),
+    f'{FTS_TABLE}_au': ("AFTER UPDATE OF title, description ON tasks_task", [_UNINDEX_OLD, _INDEX_NEW]),
+}
+
+# Index the rows that already exist
+REINDEX_FTS_SQL = f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+
+_fts_available = {}
+
+
+def install_fts(db_connection):
+    """Create (or repair) the FTS table and its triggers, then reindex. SQLite only."""
+    with transaction.atomic(using=db_connection.alias):
+        if not install_triggers(db_connection, FTS_TRIGGERS, setup=[CREATE_FTS_TABLE_SQL]):
+            return False
+        with db_connection.cursor() as cursor:
+            cursor.execute(REINDEX_FTS_SQL)
+    _fts_available.pop(db_connection.alias, None)
+    return True
+
+
+def uninstall_fts(db_connection):
+    uninstall_triggers(db_connection, FTS_TRIGGERS, teardown=[f"DROP TABLE IF EXISTS {FTS_TABLE}"])
+    _fts_available.pop(db_connection.alias, None)
+
+
+def fts_available(db_connection=connection):
+    if db_connection.alias not in _fts_available:
+        _fts_available[db_connection.alias] = (
+            db_connection.vendor == 'sqlite'
+            and FTS_TABLE in db_connection.introspection.table_names()
+        )
+    return _fts_available[db_connection.alias]
+
+
+def search_tasks(queryset, query):
+    """
+    Narrow a Task queryset to tasks matching every word of `query` (as a
+    prefix) in their title or description.
+    """
+    terms = re.findall(r'\w+', query)
+    if not terms:
+        return queryset
+
+    if fts_available(connections[queryset.db]):
+        # Quote each term so user input can't inject FTS5 query syntax
+        match = ' '.join(f'"{term}"*' for term in terms)
+        return queryset.filter(id__in=RawSQL(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", (match,)
+        ))
+
+    condition = Q()
+    for term in terms:
+        condition &= Q(title__icontains=term) | Q(description__icontains=term)
+    return queryset.filter(condition)
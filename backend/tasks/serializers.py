@@ -1,7 +1,16 @@
 # backend/tasks/serializers.py - CORRECTED VERSION
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Task, TaskDependency
-from .utils import check_circular_dependency, update_task_status_based_on_dependencies
+from .models import Task, TaskDependency, ChangeEvent, Job
+from .utils import check_circular_dependency, DependencyGraphError
+from .graph import find_cycle, graph_index
+from .closure import closure_enabled, add_edge_to_closure
+from .propagation import propagate_status_changes
+from .jobs import enqueue_recompute
+from .versioning import bump_graph_version
+from .events import record_events, task_event_data, dependency_event_data
 
 class TaskSerializer(serializers.ModelSerializer):
     dependency_count = serializers.SerializerMethodField()
@@ -10,16 +19,22 @@ class TaskSerializer(serializers.ModelSerializer):
     class Meta:
         model = Task
         fields = [
-            'id', 'title', 'description', 'status',
+            'id', 'title', 'description', 'status', 'estimated_duration',
             'created_at', 'updated_at',
             'dependency_count', 'dependent_count'
         ]
         read_only_fields = ['created_at', 'updated_at']
     
+    # Querysets from Task.objects.with_dependency_counts() already carry the
+    # counts; only fall back to a COUNT query for plain instances
     def get_dependency_count(self, obj):
+        if hasattr(obj, 'dependency_count'):
+            return obj.dependency_count
         return obj.dependencies.count()
     
     def get_dependent_count(self, obj):
+        if hasattr(obj, 'dependent_count'):
+            return obj.dependent_count
         return obj.dependents.count()
     
     def update(self, instance, validated_data):
@@ -30,18 +45,11 @@ class TaskSerializer(serializers.ModelSerializer):
         # Update the task
         instance = super().update(instance, validated_data)
         
-        # If task status changed to completed, update tasks that depend on it
+        # If the status changed, every task downstream of this one has to be
+        # re-derived: queue that for the job workers
+        self.job = None
         if old_status != new_status:
-            # Get all tasks that depend on this task
-            dependent_tasks_ids = instance.dependents.values_list('task', flat=True)
-            
-            # Update status of each dependent task
-            for task_id in dependent_tasks_ids:
-                try:
-                    dependent_task = Task.objects.get(id=task_id)
-                    update_task_status_based_on_dependencies(dependent_task)
-                except Task.DoesNotExist:
-                    pass
+            self.job = enqueue_recompute([instance.id], include_self=False)
         
         return instance
 
@@ -77,5 +85,233 @@ class TaskDependencySerializer(serializers.ModelSerializer):
     
     def create(self, validated_data):
         dependency = TaskDependency.objects.create(**validated_data)
-        update_task_status_based_on_dependencies(dependency.task)
-        return dependency
\ No newline at end of file
+        self.updated_task_ids = propagate_status_changes([dependency.task_id])
+        return dependency
+
+
+
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'kind', 'state', 'task_ids', 'result', 'error',
+            'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
+
+
+class RowSerializer:
+    """
+    Read-only fast path for list endpoints: rows are fetched with values()
+    and turned into the same dicts a ModelSerializer would produce, without
+    model instances or per-field to_representation() calls.
+    
+    Datetimes are left as datetime objects (in the current time zone) for
+    the renderer to encode, which gives the same ISO 8601 text as DRF's
+    DateTimeField. Subclasses list `fields` in output order; every field
+    must be a plain column or an annotation of the queryset.
+    """
+    fields = ()
+    datetime_fields = ()
+    # Fields that aren't columns of the queryset's model: {name: expression}
+    expressions = {}
+    
+    def fetch(self, queryset):
+        columns = [name for name in self.fields if name not in self.expressions]
+        return queryset.values(*columns, **self.expressions)
+    
+    def compile(self, sample_row):
+        """Build the row -> dict transform once per page (None if rows are fine as they are)"""
+        # values() returns UTC datetimes, DateTimeField shows them in the
+        # current time zone
+        convert = () if timezone.get_current_timezone_name() == 'UTC' else self.datetime_fields
+        # values() puts annotations after the columns; only rebuild the
+        # dicts when that isn't the requested order
+        if not convert and list(sample_row) == list(self.fields):
+            return None
+    
+        tz = timezone.get_current_timezone()
+        names = self.fields
+        
+        def transform(row):
+            converted = {name: row[name].astimezone(tz) for name in convert}
+            return {name: converted[name] if name in converted else row[name] for name in names}
+        return transform
+    
+    def to_representation(self, rows):
+        rows = list(rows)
+        if not rows:
+            return rows
+        transform = self.compile(rows[0])
+        if transform is None:
+            return rows
+        return [transform(row) for row in rows]
+
+
+class TaskRowSerializer(RowSerializer):
+    """TaskSerializer output for querysets from with_dependency_counts()"""
+    fields = TaskSerializer.Meta.fields
+    datetime_fields = ('created_at', 'updated_at')
+
+
+class TaskDependencyRowSerializer(RowSerializer):
+    """TaskDependencySerializer output"""
+    fields = TaskDependencySerializer.Meta.fields
+    datetime_fields = ('created_at',)
+    expressions = {'task_title': F('task__title'), 'depends_on_title': F('depends_on__title')}
+
+
+class TaskReferenceField(serializers.Field):
+    """
+    A task in a bulk import: either the temp_id (string) of a task in the
+    same batch or the id (integer) of an existing task.
+    """
+    default_error_messages = {
+        'invalid': 'Expected a temp_id string or an existing task id.',
+    }
+    
+    def to_internal_value(self, data):
+        if isinstance(data, bool) or not isinstance(data, (int, str)) or data == '':
+            self.fail('invalid')
+        return data
+    
+    def to_representation(self, value):
+        return value
+
+
+class BulkTaskSerializer(serializers.ModelSerializer):
+    temp_id = serializers.CharField()
+    
+    class Meta:
+        model = Task
+        fields = ['temp_id', 'title', 'description', 'status', 'estimated_duration']
+
+
+class BulkDependencySerializer(serializers.Serializer):
+    task = TaskReferenceField()
+    depends_on = TaskReferenceField()
+
+
+class BulkImportSerializer(serializers.Serializer):
+    """
+    Create a batch of tasks and dependency edges in one go.
+    
+    The combined graph (existing + new edges) is checked for cycles once,
+    rows are inserted with bulk_create and statuses are derived once for
+    every affected task. All or nothing.
+    
+    Graph problems raise DependencyGraphError so the cycle path keeps its
+    task ids instead of being turned into error strings.
+    """
+    tasks = BulkTaskSerializer(many=True, required=False, default=list)
+    dependencies = BulkDependencySerializer(many=True, required=False, default=list)
+    
+    def validate(self, data):
+        temp_ids = [task['temp_id'] for task in data['tasks']]
+        if len(set(temp_ids)) != len(temp_ids):
+            raise serializers.ValidationError({"error": "temp_id values must be unique."})
+        temp_ids = set(temp_ids)
+        
+        edges = [(edge['task'], edge['depends_on']) for edge in data['dependencies']]
+        
+        # Integer references must be existing tasks, strings new ones
+        existing_refs = {ref for edge in edges for ref in edge if isinstance(ref, int)}
+        unknown_temp_ids = {
+            ref for edge in edges for ref in edge
+            if isinstance(ref, str) and ref not in temp_ids
+        }
+        if unknown_temp_ids:
+            raise serializers.ValidationError({
+                "error": "Unknown temp_id in dependencies",
+                "temp_ids": sorted(unknown_temp_ids)
+            })
+        found = set(Task.objects.filter(id__in=existing_refs).values_list('id', flat=True))
+        if existing_refs - found:
+            raise serializers.ValidationError({
+                "error": "Task not found",
+                "task_ids": sorted(existing_refs - found)
+            })
+        
+        new_edges = {}
+        for task_ref, depends_on_ref in edges:
+            if task_ref == depends_on_ref:
+                raise DependencyGraphError({
+                    "error": "A task cannot depend on itself.",
+                    "task": task_ref
+                })
+            new_edges.setdefault(task_ref, set()).add(depends_on_ref)
+        
+        with graph_index.lock:
+            graph_index.ensure_fresh()
+            
+            duplicates = [
+                [task_ref, depends_on_ref] for task_ref, depends_on_ref in edges
+                if depends_on_ref in graph_index.forward.get(task_ref, ())
+            ]
+            if duplicates or sum(len(refs) for refs in new_edges.values()) != len(edges):
+                raise DependencyGraphError({
+                    "error": "Dependency already exists",
+                    "dependencies": duplicates
+                })
+            
+            # The existing graph is acyclic, so any cycle goes through a new
+            # edge and is reachable from one of their sources
+            def get_neighbors(node):
+                yield from graph_index.forward.get(node, ())
+                yield from new_edges.get(node, ())
+            
+            cycle = find_cycle(list(new_edges), get_neighbors)
+        
+        if cycle:
+            raise DependencyGraphError({
+                "error": "Circular dependency detected",
+                "path": cycle
+            })
+        
+        return data
+    
+    def create(self, validated_data):
+        task_rows = validated_data['tasks']
+        edge_rows = validated_data['dependencies']
+        
+        with transaction.atomic():
+            created = Task.objects.bulk_create(
+                [Task(**{k: v for k, v in row.items() if k != 'temp_id'}) for row in task_rows],
+                batch_size=500
+            )
+            id_map = {row['temp_id']: task.id for row, task in zip(task_rows, created)}
+            
+            def resolve(ref):
+                return id_map[ref] if isinstance(ref, str) else ref
+            
+            dependencies = TaskDependency.objects.bulk_create(
+                [
+                    TaskDependency(task_id=resolve(row['task']), depends_on_id=resolve(row['depends_on']))
+                    for row in edge_rows
+                ],
+                batch_size=500
+            )
+            
+            # bulk_create skips the signals, keep the graph index, closure
+            # table, change log and graph version in sync here (the
+            # optimistic write's claim moves the dependency version)
+            for dependency in dependencies:
+                graph_index.add_edge(dependency.id, dependency.task_id, dependency.depends_on_id)
+            if closure_enabled():
+                for dependency in dependencies:
+                    add_edge_to_closure(dependency.task_id, dependency.depends_on_id)
+            record_events(
+                [(ChangeEvent.TASK_CREATED, task.id, task_event_data(task)) for task in created]
+                + [(ChangeEvent.DEPENDENCY_ADDED, dependency.id, dependency_event_data(dependency))
+                   for dependency in dependencies]
+            )
+            bump_graph_version()
+            
+            affected = set(id_map.values()) | {dependency.task_id for dependency in dependencies}
+            updated_task_ids = propagate_status_changes(affected)
+        
+        return {
+            'tasks': id_map,
+            'dependencies': [dependency.id for dependency in dependencies],
+            'updated_task_ids': sorted(updated_task_ids),
+        }
\ No newline at end of file
@@ -0,0 +1,56 @@
+# backend/tasks/signals.py
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from .models import Task, TaskDependency, ChangeEvent
+from .graph import graph_index
+from . import closure
+from .versioning import bump_graph_version
+from .concurrency import bump_dependency_version
+from .events import record_event, task_event_data, dependency_event_data
+
+
+@receiver(post_save, sender=TaskDependency)
+def dependency_saved(sender, instance, created, **kwargs):
+    """Add new (or moved) edges to the in-memory graph index (and closure table)"""
+    graph_index.add_edge(instance.id, instance.task_id, instance.depends_on_id)
+    bump_dependency_version()
+    if created:
+        if closure.closure_enabled():
+            closure.add_edge_to_closure(instance.task_id, instance.depends_on_id)
+        record_event(ChangeEvent.DEPENDENCY_ADDED, instance.id, dependency_event_data(instance))
+    bump_graph_version()
+
+
+@receiver(post_delete, sender=TaskDependency)
+def dependency_deleted(sender, instance, **kwargs):
+    """Drop deleted edges (including CASCADE deletes) from the graph index"""
+    graph_index.remove_edge(instance.id)
+    bump_dependency_version()
+    if closure.closure_enabled():
+        closure.remove_edge_from_closure(instance.task_id)
+    record_event(ChangeEvent.DEPENDENCY_REMOVED, instance.id, dependency_event_data(instance))
+    bump_graph_version()
+
+
+@receiver(post_save, sender=Task)
+def task_saved(sender, instance, created, **kwargs):
+    kind = ChangeEvent.TASK_CREATED if created else ChangeEvent.TASK_UPDATED
+    record_event(kind, instance.id, task_event_data(instance))
+    bump_graph_version()
+
+
+@receiver(pre_delete, sender=Task)
+def task_deleting(sender, instance, **kwargs):
+    # The CASCADE removes the closure rows of this task before the
+    # dependency signals run, so remember what was below it now
+    if closure.closure_enabled():
+        instance._closure_downstream_ids = closure.get_downstream_ids(instance.id)
+
+
+@receiver(post_delete, sender=Task)
+def task_deleted(sender, instance, **kwargs):
+    downstream_ids = getattr(instance, '_closure_downstream_ids', None)
+    if downstream_ids:
+        closure.reconcile_closure(downstream_ids)
+    record_event(ChangeEvent.TASK_DELETED, instance.id, {'id': instance.id})
+    bump_graph_version()
@@ -0,0 +1,300 @@
+# backend/tasks/stats.py
+"""
+Task counts for dashboards (/api/stats/).
+
+TaskCounter keeps one row per counter: tasks per status, ready tasks
+(utils.READY_STATUSES: pending or in progress, every dependency
+completed, as /api/schedule/ lists them) and blocked roots
+(blocked tasks with no blocked dependency: each starts a chain of tasks
+blocked through it). Reading them is one query over a handful of rows,
+however many tasks there are.
+
+On SQLite, triggers on tasks_task and tasks_taskdependency adjust the
+counters in the statement that inserts, updates or deletes a row, so a
+write is counted in its own transaction whichever way it's made: saves,
+CASCADE deletes, the bulk_create/bulk_update of imports and status
+propagation, the job workers, raw SQL, other processes. A trigger only
+looks at the changed row, the dependencies of a task and the direct
+dependents of a task (indexed lookups). The triggers are installed with
+triggers.py; repair them with `python manage.py rebuild_task_stats`.
+Other databases count with COUNT_SQL on every read instead.
+"""
+from collections import Counter
+
+from django.db import connections, transaction
+from .graph import graph_index
+from .triggers import install_triggers, triggers_installed, uninstall_triggers
+from .utils import READY_STATUSES
+
+COUNTER_TABLE = 'tasks_taskcounter'
+TASK_TABLE = 'tasks_task'
+EDGE_TABLE = 'tasks_taskdependency'
+
+STATUSES = ('pending', 'in_progress', 'completed', 'blocked')
+READY = 'ready'
+BLOCKED_ROOTS = 'blocked_roots'
+COUNTERS = STATUSES + (READY, BLOCKED_ROOTS)
+
+# Statuses a task can be ready in (once every dependency is completed)
+READY_STATUS_SQL = '(' + ', '.join(f"'{status}'" for status in READY_STATUSES) + ')'
+# Dependency conditions: what holds a task back from being ready, or a root
+OPEN = "!= 'completed'"
+BLOCKED = "= 'blocked'"
+
+
+# The subqueries join CROSS JOIN so SQLite walks the edges of one task and
+# looks their tasks up by id, instead of going through every task with a
+# status via task_status_created_idx
+
+def _has_dependency(task_id, condition, exclude=None):
+    """SQL: task_id has a dependency whose status matches condition (one not excluded)"""
+    exclude = f'AND {exclude}' if exclude else ''
+    return f"""EXISTS (
+        SELECT 1 FROM {EDGE_TABLE} dep_edge CROSS JOIN {TASK_TABLE} dep
+        WHERE dep_edge.task_id = {task_id} AND dep.id = dep_edge.depends_on_id
+        AND dep.status {condition} {exclude}
+    )"""
+
+
+def _flag(condition):
+    # 0/1, also when a subquery finds no row: NULL would poison the counter
+    return f"(CASE WHEN {condition} THEN 1 ELSE 0 END)"
+
+
+# What a task adds itself: condition on its row (NEW/OLD), its dependencies
+_OWN = {
+    READY: lambda row: _flag(
+        f"{row}.status IN {READY_STATUS_SQL} AND NOT {_has_dependency(f'{row}.id', OPEN)}"
+    ),
+    BLOCKED_ROOTS: lambda row: _flag(
+        f"{row}.status = 'blocked' AND NOT {_has_dependency(f'{row}.id', BLOCKED)}"
+    ),
+}
+
+# What its dependents add through it: those that would count if the task
+# were completed (ready) or not blocked (roots), whatever its status
+_DEPENDENTS = {
+    READY: lambda task_id: f"""(
+        SELECT COUNT(*) FROM {EDGE_TABLE} edge CROSS JOIN {TASK_TABLE} dependent
+        WHERE edge.depends_on_id = {task_id} AND dependent.id = edge.task_id
+        AND dependent.status IN {READY_STATUS_SQL}
+        AND NOT {_has_dependency('dependent.id', OPEN, f'dep.id != {task_id}')}
+    )""",
+    BLOCKED_ROOTS: lambda task_id: f"""(
+        SELECT COUNT(*) FROM {EDGE_TABLE} edge CROSS JOIN {TASK_TABLE} dependent
+        WHERE edge.depends_on_id = {task_id} AND dependent.id = edge.task_id
+        AND dependent.status = 'blocked'
+        AND NOT {_has_dependency('dependent.id', BLOCKED, f'dep.id != {task_id}')}
+    )""",
+}
+
+# ... which they do when the task's status passes this (a missing task
+# counts as passing: its dependents don't wait for it)
+_PASSES = {
+    READY: lambda row: f"{row}.status = 'completed'",
+    BLOCKED_ROOTS: lambda row: f"{row}.status != 'blocked'",
+}
+
+
+def _task_delta(counter, new=None, old=None):
+    """SQL: change of counter when a task row goes from old to new (None: no row)"""
+    parts = []
+    if new:
+        parts.append(_OWN[counter](new))
+    if old:
+        parts.append(f"- {_OWN[counter](old)}")
+    new_passes = _flag(_PASSES[counter](new)) if new else '1'
+    old_passes = _flag(_PASSES[counter](old)) if old else '1'
+    task_id = f"{new or old}.id"
+    # Only count the dependents when the task crosses the line
+    parts.append(
+        f"+ (CASE WHEN {new_passes} != {old_passes} "
+        f"THEN ({new_passes} - {old_passes}) * {_DEPENDENTS[counter](task_id)} ELSE 0 END)"
+    )
+    return ' '.join(parts)
+
+
+def _edge_delta(counter, row, sign):
+    """
+    SQL: change of counter when edge row is added (sign -1) or removed
+    (sign +1): the task gains or loses a dependency that held it back,
+    unless another one does too.
+    """
+    task_status = f"(SELECT status FROM {TASK_TABLE} WHERE id = {row}.task_id)"
+    depends_on_status = f"(SELECT status FROM {TASK_TABLE} WHERE id = {row}.depends_on_id)"
+    other = f'dep_edge.id != {row}.id'
+    if counter == READY:
+        condition = (
+            f"{task_status} IN {READY_STATUS_SQL} AND {depends_on_status} != 'completed' "
+            f"AND NOT {_has_dependency(f'{row}.task_id', OPEN, other)}"
+        )
+    else:
+        condition = (
+            f"{task_status} = 'blocked' AND {depends_on_status} = 'blocked' "
+            f"AND NOT {_has_dependency(f'{row}.task_id', BLOCKED, other)}"
+        )
+    return f"{'+' if sign > 0 else '-'} {_flag(condition)}"
+
+
+def _update_counters(deltas):
+    """SQL: one UPDATE adding deltas ([(name SQL, delta SQL)]) to the counters"""
+    cases = ' '.join(f"WHEN {name} THEN {delta}" for name, delta in deltas)
+    names = ', '.join(name for name, _delta in deltas)
+    return (
+        f"UPDATE {COUNTER_TABLE} SET value = value + (CASE name {cases} ELSE 0 END) "
+        f"WHERE name IN ({names});"
+    )
+
+
+def _task_deltas(new=None, old=None):
+    deltas = []
+    if new:
+        deltas.append((f"{new}.status", '1'))
+    if old:
+        # Only run for status changes: new and old never name the same row
+        deltas.append((f"{old}.status", '-1'))
+    return deltas + [
+        (f"'{counter}'", _task_delta(counter, new, old)) for counter in (READY, BLOCKED_ROOTS)
+    ]
+
+
+def _edge_deltas(row, sign):
+    return [(f"'{counter}'", _edge_delta(counter, row, sign)) for counter in (READY, BLOCKED_ROOTS)]
+
+
+TRIGGERS = {
+    'tasks_stats_task_ai': (
+        f"AFTER INSERT ON {TASK_TABLE}",
+        [_update_counters(_task_deltas(new='NEW'))],
+    ),
+    'tasks_stats_task_au': (
+        f"AFTER UPDATE OF status ON {TASK_TABLE} WHEN OLD.status IS NOT NEW.status",
+        [_update_counters(_task_deltas(new='NEW', old='OLD'))],
+    ),
+    'tasks_stats_task_ad': (
+        f"AFTER DELETE ON {TASK_TABLE}",
+        [_update_counters(_task_deltas(old='OLD'))],
+    ),
+    'tasks_stats_edge_ai': (
+        f"AFTER INSERT ON {EDGE_TABLE}",
+        [_update_counters(_edge_deltas('NEW', -1))],
+    ),
+    # A moved edge is removed and added again
+    'tasks_stats_edge_au': (
+        f"AFTER UPDATE OF task_id, depends_on_id ON {EDGE_TABLE}",
+        [_update_counters(_edge_deltas('OLD', 1)), _update_counters(_edge_deltas('NEW', -1))],
+    ),
+    'tasks_stats_edge_ad': (
+        f"AFTER DELETE ON {EDGE_TABLE}",
+        [_update_counters(_edge_deltas('OLD', 1))],
+    ),
+}
+
+# Every counter from scratch (portable SQL)
+COUNT_SQL = f"""
+    SELECT status, COUNT(*) FROM {TASK_TABLE} GROUP BY status
+    UNION ALL
+    SELECT '{READY}', COUNT(*) FROM {TASK_TABLE} task
+    WHERE task.status IN {READY_STATUS_SQL} AND NOT {_has_dependency('task.id', OPEN)}
+    UNION ALL
+    SELECT '{BLOCKED_ROOTS}', COUNT(*) FROM {TASK_TABLE} task
+    WHERE task.status = 'blocked' AND NOT {_has_dependency('task.id', BLOCKED)}
+"""
+
+_stats_available = {}
+
+
+def count_task_stats(db_connection):
+    """{counter: value} for every counter, counted from the task tables"""
+    counts = dict.fromkeys(COUNTERS, 0)
+    with db_connection.cursor() as cursor:
+        cursor.execute(COUNT_SQL)
+        counts.update(cursor.fetchall())
+    return counts
+
+
+def install_stats(db_connection):
+    """Create (or repair) the counter triggers and recount. SQLite only."""
+    with transaction.atomic(using=db_connection.alias):
+        if not install_triggers(db_connection, TRIGGERS):
+            return False
+        counts = count_task_stats(db_connection)
+        with db_connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {COUNTER_TABLE}")
+            cursor.executemany(
+                f"INSERT INTO {COUNTER_TABLE} (name, value) VALUES (%s, %s)", list(counts.items())
+            )
+    _stats_available.pop(db_connection.alias, None)
+    return True
+
+
+def uninstall_stats(db_connection):
+    uninstall_triggers(db_connection, TRIGGERS)
+    _stats_available.pop(db_connection.alias, None)
+
+
+def stats_available(db_connection):
+    """Whether the counters are kept up to date on this connection's database"""
+    if db_connection.alias not in _stats_available:
+        _stats_available[db_connection.alias] = triggers_installed(db_connection, TRIGGERS)
+    return _stats_available[db_connection.alias]
+
+
+def get_blocked_chain_sizes():
+    """
+    {root_id: size} of every blocked chain: the root and the blocked tasks
+    that depend on it, directly or through other blocked tasks (a task
+    blocked through two roots is in both). Walks the blocked part of the
+    graph index.
+    """
+    from .models import Task
+
+    blocked = set(Task.objects.filter(status=Task.BLOCKED).values_list('id', flat=True))
+    sizes = {}
+    with graph_index.lock:
+        graph_index.ensure_fresh()
+        for root in blocked:
+            if graph_index.forward.get(root, set()) & blocked:
+                continue
+            chain, stack = {root}, [root]
+            while stack:
+                for dependent in graph_index.reverse.get(stack.pop(), ()):
+                    if dependent in blocked and dependent not in chain:
+                        chain.add(dependent)
+                        stack.append(dependent)
+            sizes[root] = len(chain)
+    return sizes
+
+
+def get_task_stats(chain_sizes=False):
+    """
+    Returns:
+        {"total", "by_status": {status: count}, "ready", "blocked_chains":
+        {"count", "tasks"}}: a chain starts at each blocked root and takes
+        in the tasks blocked through it, so "tasks" is every blocked task
+        (one blocked through two roots is in both chains, but counted once).
+        With chain_sizes, blocked_chains also has "largest" and "sizes":
+        {size: number of chains of that size}, from
+        get_blocked_chain_sizes() (a walk, not a counter read)
+    """
+    from .models import TaskCounter
+
+    db_connection = connections[TaskCounter.objects.db]
+    if stats_available(db_connection):
+        counts = dict.fromkeys(COUNTERS, 0)
+        counts.update(TaskCounter.objects.values_list('name', 'value'))
+    else:
+        counts = count_task_stats(db_connection)
+
+    by_status = {status: counts.get(status, 0) for status in STATUSES}
+    blocked_chains = {'count': counts[BLOCKED_ROOTS], 'tasks': by_status['blocked']}
+    if chain_sizes:
+        sizes = Counter(get_blocked_chain_sizes().values())
+        blocked_chains['largest'] = max(sizes, default=0)
+        blocked_chains['sizes'] = {str(size): sizes[size] for size in sorted(sizes)}
+    return {
+        'total': sum(by_status.values()),
+        'by_status': by_status,
+        'ready': counts[READY],
+        'blocked_chains': blocked_chains,
+    }
@@ -0,0 +1,372 @@
+# backend/tasks/tests.py
+import json
+import subprocess
+import sys
+from io import StringIO
+
+from django.conf import settings
+
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.db.models import F
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from .events import latest_event_id, prune_events
+from .concurrency import bump_dependency_version, optimistic_graph_write, write_stats
+from .graph import _RequestScope, _request_scope, graph_index
+from .metrics import RequestMetrics, _current_request, function_duration, render_metrics, timed
+from .models import GraphVersion, Job, Task, TaskDependency
+from .scheduling import compute_schedule
+from .stats import get_task_stats, install_stats
+from .transfer import GraphImportError, import_lines
+from .utils import check_circular_dependency
+
+
+class Rollback(Exception):
+    pass
+
+
+class GraphIndexRollbackTests(TransactionTestCase):
+    """The shared graph index must not keep edges of rolled back transactions"""
+
+    def setUp(self):
+        self.a, self.b, self.c, self.d = (
+            Task.objects.create(title=title) for title in 'abcd'
+        )
+        graph_index.invalidate()
+        graph_index.ensure_fresh()
+
+    def assertIndexMatchesTable(self):
+        graph_index.ensure_fresh()
+        edges = set(TaskDependency.objects.values_list('task_id', 'depends_on_id'))
+        indexed = {
+            (task_id, depends_on_id)
+            for task_id, dependencies in graph_index.forward.items()
+            for depends_on_id in dependencies
+        }
+        self.assertEqual(indexed, edges)
+
+    def rolled_back_insert(self, task, depends_on):
+        try:
+            with transaction.atomic():
+                dependency = TaskDependency.objects.create(task=task, depends_on=depends_on)
+                raise Rollback
+        except Rollback:
+            pass
+        return dependency.id
+
+    def test_rollback_then_insert_reusing_the_id(self):
+        rolled_back_id = self.rolled_back_insert(self.a, self.b)
+        dependency = TaskDependency.objects.create(task=self.c, depends_on=self.d)
+        # SQLite hands the id out again: same count and id sum as the index
+        self.assertEqual(dependency.id, rolled_back_id)
+
+        self.assertIndexMatchesTable()
+        self.assertEqual(check_circular_dependency(self.b.id, self.a.id), (False, []))
+        self.assertTrue(check_circular_dependency(self.d.id, self.c.id)[0])
+
+    def test_rollback_then_insert_of_the_same_dependency(self):
+        self.rolled_back_insert(self.a, self.b)
+        TaskDependency.objects.create(task=self.a, depends_on=self.b)
+
+        self.assertIndexMatchesTable()
+        self.assertTrue(check_circular_dependency(self.b.id, self.a.id)[0])
+
+    def test_rolled_back_savepoint(self):
+        with transaction.atomic():
+            TaskDependency.objects.create(task=self.c, depends_on=self.d)
+            self.rolled_back_insert(self.a, self.b)
+
+        self.assertIndexMatchesTable()
+        self.assertEqual(check_circular_dependency(self.b.id, self.a.id), (False, []))
+
+
+class GraphIndexVersionTests(TransactionTestCase):
+    """The index checks GraphVersion.dependency_version, not the edge table"""
+
+    def setUp(self):
+        self.a, self.b, self.c = (Task.objects.create(title=title) for title in 'abc')
+        TaskDependency.objects.create(task=self.a, depends_on=self.b)
+        graph_index.ensure_fresh()
+
+    def test_lookup_reads_only_the_version(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(graph_index.direct_dependencies(self.a.id), {self.b.id})
+
+    def test_lookups_of_a_request_share_one_check(self):
+        token = _request_scope.set(_RequestScope())
+        try:
+            with self.assertNumQueries(1):
+                graph_index.direct_dependencies(self.a.id)
+                graph_index.descendants(self.b.id)
+        finally:
+            _request_scope.reset(token)
+
+    def test_writes_behind_the_signals_are_noticed(self):
+        TaskDependency.objects.bulk_create([TaskDependency(task=self.b, depends_on=self.c)])
+        bump_dependency_version(mirrored=False)
+
+        self.assertEqual(graph_index.ancestors(self.a.id), {self.b.id, self.c.id})
+
+
+@override_settings(TASK_JOB_WORKERS=0)
+class GraphImportIndexTests(TransactionTestCase):
+    """Imported edges reach the shared graph index only once committed"""
+
+    def setUp(self):
+        self.a, self.b = Task.objects.create(title='a'), Task.objects.create(title='b')
+        TaskDependency.objects.create(task=self.a, depends_on=self.b)
+        graph_index.invalidate()
+        graph_index.ensure_fresh()
+
+    def import_dependency(self, dep_id, task, depends_on):
+        line = {'type': 'dependency', 'id': dep_id, 'task': task.id, 'depends_on': depends_on.id}
+        return import_lines([json.dumps(line)])
+
+    def test_rejected_import_leaves_the_index_alone(self):
+        with self.assertRaises(GraphImportError):
+            self.import_dependency(1000, self.b, self.a)
+
+        with graph_index.lock:
+            self.assertNotIn(self.a.id, graph_index.forward.get(self.b.id, ()))
+        self.assertFalse(TaskDependency.objects.filter(id=1000).exists())
+
+    def test_imported_edges_are_checked_against_the_index(self):
+        c = Task.objects.create(title='c')
+        self.import_dependency(1000, self.b, c)
+        with self.assertRaises(GraphImportError):
+            self.import_dependency(1001, c, self.a)
+
+        self.assertEqual(check_circular_dependency(c.id, self.a.id)[0], True)
+
+    def import_graph(self, edges, batch_size):
+        lines = [{'type': 'task', 'id': task_id, 'title': str(task_id)} for task_id in (100, 101, 102)]
+        lines += [
+            {'type': 'dependency', 'id': 1000 + number, 'task': task_id, 'depends_on': depends_on_id}
+            for number, (task_id, depends_on_id) in enumerate(edges)
+        ]
+        return import_lines([json.dumps(line) for line in lines], batch_size=batch_size)
+
+    def test_cycle_across_batches(self):
+        with self.assertRaises(GraphImportError) as caught:
+            self.import_graph([(100, 101), (101, 102), (102, 100)], batch_size=1)
+
+        self.assertEqual(caught.exception.detail['path'], [102, 100, 101, 102])
+        self.assertFalse(Task.objects.filter(id__in=[100, 101, 102]).exists())
+
+    def test_duplicate_across_batches(self):
+        with self.assertRaises(GraphImportError) as caught:
+            self.import_graph([(100, 101), (101, 102), (100, 101)], batch_size=2)
+
+        self.assertEqual(caught.exception.detail['line'], 6)
+
+    def test_existing_tasks_that_gain_dependencies_are_recomputed(self):
+        result = import_lines([
+            json.dumps({'type': 'task', 'id': 100, 'title': 'new'}),
+            json.dumps({'type': 'dependency', 'id': 1000, 'task': self.b.id, 'depends_on': 100}),
+        ])
+
+        self.assertEqual(Job.objects.get(id=result['job_id']).task_ids, [self.b.id])
+        self.assertEqual(graph_index.direct_dependencies(self.b.id), {100})
+
+
+class ConditionalReadTests(TransactionTestCase):
+    """Read endpoints answer If-None-Match with 304 until the graph changes"""
+    databases = {'default', 'read'}
+
+    def setUp(self):
+        caches['default'].clear()
+        self.a, self.b = Task.objects.create(title='a'), Task.objects.create(title='b')
+
+    def test_unchanged_graph_is_not_modified(self):
+        response = self.client.get('/api/tasks/')
+        self.assertEqual(response.status_code, 200)
+
+        repeated = self.client.get('/api/tasks/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(repeated.status_code, 304)
+        self.assertEqual(repeated.content, b'')
+
+    def test_dependency_write_changes_the_etag(self):
+        etag = self.client.get('/api/tasks/')['ETag']
+        added = self.client.post(
+            f'/api/tasks/{self.a.id}/add_dependency/', {'depends_on_id': self.b.id},
+            content_type='application/json'
+        )
+        self.assertEqual(added.status_code, 201)
+
+        response = self.client.get('/api/tasks/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        # Served from the response cache under the new version, not the old entry
+        listed = {task['id']: task for task in response.json()['results']}
+        self.assertEqual(listed[self.a.id]['dependency_count'], 1)
+
+
+class OptimisticWriteTests(TransactionTestCase):
+    def setUp(self):
+        self.a, self.b = Task.objects.create(title='a'), Task.objects.create(title='b')
+
+    def test_conflicting_write_is_retried(self):
+        attempts = []
+
+        def write():
+            attempts.append(1)
+            if len(attempts) == 1:
+                # Another writer commits an edge between the check and the claim
+                GraphVersion.objects.filter(pk=GraphVersion.SINGLETON_ID).update(
+                    dependency_version=F('dependency_version') + 1
+                )
+            return TaskDependency.objects.create(task=self.a, depends_on=self.b)
+
+        conflicts = write_stats.snapshot()['conflicts']
+        dependency = optimistic_graph_write(write)
+
+        self.assertEqual(len(attempts), 2)
+        self.assertEqual(write_stats.snapshot()['conflicts'], conflicts + 1)
+        self.assertEqual(list(TaskDependency.objects.values_list('id', flat=True)), [dependency.id])
+
+
+class MetricsTests(TransactionTestCase):
+    databases = {'default', 'read'}
+
+    def sample(self, text, prefix):
+        """The value of the first line of text starting with prefix"""
+        for line in text.splitlines():
+            if line.startswith(prefix):
+                return float(line.rsplit(' ', 1)[1])
+        return 0
+
+    def test_requests_show_up_on_the_metrics_endpoint(self):
+        a, b = Task.objects.create(title='a'), Task.objects.create(title='b')
+        prefix = 'task_http_request_duration_seconds_count{view="task-add-dependency",method="POST",status="201"}'
+        before = self.sample(render_metrics(), prefix)
+
+        response = self.client.post(
+            f'/api/tasks/{a.id}/add_dependency/', {'depends_on_id': b.id},
+            content_type='application/json'
+        )
+        self.assertIn('check_circular_dependency;dur=', response['Server-Timing'])
+        self.assertRegex(response['Server-Timing'], r'db;dur=[0-9.]+;desc="[1-9][0-9]* queries"')
+
+        metrics = self.client.get('/metrics')
+        self.assertEqual(metrics['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        text = metrics.content.decode()
+        self.assertEqual(self.sample(text, prefix), before + 1)
+        self.assertIn('# TYPE task_dependency_writes_total counter', text)
+        self.assertGreater(self.sample(text, 'task_function_duration_seconds_count{function="check_circular_dependency"}'), 0)
+
+    def test_timed_records_per_request_and_overall(self):
+        @timed
+        def instrumented_function():
+            return 'result'
+
+        metrics = RequestMetrics()
+        token = _current_request.set(metrics)
+        try:
+            self.assertEqual(instrumented_function(), 'result')
+            instrumented_function()
+        finally:
+            _current_request.reset(token)
+
+        self.assertEqual(metrics.functions['instrumented_function'][0], 2)
+        self.assertIn('instrumented_function;dur=', metrics.server_timing(0.01))
+        prefix = 'task_function_duration_seconds_count{function="instrumented_function"}'
+        self.assertEqual(self.sample('\n'.join(function_duration.render()), prefix), 2)
+
+    @override_settings(TASK_METRICS_ENABLED=False)
+    def test_timed_is_a_no_op_when_disabled(self):
+        def function():
+            pass
+
+        self.assertIs(timed(function), function)
+
+
+class ChangesViewTests(TransactionTestCase):
+    databases = {'default', 'read'}
+
+    def setUp(self):
+        for title in 'abc':
+            Task.objects.create(title=title)
+        self.latest = latest_event_id()
+
+    def get_changes(self, since):
+        return self.client.get('/api/changes/', {'since': since})
+
+    def test_up_to_date(self):
+        response = self.get_changes(self.latest)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['version'], self.latest)
+
+    def test_pruned_log_keeps_its_boundary(self):
+        prune_events(timezone.now() + timezone.timedelta(days=1))
+        self.assertEqual(latest_event_id(), self.latest)
+
+        self.assertEqual(self.get_changes(self.latest - 2).status_code, 410)
+        self.assertEqual(self.get_changes(self.latest).status_code, 200)
+
+    def test_version_newer_than_the_log(self):
+        self.assertEqual(self.get_changes(self.latest + 1).status_code, 410)
+
+
+class ReadyTasksTests(TestCase):
+    """/api/stats/ counts the tasks /api/schedule/ lists as ready"""
+
+    def setUp(self):
+        # Recount: TransactionTestCase flushes the counter table
+        install_stats(connection)
+
+    def test_ready_definitions_agree(self):
+        done = Task.objects.create(title='done', status=Task.COMPLETED)
+        tasks = {
+            task_status: Task.objects.create(title=task_status, status=task_status)
+            for task_status in (Task.PENDING, Task.IN_PROGRESS, Task.BLOCKED)
+        }
+        for task in tasks.values():
+            TaskDependency.objects.create(task=task, depends_on=done)
+        waiting = Task.objects.create(title='waiting')
+        TaskDependency.objects.create(task=waiting, depends_on=tasks[Task.BLOCKED])
+        ready = {tasks[Task.PENDING].id, tasks[Task.IN_PROGRESS].id}
+
+        self.assertEqual(set(compute_schedule()['ready']), ready)
+        self.assertEqual(get_task_stats()['ready'], len(ready))
+
+
+class BlockedChainsTests(TestCase):
+    def test_chain_sizes(self):
+        first, second = (Task.objects.create(title=title, status=Task.BLOCKED) for title in 'ab')
+        shared = Task.objects.create(title='shared', status=Task.BLOCKED)
+        below = Task.objects.create(title='below', status=Task.BLOCKED)
+        for dependency in (first, second):
+            TaskDependency.objects.create(task=shared, depends_on=dependency)
+        TaskDependency.objects.create(task=below, depends_on=shared)
+
+        chains = get_task_stats(chain_sizes=True)['blocked_chains']
+        # shared and below are in both chains
+        self.assertEqual(chains, {'count': 2, 'tasks': 4, 'largest': 3, 'sizes': {'3': 2}})
+
+
+class BenchmarkCommandTests(SimpleTestCase):
+    def test_small_graphs(self):
+        # In a process of its own: the command sets up its own test database
+        result = subprocess.run(
+            [sys.executable, 'manage.py', 'benchmark_tasks', '--tasks', '12', '--edges', '20', '--repeat', '2'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=300
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        report = json.loads(result.stdout)
+
+        self.assertEqual([scenario['shape'] for scenario in report['scenarios']], ['chain', 'fan', 'random'])
+        for scenario in report['scenarios']:
+            statuses = {name: summary['status_codes'] for name, summary in scenario['operations'].items()}
+            self.assertEqual(statuses.pop('add_dependency'), [201])
+            self.assertEqual(statuses.pop('cycle_rejection'), [400])
+            self.assertEqual(set(map(tuple, statuses.values())), {(200,)})
+        edges = {scenario['shape']: scenario['edges'] for scenario in report['scenarios']}
+        self.assertEqual((edges['chain'], edges['random']), (11, 20))
+        self.assertEqual(report['meta']['options']['tasks'], 12)
+
+    def test_unknown_shape(self):
+        with self.assertRaises(CommandError):
+            call_command('benchmark_tasks', shapes='chain,ring', stdout=StringIO())
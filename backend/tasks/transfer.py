@@ -0,0 +1,402 @@
+# backend/tasks/transfer.py
+"""
+NDJSON export and import of the whole task graph.
+
+The format is one JSON object per line:
+
+    {"type": "header", "format": "task-graph", "version": 1}
+    {"type": "task", "id": 1, "title": "...", "description": "...", "status": "pending",
+     "estimated_duration": null, "created_at": "...", "updated_at": "..."}
+    ...
+    {"type": "dependency", "id": 1, "task": 2, "depends_on": 1, "created_at": "..."}
+
+Tasks come before the dependencies that reference them. The export streams
+rows from server-side iterators in one read transaction. The import reads
+the stream line by line and writes fixed-size batches, keeping ids,
+statuses and timestamps. Each batch is checked against the table as it is
+written (references, duplicates, cycles through its edges), so memory
+holds one batch plus the existing tasks the import links to. Everything
+happens in one transaction, so a bad stream leaves nothing behind; the
+shared graph index only reloads after the commit.
+"""
+import json
+from collections import defaultdict
+from datetime import timezone as dt_timezone
+from functools import partial
+from itertools import chain
+
+from django.core.management.color import no_style
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .graph import find_cycle
+from .closure import add_edge_to_closure, closure_enabled, is_ancestor
+from .jobs import enqueue_recompute
+from .versioning import bump_graph_version
+from .concurrency import bump_dependency_version
+from .events import latest_event_id, record_events, task_event_data, dependency_event_data
+from .caching import invalidate_tasks
+from .database import read_database
+
+FORMAT_NAME = 'task-graph'
+FORMAT_VERSION = 1
+EXPORT_CHUNK_SIZE = 2000
+IMPORT_BATCH_SIZE = 1000
+CONTENT_TYPE = 'application/x-ndjson'
+
+TASK_FIELDS = (
+    'id', 'title', 'description', 'status', 'estimated_duration', 'created_at', 'updated_at',
+)
+DEPENDENCY_FIELDS = ('id', 'task_id', 'depends_on_id', 'created_at')
+
+
+class GraphImportError(Exception):
+    """The stream can't be imported; detail is the JSON error body"""
+
+    def __init__(self, detail):
+        super().__init__(detail.get('error'))
+        self.detail = detail
+
+
+def _dumps(obj):
+    # Full isoformat: DjangoJSONEncoder would cut datetimes to milliseconds
+    return json.dumps(
+        obj, ensure_ascii=False, separators=(',', ':'),
+        default=lambda value: value.isoformat()
+    ) + '\n'
+
+
+def export_lines(chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield the NDJSON lines of every task and then every dependency"""
+    from .models import Task, TaskDependency
+
+    # A read transaction on the read connection: a consistent snapshot
+    # that doesn't hold the primary's write lock while the stream is sent
+    using = read_database()
+    with transaction.atomic(using=using):
+        yield _dumps({'type': 'header', 'format': FORMAT_NAME, 'version': FORMAT_VERSION})
+
+        rows = Task.objects.using(using).order_by('id').values_list(*TASK_FIELDS)
+        for row in rows.iterator(chunk_size=chunk_size):
+            yield _dumps({'type': 'task', **dict(zip(TASK_FIELDS, row))})
+
+        rows = TaskDependency.objects.using(using).order_by('id').values_list(*DEPENDENCY_FIELDS)
+        for dep_id, task_id, depends_on_id, created_at in rows.iterator(chunk_size=chunk_size):
+            yield _dumps({
+                'type': 'dependency', 'id': dep_id, 'task': task_id,
+                'depends_on': depends_on_id, 'created_at': created_at,
+            })
+
+
+def _restore_fields(model, objs, field_names):
+    """
+    Write back field values bulk_create() replaced (auto_now/auto_now_add).
+    One executemany() of a plain UPDATE: much cheaper than bulk_update()'s
+    CASE WHEN per row.
+    """
+    fields = [model._meta.get_field(name) for name in field_names]
+    quote = connection.ops.quote_name
+    assignments = ', '.join(f'{quote(field.column)} = %s' for field in fields)
+    sql = f'UPDATE {quote(model._meta.db_table)} SET {assignments} WHERE {quote(model._meta.pk.column)} = %s'
+    params = [
+        [field.get_db_prep_value(getattr(obj, field.attname), connection) for field in fields] + [obj.pk]
+        for obj in objs
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+class _GraphImporter:
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self.tasks = {}               # {task_id: Task} of the current batch
+        self.dependencies = []        # [(line_number, TaskDependency)] of the current batch
+        self.edges = set()            # (task_id, depends_on_id) of the current batch
+        # Existing tasks that got new edges (and the ones among them that
+        # gained dependencies): only these outlive a batch
+        self.linked_existing = set()
+        self.affected = set()
+        self.task_count = 0
+        self.dependency_count = 0
+        self.now = timezone.now()
+        # Tasks created by the events after this one were imported
+        self.first_event_id = latest_event_id()
+
+    # Parsing
+    def error(self, line_number, message, **extra):
+        raise GraphImportError({'error': message, 'line': line_number, **extra})
+
+    def add_line(self, line_number, line):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        if not line.strip():
+            return
+        try:
+            obj = json.loads(line)
+        except ValueError:
+            self.error(line_number, "Invalid JSON")
+        if not isinstance(obj, dict):
+            self.error(line_number, "Expected a JSON object")
+
+        kind = obj.get('type')
+        if kind == 'header':
+            if obj.get('format') != FORMAT_NAME or obj.get('version') != FORMAT_VERSION:
+                self.error(line_number, f"Unsupported format, expected {FORMAT_NAME} version {FORMAT_VERSION}")
+        elif kind == 'task':
+            self.add_task(line_number, obj)
+        elif kind == 'dependency':
+            self.add_dependency(line_number, obj)
+        else:
+            self.error(line_number, "Unknown line type", type=kind)
+
+    def _id(self, line_number, obj, key):
+        value = obj.get(key)
+        if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+            self.error(line_number, f"{key} must be a positive integer")
+        return value
+
+    def _datetime(self, line_number, obj, key):
+        value = obj.get(key)
+        if value is None:
+            return self.now
+        parsed = parse_datetime(value) if isinstance(value, str) else None
+        if parsed is None:
+            self.error(line_number, f"{key} must be an ISO datetime")
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed, dt_timezone.utc)
+        return parsed
+
+    def add_task(self, line_number, obj):
+        from .models import Task
+
+        task_id = self._id(line_number, obj, 'id')
+        # Ids of earlier batches are in the table: flush_tasks() rejects them
+        if task_id in self.tasks:
+            self.error(line_number, "Duplicate task id", id=task_id)
+
+        title = obj.get('title')
+        max_length = Task._meta.get_field('title').max_length
+        if not isinstance(title, str) or not title or len(title) > max_length:
+            self.error(line_number, f"title must be a string of 1 to {max_length} characters")
+        description = obj.get('description', '')
+        if not isinstance(description, str):
+            self.error(line_number, "description must be a string")
+        task_status = obj.get('status', Task.PENDING)
+        if task_status not in dict(Task.STATUS_CHOICES):
+            self.error(line_number, f"Unknown status: {task_status}")
+        duration = obj.get('estimated_duration')
+        if duration is not None and (isinstance(duration, bool) or not isinstance(duration, int) or duration < 0):
+            self.error(line_number, "estimated_duration must be a non-negative integer")
+
+        self.tasks[task_id] = Task(
+            id=task_id, title=title, description=description, status=task_status,
+            estimated_duration=duration,
+            created_at=self._datetime(line_number, obj, 'created_at'),
+            updated_at=self._datetime(line_number, obj, 'updated_at'),
+        )
+        if len(self.tasks) >= self.batch_size:
+            self.flush_tasks()
+
+    def add_dependency(self, line_number, obj):
+        from .models import TaskDependency
+
+        dep_id = self._id(line_number, obj, 'id')
+        task_id = self._id(line_number, obj, 'task')
+        depends_on_id = self._id(line_number, obj, 'depends_on')
+        if task_id == depends_on_id:
+            self.error(line_number, "A task cannot depend on itself.", task=task_id)
+        # Edges of earlier batches are in the table: flush_dependencies()
+        # looks for those
+        if (task_id, depends_on_id) in self.edges:
+            self.error(line_number, "Dependency already exists", dependency=[task_id, depends_on_id])
+
+        self.edges.add((task_id, depends_on_id))
+        self.dependencies.append((line_number, TaskDependency(
+            id=dep_id, task_id=task_id, depends_on_id=depends_on_id,
+            created_at=self._datetime(line_number, obj, 'created_at'),
+        )))
+        if len(self.dependencies) >= self.batch_size:
+            self.flush_dependencies()
+
+    # Writing
+    def _check_free_ids(self, model, objs, message):
+        ids = [obj.id for obj in objs]
+        taken = sorted(model.objects.filter(id__in=ids).values_list('id', flat=True))
+        if taken:
+            raise GraphImportError({'error': message, 'ids': taken[:100]})
+
+    def flush_tasks(self):
+        from .models import Task, ChangeEvent
+
+        if not self.tasks:
+            return
+        tasks = list(self.tasks.values())
+        self._check_free_ids(Task, tasks, "Task ids already exist")
+        timestamps = [(task.created_at, task.updated_at) for task in tasks]
+        Task.objects.bulk_create(tasks)
+        # auto_now_add/auto_now overwrote the timestamps on insert
+        for task, (created_at, updated_at) in zip(tasks, timestamps):
+            task.created_at, task.updated_at = created_at, updated_at
+        _restore_fields(Task, tasks, ['created_at', 'updated_at'])
+        record_events(
+            [(ChangeEvent.TASK_CREATED, task.id, task_event_data(task)) for task in tasks],
+            invalidate_cache=False
+        )
+        self.task_count += len(tasks)
+        self.tasks = {}
+
+    def _check_references(self):
+        """Every task the batch links must exist; note the ones the import didn't create"""
+        from .models import Task, ChangeEvent
+
+        task_ids = set(chain.from_iterable(self.edges))
+        found = set(Task.objects.filter(id__in=task_ids).values_list('id', flat=True))
+        for line_number, dependency in self.dependencies:
+            missing = {dependency.task_id, dependency.depends_on_id} - found
+            if missing:
+                self.error(line_number, "Task not found", task_ids=sorted(missing))
+
+        imported = set(
+            ChangeEvent.objects.filter(
+                id__gt=self.first_event_id, kind=ChangeEvent.TASK_CREATED, object_id__in=task_ids
+            ).values_list('object_id', flat=True)
+        )
+        existing = task_ids - imported
+        self.linked_existing |= existing
+        # Imported tasks keep their statuses; tasks that were already there
+        # may have gained dependencies
+        self.affected |= {task_id for task_id, _ in self.edges if task_id in existing}
+
+    def _report_duplicate(self):
+        """Point at the line of an edge the table already had"""
+        from .models import TaskDependency
+
+        stored = set(
+            TaskDependency.objects.filter(
+                task_id__in={task_id for task_id, _ in self.edges},
+                depends_on_id__in={depends_on_id for _, depends_on_id in self.edges},
+            ).values_list('task_id', 'depends_on_id')
+        )
+        for line_number, dependency in self.dependencies:
+            edge = (dependency.task_id, dependency.depends_on_id)
+            if edge in stored:
+                self.error(line_number, "Dependency already exists", dependency=list(edge))
+        raise GraphImportError({'error': "Dependency already exists"})
+
+    def _check_cycles(self):
+        """
+        The graph was acyclic before this batch, so a cycle has to go through
+        one of its edges. With the closure table, check the edges one by one
+        and record them there; otherwise walk the rows upstream of the batch
+        (the ones this transaction wrote included).
+        """
+        if closure_enabled():
+            for line_number, dependency in self.dependencies:
+                if is_ancestor(dependency.task_id, dependency.depends_on_id):
+                    self.error(
+                        line_number, "Circular dependency detected",
+                        path=_find_cycle([dependency.task_id])
+                    )
+                add_edge_to_closure(dependency.task_id, dependency.depends_on_id)
+            return
+        cycle = _find_cycle({task_id for task_id, _ in self.edges})
+        if cycle:
+            raise GraphImportError({"error": "Circular dependency detected", "path": cycle})
+
+    def flush_dependencies(self):
+        from .models import TaskDependency, ChangeEvent
+
+        self.flush_tasks()
+        if not self.dependencies:
+            return
+        self._check_references()
+        dependencies = [dependency for _, dependency in self.dependencies]
+        self._check_free_ids(TaskDependency, dependencies, "Dependency ids already exist")
+        created_at = [dependency.created_at for dependency in dependencies]
+        try:
+            with transaction.atomic():
+                TaskDependency.objects.bulk_create(dependencies)
+        except IntegrityError:
+            self._report_duplicate()
+        for dependency, value in zip(dependencies, created_at):
+            dependency.created_at = value
+        _restore_fields(TaskDependency, dependencies, ['created_at'])
+        self._check_cycles()
+        record_events(
+            [(ChangeEvent.DEPENDENCY_ADDED, dependency.id, dependency_event_data(dependency))
+             for dependency in dependencies],
+            invalidate_cache=False
+        )
+        self.dependency_count += len(dependencies)
+        self.dependencies = []
+        self.edges = set()
+
+    def finish(self):
+        from .models import Task, TaskDependency
+
+        self.flush_dependencies()
+        # Explicit ids don't advance the sequences (PostgreSQL, Oracle)
+        reset_sql = connection.ops.sequence_reset_sql(no_style(), [Task, TaskDependency])
+        if reset_sql:
+            with connection.cursor() as cursor:
+                for sql in reset_sql:
+                    cursor.execute(sql)
+
+        # Concurrent optimistic edge writes must re-check against these
+        # edges. The shared index never saw them: it reloads after the commit
+        bump_dependency_version(mirrored=False)
+        bump_graph_version()
+        transaction.on_commit(partial(invalidate_tasks, self.linked_existing))
+        job = enqueue_recompute(self.affected)
+
+        return {
+            'tasks': self.task_count,
+            'dependencies': self.dependency_count,
+            'job_id': job.id if job else None,
+        }
+
+
+def _find_cycle(task_ids):
+    """
+    A cycle through task_ids, walking the dependency table upstream of them
+    in one recursive query; an empty list if there is none.
+    """
+    from .models import TaskDependency
+
+    table = TaskDependency._meta.db_table
+    task_ids = list(task_ids)
+    placeholders = ', '.join(['%s'] * len(task_ids))
+    sql = f"""
+        WITH RECURSIVE reached(id) AS (
+            SELECT task_id FROM {table} WHERE task_id IN ({placeholders})
+            UNION
+            SELECT edge.depends_on_id FROM {table} edge JOIN reached ON edge.task_id = reached.id
+        )
+        SELECT edge.task_id, edge.depends_on_id
+        FROM {table} edge JOIN reached ON edge.task_id = reached.id
+    """
+    upstream = defaultdict(list)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, task_ids)
+        for task_id, depends_on_id in cursor.fetchall():
+            upstream[task_id].append(depends_on_id)
+    return find_cycle(sorted(task_ids), lambda node: upstream.get(node, ()))
+
+
+def import_lines(lines, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Import an NDJSON stream (an iterable of str or bytes lines), all or
+    nothing.
+
+    Returns:
+        {"tasks": count, "dependencies": count, "job_id": id or None}: the
+        job re-deriving the statuses of existing tasks that gained
+        dependencies (see jobs.py)
+    Raises:
+        GraphImportError with the line number when there is one
+    """
+    importer = _GraphImporter(batch_size)
+    with transaction.atomic():
+        for line_number, line in enumerate(lines, 1):
+            importer.add_line(line_number, line)
+        return importer.finish()
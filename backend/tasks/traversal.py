@@ -0,0 +1,120 @@
+# backend/tasks/traversal.py
+"""
+Upstream (ancestors) and downstream (descendants) subgraphs of a task.
+
+One WITH RECURSIVE query walks the dependency table from the task (up to
+an optional depth, keeping the shortest distance of every task reached),
+filters the tasks by status and returns, in the same result set, the
+reached tasks and every edge between them (and the task itself). A view of
+any depth costs one round trip.
+"""
+from django.db import connections
+
+ANCESTORS = 'ancestors'
+DESCENDANTS = 'descendants'
+
+# (column followed from a reached task, column leading to the next one)
+DIRECTIONS = {
+    ANCESTORS: ('task_id', 'depends_on_id'),
+    DESCENDANTS: ('depends_on_id', 'task_id'),
+}
+
+
+def _subgraph_sql(task_id, direction, depth, statuses):
+    from .models import Task, TaskDependency
+
+    task_table = Task._meta.db_table
+    edge_table = TaskDependency._meta.db_table
+    source, target = DIRECTIONS[direction]
+
+    if depth is not None:
+        # (task, distance) pairs: a task shows up once per distance it can
+        # be reached at, which the limit keeps in check
+        walk = f"""
+        walk(id, depth) AS (
+            SELECT id, 0 FROM {task_table} WHERE id = %s
+            UNION
+            SELECT edge.{target}, walk.depth + 1
+            FROM {edge_table} edge JOIN walk ON edge.{source} = walk.id
+            WHERE walk.depth < %s
+        ),
+        reached(id, depth) AS (
+            SELECT id, MIN(depth) FROM walk GROUP BY id
+        )"""
+        params = [task_id, depth]
+    else:
+        # Without a limit every path would be followed to the end; visit
+        # each task once instead (which also ends on a cycle), without
+        # distances
+        walk = f"""
+        reached(id) AS (
+            SELECT id FROM {task_table} WHERE id = %s
+            UNION
+            SELECT edge.{target}
+            FROM {edge_table} edge JOIN reached ON edge.{source} = reached.id
+        )"""
+        params = [task_id]
+
+    root_depth = 'reached.depth' if depth is not None else 'NULL'
+    status_filter = ''
+    if statuses:
+        placeholders = ', '.join(['%s'] * len(statuses))
+        status_filter = f'AND (task.id = %s OR task.status IN ({placeholders}))'
+        params += [task_id] + list(statuses)
+
+    sql = f"""
+        WITH RECURSIVE {walk},
+        selected(id, depth, title, status) AS (
+            SELECT task.id, {root_depth}, task.title, task.status
+            FROM reached JOIN {task_table} task ON task.id = reached.id
+            WHERE 1 = 1 {status_filter}
+        )
+        SELECT 'task', id, depth, title, status, NULL, NULL FROM selected
+        UNION ALL
+        SELECT 'edge', edge.id, NULL, NULL, NULL, edge.task_id, edge.depends_on_id
+        FROM {edge_table} edge
+        JOIN selected dependent ON dependent.id = edge.task_id
+        JOIN selected dependency ON dependency.id = edge.depends_on_id
+    """
+    return sql, params
+
+
+def get_subgraph(task_id, direction, depth=None, statuses=(), using=None):
+    """
+    Args:
+        task_id: the task to start from
+        direction: ANCESTORS (what it depends on) or DESCENDANTS (what
+            depends on it)
+        depth: how many edges away to go; None for no limit
+        statuses: only return tasks with one of these statuses (the walk
+            still goes through the others)
+        using: database alias, defaults to where Task reads are routed
+
+    Returns:
+        None if the task doesn't exist, otherwise {"tasks": [...],
+        "edges": [...]}: tasks with their distance ("depth", nearest first;
+        None when no depth is given), edges between the returned tasks and
+        the task itself
+    """
+    from .models import Task
+
+    sql, params = _subgraph_sql(task_id, direction, depth, statuses)
+    connection = connections[using or Task.objects.db]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    found, tasks, edges = False, [], []
+    for kind, row_id, row_depth, title, task_status, dependent_id, dependency_id in rows:
+        if kind == 'edge':
+            edges.append({'id': row_id, 'task': dependent_id, 'depends_on': dependency_id})
+        elif row_id == task_id:
+            found = True
+        else:
+            tasks.append({'id': row_id, 'title': title, 'status': task_status, 'depth': row_depth})
+    if not found:
+        return None
+
+    tasks.sort(key=lambda task: (task['depth'] or 0, task['id']))
+    edges.sort(key=lambda edge: edge['id'])
+    return {'tasks': tasks, 'edges': edges}
@@ -0,0 +1,55 @@
+# backend/tasks/triggers.py
+"""
+SQLite triggers that keep derived tables in step with the task tables: the
+full-text search index (search.py) and the dashboard counters (stats.py).
+Other databases don't get them; those modules fall back to plain queries.
+
+Triggers are described as {name: (event, [statements])}, e.g.
+{'tasks_x_ai': ("AFTER INSERT ON tasks_task", ["UPDATE ...;"])}.
+
+Django rebuilds SQLite tables for some schema changes, which drops their
+triggers: run `python manage.py rebuild_task_search` and
+`python manage.py rebuild_task_stats` after such migrations.
+"""
+from django.db import transaction
+
+
+def install_triggers(db_connection, triggers, setup=()):
+    """
+    Create (or replace) triggers, after running the setup statements (e.g.
+    creating the table they fill). Returns False, doing nothing, unless the
+    database is SQLite.
+    """
+    if db_connection.vendor != 'sqlite':
+        return False
+    with transaction.atomic(using=db_connection.alias), db_connection.cursor() as cursor:
+        for sql in setup:
+            cursor.execute(sql)
+        for name, (event, statements) in triggers.items():
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+            cursor.execute(f"CREATE TRIGGER {name} {event} BEGIN {' '.join(statements)} END")
+    return True
+
+
+def uninstall_triggers(db_connection, triggers, teardown=()):
+    """Drop triggers, then run the teardown statements. SQLite only."""
+    if db_connection.vendor != 'sqlite':
+        return
+    with db_connection.cursor() as cursor:
+        for name in triggers:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        for sql in teardown:
+            cursor.execute(sql)
+
+
+def triggers_installed(db_connection, triggers):
+    """Whether every one of triggers exists on this connection's database"""
+    if db_connection.vendor != 'sqlite':
+        return False
+    placeholders = ', '.join(['%s'] * len(triggers))
+    with db_connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name IN ({placeholders})",
+            list(triggers)
+        )
+        return cursor.fetchone()[0] == len(triggers)
@@ -1,12 +1,27 @@
 # backend/tasks/urls.py
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import TaskViewSet, TaskDependencyViewSet
+from .database import atomic_writes_only
+from .views import (
+    TaskViewSet, TaskDependencyViewSet, ScheduleViewSet, JobViewSet,
+    GraphSnapshotView, GraphLayoutView, TaskStatsView, TaskEventStreamView, ChangesView,
+    GraphExportView, GraphImportView,
+)
 
 router = DefaultRouter()
 router.register(r'tasks', TaskViewSet)
 router.register(r'dependencies', TaskDependencyViewSet)
+router.register(r'schedule', ScheduleViewSet, basename='schedule')
+router.register(r'jobs', JobViewSet)
 
-urlpatterns = [
+# Reads run outside ATOMIC_REQUESTS (see database.py)
+urlpatterns = atomic_writes_only([
+    path('graph/', GraphSnapshotView.as_view(), name='graph'),
+    path('graph/layout/', GraphLayoutView.as_view(), name='graph-layout'),
+    path('stats/', TaskStatsView.as_view(), name='stats'),
+    path('events/', TaskEventStreamView.as_view(), name='events'),
+    path('changes/', ChangesView.as_view(), name='changes'),
+    path('export/', GraphExportView.as_view(), name='export'),
+    path('import/', GraphImportView.as_view(), name='import'),
     path('', include(router.urls)),
-]
\ No newline at end of file
+])
\ No newline at end of file
@@ -1,5 +1,22 @@
 # backend/tasks/utils.py
 from collections import defaultdict
+from .graph import find_path, graph_index
+from .closure import closure_enabled, is_ancestor, get_downstream_ids
+from .metrics import timed
+
+# Keep IN (...) lists and bulk write batches well below SQLite's bound
+# parameter limit
+QUERY_BATCH_SIZE = 500
+
+class DependencyGraphError(Exception):
+    """
+    A write would break the dependency graph (cycle, duplicate edge, ...).
+    `detail` is the error payload returned to the client as-is.
+    """
+    def __init__(self, detail):
+        super().__init__(detail.get('error'))
+        self.detail = detail
+
 
 def find_all_dependencies():
     """
@@ -9,14 +26,15 @@ def find_all_dependencies():
     from .models import TaskDependency
     
     dependencies = defaultdict(list)
-    all_deps = TaskDependency.objects.select_related('task', 'depends_on').all()
+    all_deps = TaskDependency.objects.values_list('task_id', 'depends_on_id')
     
-    for dep in all_deps:
-        dependencies[dep.task.id].append(dep.depends_on.id)
+    for task_id, depends_on_id in all_deps:
+        dependencies[task_id].append(depends_on_id)
     
     return dict(dependencies)
 
 
+@timed
 def check_circular_dependency(task_id, depends_on_id, dependencies=None):
     """
     Check if adding a dependency creates a circular dependency.
@@ -29,80 +47,117 @@ def check_circular_dependency(task_id, depends_on_id, dependencies=None):
         task_id: The ID of the task that wants a new dependency
         depends_on_id: The ID of the task it depends on
         dependencies: Optional pre-fetched dependency dictionary
+            (defaults to the shared graph index)
     
     Returns:
         (has_circle, path): tuple of (boolean, list)
     """
-    if dependencies is None:
-        dependencies = find_all_dependencies()
-    
     # A task can't depend on itself
     if task_id == depends_on_id:
         return True, [task_id, task_id]
     
-    # Use DFS to find if there's a path from depends_on_id to task_id
-    visited = set()
-    stack = [(depends_on_id, [depends_on_id])]  # (current_node, path)
-    
-    while stack:
-        current_node, path = stack.pop()
-        
-        # If we found the original task, it's a circle!
-        if current_node == task_id:
-            return True, path
-        
-        # Mark as visited
-        visited.add(current_node)
-        
-        # Get all tasks that current_node depends on
-        for neighbor in dependencies.get(current_node, []):
-            if neighbor not in visited:
-                new_path = path + [neighbor]
-                stack.append((neighbor, new_path))
+    # With the closure table a cycle is a single indexed lookup; the DFS
+    # below then only runs to report the path
+    if dependencies is None and closure_enabled():
+        if not is_ancestor(task_id, depends_on_id):
+            return False, []
+    
+    # Use DFS to find if there's a path from depends_on_id to task_id.
+    # Without pre-fetched dependencies we walk the in-memory graph index
+    # instead of reloading the whole TaskDependency table.
+    if dependencies is None:
+        path = graph_index.find_path(depends_on_id, task_id)
+    else:
+        path = find_path(dependencies, depends_on_id, task_id)
+    
+    if path:
+        return True, path
     
     # No circular dependency found
     return False, []
 
 
-def update_task_status_based_on_dependencies(task):
+def get_invalid_dependency_ids(task_id):
+    """
+    Ids of the tasks task_id can NOT be made to depend on: itself, its
+    current direct dependencies (duplicates) and every task that already
+    depends on it, directly or transitively (cycles).
+    
+    The descendants come from one traversal of the graph index (or one
+    query on the closure table when it is enabled).
+    """
+    if closure_enabled():
+        descendants = get_downstream_ids(task_id)
+    else:
+        descendants = graph_index.descendants(task_id)
+    return descendants | graph_index.direct_dependencies(task_id) | {task_id}
+
+
+# A task is ready to be worked on when it is in one of these statuses and
+# every dependency is completed; a blocked task isn't, even then (it was
+# blocked by hand). /api/schedule/ lists ready tasks, /api/stats/ counts
+# them (the same rule in SQL, see stats.py)
+READY_STATUSES = ('pending', 'in_progress')
+
+
+def is_ready(status, dependency_statuses):
+    """Whether a task is ready (see READY_STATUSES)"""
+    return status in READY_STATUSES and all(
+        dependency_status == 'completed' for dependency_status in dependency_statuses
+    )
+
+
+def derive_status(current_status, dependency_statuses):
     """
-    Update a task's status based on its dependencies.
+    Work out a task's status from the statuses of its dependencies.
     
     Rules:
     1. If ALL dependencies are 'completed' → set status to 'in_progress'
     2. If ANY dependency is 'blocked' → set status to 'blocked'
     3. If dependencies exist but not all completed → status remains 'pending'
     4. If NO dependencies → keep current status (can be manually set)
-    """
-    from .models import Task, TaskDependency
     
-    # Get all tasks this task depends on
-    dependencies = TaskDependency.objects.filter(task=task)
+    Returns:
+        The new status (may be the same as current_status)
+    """
+    from .models import Task
     
-    if not dependencies.exists():
+    if not dependency_statuses:
         # No dependencies, status stays as is unless manually changed
-        return
-    
-    # Get all dependency tasks
-    dependency_tasks = [dep.depends_on for dep in dependencies]
+        return current_status
     
     # Check if ANY dependency is blocked
-    if any(dep.status == Task.BLOCKED for dep in dependency_tasks):
-        if task.status != Task.BLOCKED:
-            task.status = Task.BLOCKED
-            task.save()
-        return
+    if any(status == Task.BLOCKED for status in dependency_statuses):
+        return Task.BLOCKED
     
     # Check if ALL dependencies are completed
-    all_completed = all(dep.status == Task.COMPLETED for dep in dependency_tasks)
-    
-    if all_completed:
+    if all(status == Task.COMPLETED for status in dependency_statuses):
         # Only set to in_progress if currently pending
-        if task.status == Task.PENDING:
-            task.status = Task.IN_PROGRESS
-            task.save()
-    else:
-        # Not all completed, set to pending if not already pending or blocked
-        if task.status not in [Task.PENDING, Task.BLOCKED]:
-            task.status = Task.PENDING
-            task.save()
\ No newline at end of file
+        if current_status == Task.PENDING:
+            return Task.IN_PROGRESS
+        return current_status
+    
+    # Not all completed, set to pending if not already pending or blocked
+    if current_status not in [Task.PENDING, Task.BLOCKED]:
+        return Task.PENDING
+    return current_status
+
+
+@timed
+def update_task_status_based_on_dependencies(task):
+    """
+    Update a single task's status based on its dependencies (see
+    derive_status for the rules). Doesn't cascade to the task's dependents,
+    use propagation.propagate_status_changes for that.
+    """
+    from .models import TaskDependency
+    
+    # Get the status of every task this task depends on
+    dependency_statuses = list(
+        TaskDependency.objects.filter(task=task).values_list('depends_on__status', flat=True)
+    )
+    
+    new_status = derive_status(task.status, dependency_statuses)
+    if new_status != task.status:
+        task.status = new_status
+        task.save()
\ No newline at end of file
@@ -1,17 +1,127 @@
 # backend/tasks/views.py - SIMPLIFIED VERSION
 from rest_framework import viewsets, status
+from rest_framework.views import APIView
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
+from rest_framework.renderers import BrowsableAPIRenderer
+from django.db import transaction
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from .models import Task, TaskDependency
-from .serializers import TaskSerializer, TaskDependencySerializer
-from .utils import check_circular_dependency, update_task_status_based_on_dependencies
+from django.views import View
+from .models import Task, TaskDependency, Job, JobItem
+from .serializers import (
+    TaskSerializer, TaskDependencySerializer, BulkImportSerializer, TaskRowSerializer, JobSerializer,
+)
+from .renderers import FastJSONRenderer
+from .pagination import TaskCursorPagination
+from .filters import TaskFilterBackend, parse_statuses
+from .search import search_tasks
+from .utils import check_circular_dependency, get_invalid_dependency_ids, DependencyGraphError
+from .propagation import propagate_status_changes
+from .jobs import enqueue_recompute, job_stats
+from .graph import graph_index
+from .versioning import etag_by_graph_version
+from .caching import cached_response, cache_stats
+from .events import latest_event_id, stream_events, changes_since, ChangeLogPruned, UnknownVersion
+from .scheduling import get_schedule
+from .layout import get_layout
+from .traversal import get_subgraph, ANCESTORS, DESCENDANTS
+from .stats import get_task_stats
+from .concurrency import optimistic_graph_write, write_stats, WriteConflict
+from .transfer import export_lines, import_lines, GraphImportError, CONTENT_TYPE as NDJSON_CONTENT_TYPE
 
-class TaskViewSet(viewsets.ModelViewSet):
-    queryset = Task.objects.all().order_by('-created_at')
+
+class OptimisticWriteMixin:
+    """
+    Takes the actions listed in `optimistic_actions` out of ATOMIC_REQUESTS:
+    they open their own transactions through optimistic_graph_write, which
+    must be the outermost ones so a retry sees the other writer's commit.
+    """
+    optimistic_actions = set()
+    
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        if actions and cls.optimistic_actions & set(actions.values()):
+            view = transaction.non_atomic_requests(view)
+        return view
+    
+    def write_conflict_response(self):
+        return Response(
+            {"error": "The dependency graph is changing too fast, please retry"},
+            status=status.HTTP_409_CONFLICT
+        )
+
+class FastListMixin:
+    """
+    Serves list() through `row_serializer_class` (a RowSerializer) when it
+    is set: values() rows instead of model instances and serializer fields.
+    Filtering and pagination work as usual.
+    """
+    row_serializer_class = None
+    
+    def list(self, request, *args, **kwargs):
+        if self.row_serializer_class is None:
+            return super().list(request, *args, **kwargs)
+        
+        row_serializer = self.row_serializer_class()
+        queryset = row_serializer.fetch(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(row_serializer.to_representation(page))
+        return Response(row_serializer.to_representation(queryset))
+
+class TaskViewSet(FastListMixin, OptimisticWriteMixin, viewsets.ModelViewSet):
+    queryset = Task.objects.all().order_by('-created_at', '-id')
     serializer_class = TaskSerializer
     permission_classes = [AllowAny]
+    pagination_class = TaskCursorPagination
+    filter_backends = [TaskFilterBackend]
+    row_serializer_class = TaskRowSerializer
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+    optimistic_actions = {'add_dependency', 'bulk_import'}
+    
+    def get_queryset(self):
+        return super().get_queryset().with_dependency_counts()
+    
+    @etag_by_graph_version
+    @cached_response('tasks', scope='graph')
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+    
+    @etag_by_graph_version
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+    
+    def update(self, request, *args, **kwargs):
+        """
+        Update a task. A status change queues the recomputation of the tasks
+        downstream; job_id is the job to poll (null when nothing was queued).
+        """
+        partial = kwargs.pop('partial', False)
+        instance = self.get_object()
+        serializer = self.get_serializer(instance, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
+        
+        data = dict(serializer.data)
+        data['job_id'] = serializer.job.id if serializer.job else None
+        return Response(data)
+    
+    def destroy(self, request, *args, **kwargs):
+        """Delete a task and queue the recomputation of its former dependents"""
+        task = self.get_object()
+        with graph_index.lock:
+            graph_index.ensure_fresh()
+            dependent_ids = set(graph_index.reverse.get(task.id, ()))
+        
+        self.perform_destroy(task)
+        
+        job = enqueue_recompute(dependent_ids)
+        if job is None:
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        return Response({"job_id": job.id}, status=status.HTTP_202_ACCEPTED)
     
     @action(detail=True, methods=['post'])
     def add_dependency(self, request, pk=None):
@@ -35,63 +145,471 @@ class TaskViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Check for circular dependency
-        has_circle, path = check_circular_dependency(task.id, depends_on_task.id)
-        if has_circle:
-            return Response({
-                "error": "Circular dependency detected",
-                "path": path
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Check if dependency already exists
-        if TaskDependency.objects.filter(task=task, depends_on=depends_on_task).exists():
-            return Response({
-                "error": "Dependency already exists"
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Create the dependency
-        dependency = TaskDependency.objects.create(
-            task=task,
-            depends_on=depends_on_task
-        )
+        def write():
+            # Check for circular dependency
+            has_circle, path = check_circular_dependency(task.id, depends_on_task.id)
+            if has_circle:
+                raise DependencyGraphError({
+                    "error": "Circular dependency detected",
+                    "path": path
+                })
+            
+            # Check if dependency already exists
+            if TaskDependency.objects.filter(task=task, depends_on=depends_on_task).exists():
+                raise DependencyGraphError({
+                    "error": "Dependency already exists"
+                })
+            
+            # Create the dependency
+            dependency = TaskDependency.objects.create(
+                task=task,
+                depends_on=depends_on_task
+            )
+            
+            # Update the status of the task and everything downstream of it
+            return dependency, propagate_status_changes([task.id])
         
-        # Update task status
-        update_task_status_based_on_dependencies(task)
+        # Check + insert are retried together if another request adds
+        # dependencies concurrently (see concurrency.py)
+        try:
+            dependency, updated_task_ids = optimistic_graph_write(write)
+        except DependencyGraphError as exc:
+            return Response(exc.detail, status=status.HTTP_400_BAD_REQUEST)
+        except WriteConflict:
+            return self.write_conflict_response()
         
         # Return the created dependency
         serializer = TaskDependencySerializer(dependency)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        data = dict(serializer.data)
+        data['updated_task_ids'] = sorted(updated_task_ids)
+        return Response(data, status=status.HTTP_201_CREATED)
+    
+    @action(detail=False, methods=['post'])
+    def bulk_import(self, request):
+        """
+        Create many tasks and dependencies at once.
+        
+        Body: {"tasks": [{"temp_id": "a", "title": ...}, ...],
+               "dependencies": [{"task": "a", "depends_on": 12}, ...]}
+        where a reference is a temp_id from "tasks" or an existing task id.
+        """
+        def write():
+            serializer = BulkImportSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            return serializer.save()
+        
+        try:
+            result = optimistic_graph_write(write)
+        except DependencyGraphError as exc:
+            return Response(exc.detail, status=status.HTTP_400_BAD_REQUEST)
+        except WriteConflict:
+            return self.write_conflict_response()
+        return Response(result, status=status.HTTP_201_CREATED)
     
     @action(detail=True, methods=['get'])
+    @etag_by_graph_version
+    def dependency_candidates(self, request, pk=None):
+        """
+        Tasks that can be added as a dependency of this task without creating
+        a cycle or a duplicate. Paginated like the task list; ?search= filters
+        on title and description.
+        """
+        task = self.get_object()
+        candidates = self.get_queryset().exclude(id__in=get_invalid_dependency_ids(task.id))
+        
+        search = request.query_params.get('search', '').strip()
+        if search:
+            candidates = search_tasks(candidates, search)
+        
+        page = self.paginate_queryset(candidates)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+    
+    @action(detail=True, methods=['get'])
+    @etag_by_graph_version
+    @cached_response('dependencies', scope='task')
     def dependencies(self, request, pk=None):
         """Get all tasks this task depends on"""
         task = self.get_object()
-        dependencies = task.dependencies.all()
+        dependencies = task.dependencies.select_related('task', 'depends_on')
         serializer = TaskDependencySerializer(dependencies, many=True)
         return Response(serializer.data)
     
     @action(detail=True, methods=['get'])
+    @etag_by_graph_version
+    @cached_response('dependents', scope='task')
     def dependents(self, request, pk=None):
         """Get all tasks that depend on this task"""
         task = self.get_object()
-        dependents = task.dependents.all()
+        dependents = task.dependents.select_related('task', 'depends_on')
         serializer = TaskDependencySerializer(dependents, many=True)
         return Response(serializer.data)
+    
+    @action(detail=True, methods=['get'])
+    @etag_by_graph_version
+    @cached_response('ancestors', scope='graph')
+    def ancestors(self, request, pk=None):
+        """
+        Every task this task depends on, directly or transitively, and the
+        edges between them. ?depth= limits how far to go (and adds each
+        task's distance), ?status= (comma separated) which tasks are returned.
+        """
+        return self._subgraph(request, pk, ANCESTORS)
+    
+    @action(detail=True, methods=['get'])
+    @etag_by_graph_version
+    @cached_response('descendants', scope='graph')
+    def descendants(self, request, pk=None):
+        """Every task that depends on this task, see ancestors()"""
+        return self._subgraph(request, pk, DESCENDANTS)
+    
+    def _subgraph(self, request, pk, direction):
+        depth = request.query_params.get('depth')
+        if depth:
+            try:
+                depth = int(depth)
+            except ValueError:
+                depth = 0
+            if depth < 1:
+                return Response({"error": "depth must be a positive integer"}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            depth = None
+        statuses = parse_statuses(request.query_params.get('status', ''))
+        
+        try:
+            task_id = int(pk)
+        except ValueError:
+            raise Http404
+        # A single recursive query, which also tells whether the task exists
+        subgraph = get_subgraph(task_id, direction, depth, statuses)
+        if subgraph is None:
+            raise Http404("No Task matches the given query.")
+        return Response({'task': task_id, 'depth': depth, **subgraph})
+    
+    @action(detail=False, methods=['get'])
+    def cache_stats(self, request):
+        """Hit/miss counters of the response cache in this process"""
+        return Response(cache_stats.snapshot())
 
-class TaskDependencyViewSet(viewsets.ModelViewSet):
-    queryset = TaskDependency.objects.all()
+class TaskDependencyViewSet(OptimisticWriteMixin, viewsets.ModelViewSet):
+    queryset = TaskDependency.objects.select_related('task', 'depends_on')
     serializer_class = TaskDependencySerializer
     permission_classes = [AllowAny]
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+    optimistic_actions = {'create'}
+    
+    @etag_by_graph_version
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+    
+    @etag_by_graph_version
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+    
+    def create(self, request, *args, **kwargs):
+        """Create a dependency and report the tasks whose status changed"""
+        def write():
+            serializer = self.get_serializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            self.perform_create(serializer)
+            return serializer
+        
+        try:
+            serializer = optimistic_graph_write(write)
+        except WriteConflict:
+            return self.write_conflict_response()
+        
+        data = dict(serializer.data)
+        data['updated_task_ids'] = sorted(serializer.updated_task_ids)
+        headers = self.get_success_headers(serializer.data)
+        return Response(data, status=status.HTTP_201_CREATED, headers=headers)
     
     def destroy(self, request, *args, **kwargs):
-        """Delete a dependency and update task status"""
+        """Delete a dependency and queue the status update of its task"""
         dependency = self.get_object()
-        task = dependency.task
+        task_id = dependency.task_id
         
         # Delete dependency
         self.perform_destroy(dependency)
         
-        # Update task status
-        update_task_status_based_on_dependencies(task)
+        # The task and everything downstream of it are re-derived by the
+        # job workers
+        job = enqueue_recompute([task_id])
+        return Response({"job_id": job.id}, status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=False, methods=['get'])
+    def write_stats(self, request):
+        """Counters of the optimistic dependency writes in this process"""
+        return Response(write_stats.snapshot())
+
+
+
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Background jobs (see jobs.py): writes that queue work answer with a
+    job_id, GET /api/jobs/<id>/ tells whether it is queued, running, done
+    or failed.
+    """
+    queryset = Job.objects.all()
+    serializer_class = JobSerializer
+    permission_classes = [AllowAny]
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+    
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        """Queue depth and the job counters of this process"""
+        data = job_stats.snapshot()
+        data['queued_items'] = JobItem.objects.filter(state=Job.QUEUED).count()
+        data['running_items'] = JobItem.objects.filter(state=Job.RUNNING).count()
+        return Response(data)
+
+class GraphSnapshotView(APIView):
+    """
+    The whole dependency graph in one compact, columnar payload.
+    
+    Tasks and edges are returned as parallel arrays built straight from
+    values_list() rows (no model instances, no joins); statuses are indexes
+    into "status_values". Tasks come newest first, like /api/tasks/.
+    """
+    permission_classes = [AllowAny]
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+    
+    chunk_size = 5000
+    
+    @etag_by_graph_version
+    def get(self, request):
+        task_rows, edge_rows = self.querysets()
+        return Response(self.build(
+            task_rows.iterator(chunk_size=self.chunk_size),
+            edge_rows.iterator(chunk_size=self.chunk_size)
+        ))
+    
+    @staticmethod
+    def querysets():
+        task_rows = Task.objects.order_by('-created_at', '-id').values_list('id', 'status', 'title')
+        edge_rows = TaskDependency.objects.order_by('id').values_list('id', 'task_id', 'depends_on_id')
+        return task_rows, edge_rows
+    
+    @staticmethod
+    def build(task_rows, edge_rows):
+        """The payload from (id, status, title) and (id, task_id, depends_on_id) rows"""
+        status_values = [value for value, _label in Task.STATUS_CHOICES]
+        status_codes = {value: code for code, value in enumerate(status_values)}
+        
+        task_ids, statuses, titles = [], [], []
+        for task_id, task_status, title in task_rows:
+            task_ids.append(task_id)
+            statuses.append(status_codes[task_status])
+            titles.append(title)
+        
+        edge_ids, edge_tasks, edge_depends_on = [], [], []
+        for edge_id, task_id, depends_on_id in edge_rows:
+            edge_ids.append(edge_id)
+            edge_tasks.append(task_id)
+            edge_depends_on.append(depends_on_id)
         
-        return Response(status=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
+        return {
+            'status_values': status_values,
+            'tasks': {'id': task_ids, 'status': statuses, 'title': titles},
+            'edges': {'id': edge_ids, 'task': edge_tasks, 'depends_on': edge_depends_on},
+        }
+
+
+class GraphLayoutView(APIView):
+    """
+    Layered layout of the graph (see layout.py): node coordinates and edge
+    routes as parallel arrays, matched to /api/graph/ by id. Cached per
+    graph version; after an edit only the touched component is laid out
+    again.
+    """
+    permission_classes = [AllowAny]
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+    
+    @etag_by_graph_version
+    def get(self, request):
+        version, layout = get_layout()
+        return Response({'version': version, **layout})
+
+
+class TaskStatsView(APIView):
+    """
+    Task counts for dashboards (see stats.py): tasks per status, ready
+    tasks and blocked chains, read from the counter table instead of
+    counting the tasks. ?chain_sizes=true adds the size of every blocked
+    chain, which walks the blocked tasks.
+    """
+    permission_classes = [AllowAny]
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+    
+    @etag_by_graph_version
+    def get(self, request):
+        chain_sizes = request.query_params.get('chain_sizes', 'false').lower() == 'true'
+        return Response(get_task_stats(chain_sizes=chain_sizes))
+
+
+class TaskEventStreamView(View):
+    """
+    Server-Sent Events stream of task and dependency changes.
+    
+    Resumes after the Last-Event-ID header (sent by EventSource when it
+    reconnects) or ?last_event_id=; without either, only new events are sent.
+    """
+    def get(self, request):
+        try:
+            last_event_id = self.requested_event_id(request)
+        except ValueError:
+            return JsonResponse({"error": "Invalid last event id"}, status=400)
+        if last_event_id is None:
+            last_event_id = latest_event_id()
+        return self.stream_response(stream_events(last_event_id))
+    
+    @staticmethod
+    def requested_event_id(request):
+        """The id to resume after, None for "only new events" (ValueError if invalid)"""
+        last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+        return None if last_event_id is None else int(last_event_id)
+    
+    @staticmethod
+    def stream_response(frames):
+        response = StreamingHttpResponse(frames, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # don't let nginx buffer the stream
+        return response
+
+
+class GraphExportView(View):
+    """
+    The whole graph as NDJSON (see transfer.py), streamed straight from the
+    database so memory stays flat however big the board is.
+    """
+    def get(self, request):
+        response = StreamingHttpResponse(export_lines(), content_type=NDJSON_CONTENT_TYPE)
+        response['Content-Disposition'] = 'attachment; filename="tasks.ndjson"'
+        return response
+
+
+class GraphImportView(APIView):
+    """
+    POST an NDJSON export (see transfer.py) to load it, keeping ids.
+    
+    The body is read line by line and written in batches; nothing is kept
+    if any line is invalid or the result would contain a cycle.
+    """
+    permission_classes = [AllowAny]
+    
+    def post(self, request):
+        # Read the raw stream ourselves instead of letting a parser load it
+        if request.stream is None:
+            return Response({"error": "Empty body"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            result = import_lines(request.stream)
+        except GraphImportError as exc:
+            return Response(exc.detail, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result, status=status.HTTP_201_CREATED)
+
+
+class ChangesView(APIView):
+    """
+    Delta sync: GET /api/changes/?since=<version>
+    
+    Returns the current state of every task and dependency changed after
+    `version`, plus tombstones for the deleted ones, and the version to ask
+    from next time. Without `since` only the current version is returned
+    (read it before a full listing). 410 means the change log no longer
+    goes back that far, or never reached that version (another or a reset
+    database), and the client has to reload everything.
+    """
+    permission_classes = [AllowAny]
+    default_limit = 1000
+    max_limit = 10000
+    
+    def get(self, request):
+        since = request.query_params.get('since')
+        try:
+            since = int(since) if since is not None else None
+            limit = min(int(request.query_params.get('limit', self.default_limit)), self.max_limit)
+        except ValueError:
+            return Response({"error": "since and limit must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if since is None:
+            return Response({"version": latest_event_id()})
+        
+        try:
+            changes = changes_since(since, max(limit, 1))
+        except ChangeLogPruned:
+            return Response(
+                {"error": "Change log has been pruned past this version, reload everything"},
+                status=status.HTTP_410_GONE
+            )
+        except UnknownVersion:
+            return Response(
+                {"error": "Version is newer than the change log, reload everything"},
+                status=status.HTTP_410_GONE
+            )
+        
+        tasks = Task.objects.filter(id__in=changes['task_ids']).with_dependency_counts().order_by('id')
+        dependencies = (
+            TaskDependency.objects.filter(id__in=changes['dependency_ids'])
+            .select_related('task', 'depends_on').order_by('id')
+        )
+        task_data = TaskSerializer(tasks, many=True).data
+        dependency_data = TaskDependencySerializer(dependencies, many=True).data
+        
+        # Anything touched that no longer exists was deleted (including
+        # dependencies removed by a task's CASCADE delete)
+        return Response({
+            'version': changes['version'],
+            'has_more': changes['has_more'],
+            'tasks': task_data,
+            'dependencies': dependency_data,
+            'deleted': {
+                'tasks': sorted(changes['task_ids'] - {task['id'] for task in task_data}),
+                'dependencies': sorted(changes['dependency_ids'] - {dep['id'] for dep in dependency_data}),
+            },
+        })
+
+
+class ScheduleViewSet(viewsets.ViewSet):
+    """
+    Scheduling analytics, cached per graph version:
+    - order: every task after all the tasks it depends on
+    - levels: tasks grouped by depth (0 = no dependencies)
+    - ready: pending or in progress tasks whose dependencies are all
+      completed (utils.READY_STATUSES, also counted by /api/stats/)
+    - critical_path: longest chain, weighted by estimated_duration
+      (?weighted=false counts every task as 1)
+    """
+    permission_classes = [AllowAny]
+    
+    def _schedule(self, request):
+        weighted = request.query_params.get('weighted', 'true').lower() != 'false'
+        return get_schedule(weighted)
+    
+    @etag_by_graph_version
+    def list(self, request):
+        version, schedule = self._schedule(request)
+        return Response({'version': version, **schedule})
+    
+    @action(detail=False, methods=['get'])
+    @etag_by_graph_version
+    def order(self, request):
+        version, schedule = self._schedule(request)
+        return Response({'version': version, 'order': schedule['order']})
+    
+    @action(detail=False, methods=['get'])
+    @etag_by_graph_version
+    def levels(self, request):
+        version, schedule = self._schedule(request)
+        return Response({'version': version, 'levels': schedule['levels']})
+    
+    @action(detail=False, methods=['get'])
+    @etag_by_graph_version
+    def ready(self, request):
+        version, schedule = self._schedule(request)
+        return Response({'version': version, 'ready': schedule['ready']})
+    
+    @action(detail=False, methods=['get'])
+    @etag_by_graph_version
+    def critical_path(self, request):
+        version, schedule = self._schedule(request)
+        return Response({'version': version, **schedule['critical_path']})
\ No newline at end of file
@@ -43,7 +43,7 @@ def test_task_crud():
     print("\n2. Getting all tasks...")
     response = requests.get(f"{BASE_URL}/tasks/")
     if response.status_code == 200:
-        tasks = response.json()
+        tasks = response.json()['results']  # Task list is cursor-paginated
         print_success(f"Retrieved {len(tasks)} tasks")
         for task in tasks:
             print(f"   - ID {task['id']}: {task['title']} ({task['status']})")
@@ -199,7 +199,7 @@ def test_edge_cases():
         print_error("Cannot get tasks for edge case testing")
         return
     
-    tasks = response.json()
+    tasks = response.json()['results']
     if len(tasks) < 2:
         print_error("Need at least 2 tasks for edge case testing")
         return
@@ -1,26 +1,73 @@
-import React, { useState, useEffect, useRef } from 'react';
-import { taskAPI, dependencyAPI } from '../services/api';
+import React, { useState, useEffect, useMemo } from 'react';
+import { graphAPI, subscribeToChanges } from '../services/api';
+
+const NODE_RADIUS = 25;
+
+// Shortens a flat [x0, y0, x1, y1, ...] route at both ends so it starts and
+// ends on the node circles instead of their centres
+const trimRoute = (points, radius) => {
+    const trimmed = [...points];
+    const shorten = (at, towards) => {
+        const dx = trimmed[towards] - trimmed[at];
+        const dy = trimmed[towards + 1] - trimmed[at + 1];
+        const distance = Math.sqrt(dx * dx + dy * dy) || 1;
+        trimmed[at] += (dx / distance) * radius;
+        trimmed[at + 1] += (dy / distance) * radius;
+    };
+    shorten(0, 2);
+    shorten(trimmed.length - 2, trimmed.length - 4);
+    return trimmed;
+};
 
 const GraphVisualization = () => {
     const [tasks, setTasks] = useState([]);
     const [dependencies, setDependencies] = useState([]);
+    const [canvas, setCanvas] = useState({ width: 800, height: 400 });
     const [loading, setLoading] = useState(true);
     const [selectedNode, setSelectedNode] = useState(null);
     const [zoom, setZoom] = useState(1);
-    const containerRef = useRef(null);
 
     useEffect(() => {
         fetchData();
+
+        // Refetch when the server reports a change; a burst of events
+        // (e.g. a status cascade) only triggers one request
+        let refetchTimer = null;
+        const unsubscribe = subscribeToChanges(() => {
+            clearTimeout(refetchTimer);
+            refetchTimer = setTimeout(fetchData, 300);
+        });
+        return () => {
+            clearTimeout(refetchTimer);
+            unsubscribe();
+        };
     }, []);
 
     const fetchData = async () => {
         try {
-            const [tasksRes, depsRes] = await Promise.all([
-                taskAPI.getAll(),
-                dependencyAPI.getAll()
-            ]);
-            setTasks(tasksRes.data);
-            setDependencies(depsRes.data);
+            const [snapshot, layoutResponse] = await Promise.all([graphAPI.getSnapshot(), graphAPI.getLayout()]);
+            const { status_values: statusValues, tasks: taskColumns, edges } = snapshot.data;
+            const layout = layoutResponse.data;
+
+            // Positions and routes by id; a task or edge missing from the
+            // layout (changed in between the two requests) isn't drawn
+            const positions = new Map(layout.nodes.id.map((id, i) => [id, { x: layout.nodes.x[i], y: layout.nodes.y[i] }]));
+            const routes = new Map(layout.edges.id.map((id, i) => [id, layout.edges.points[i]]));
+
+            // Turn the parallel arrays back into task / dependency objects
+            setTasks(taskColumns.id.map((id, i) => ({
+                id,
+                title: taskColumns.title[i],
+                status: statusValues[taskColumns.status[i]],
+                position: positions.get(id),
+            })));
+            setDependencies(edges.id.map((id, i) => ({
+                id,
+                task: edges.task[i],
+                depends_on: edges.depends_on[i],
+                points: routes.get(id),
+            })));
+            setCanvas({ width: Math.max(800, layout.width), height: Math.max(400, layout.height) });
         } catch (error) {
             console.error('Failed to fetch graph data:', error);
         } finally {
@@ -39,43 +86,13 @@ const GraphVisualization = () => {
         return colors[status] || '#9CA3AF';
     };
 
-    // Calculates position for each node in the graph
-    const getNodePosition = (index, total) => {
-        const containerWidth = containerRef.current?.clientWidth || 800;
-        const nodesPerRow = Math.min(5, Math.max(3, Math.floor(containerWidth / 180)));
-        const row = Math.floor(index / nodesPerRow);
-        const col = index % nodesPerRow;
-
-        const x = 100 + (col * 180);
-        const y = 100 + (row * 140);
-
-        return { x, y };
-    };
+    const tasksById = useMemo(() => new Map(tasks.map(task => [task.id, task])), [tasks]);
 
     // Zoom controls
     const handleZoomIn = () => setZoom(prev => Math.min(prev + 0.1, 2));
     const handleZoomOut = () => setZoom(prev => Math.max(prev - 0.1, 0.5));
     const handleResetZoom = () => setZoom(1);
 
-    // Calculate needed SVG size based on nodes
-    const calculateSVGDimensions = () => {
-        if (tasks.length === 0) return { width: 800, height: 400 };
-
-        let maxX = 0;
-        let maxY = 0;
-
-        tasks.forEach((task, index) => {
-            const pos = getNodePosition(index, tasks.length);
-            maxX = Math.max(maxX, pos.x + 100);
-            maxY = Math.max(maxY, pos.y + 100);
-        });
-
-        return {
-            width: Math.max(800, maxX),
-            height: Math.max(400, maxY)
-        };
-    };
-
     if (loading) {
         return (
             <div className="flex items-center justify-center h-96">
@@ -84,8 +101,6 @@ const GraphVisualization = () => {
         );
     }
 
-    const svgDimensions = calculateSVGDimensions();
-
     return (
         <div className="graph-container">
             {/* Header with controls */}
@@ -135,7 +150,7 @@ const GraphVisualization = () => {
             </div>
 
             {/* Main Graph Area */}
-            <div ref={containerRef} className="border rounded-lg bg-white h-[500px] overflow-auto relative">
+            <div className="border rounded-lg bg-white h-[500px] overflow-auto relative">
                 {tasks.length === 0 ? (
                     <div className="flex items-center justify-center h-full">
                         <div className="text-center">
@@ -145,8 +160,8 @@ const GraphVisualization = () => {
                     </div>
                 ) : (
                     <svg
-                        width={svgDimensions.width}
-                        height={svgDimensions.height}
+                        width={canvas.width}
+                        height={canvas.height}
                         style={{
                             minWidth: '100%',
                             minHeight: '100%',
@@ -161,36 +176,17 @@ const GraphVisualization = () => {
                             </marker>
                         </defs>
 
-                        {/* Draw all dependency lines */}
+                        {/* Draw all dependency lines, along the routes from the layout */}
                         {dependencies.map((dep) => {
-                            const fromIndex = tasks.findIndex(t => t.id === dep.task);
-                            const toIndex = tasks.findIndex(t => t.id === dep.depends_on);
-
-                            if (fromIndex === -1 || toIndex === -1) return null;
-
-                            const fromPos = getNodePosition(fromIndex, tasks.length);
-                            const toPos = getNodePosition(toIndex, tasks.length);
-
-                            // Calculate line from edge of circle to edge of circle
-                            const dx = toPos.x - fromPos.x;
-                            const dy = toPos.y - fromPos.y;
-                            const distance = Math.sqrt(dx * dx + dy * dy);
-                            const radius = 25;
-
-                            const startX = fromPos.x + (dx / distance) * radius;
-                            const startY = fromPos.y + (dy / distance) * radius;
-                            const endX = toPos.x - (dx / distance) * radius;
-                            const endY = toPos.y - (dy / distance) * radius;
+                            if (!dep.points || dep.points.length < 4) return null;
 
                             const isSelected = selectedNode === dep.task || selectedNode === dep.depends_on;
 
                             return (
-                                <line
+                                <polyline
                                     key={`edge-${dep.id}`}
-                                    x1={startX}
-                                    y1={startY}
-                                    x2={endX}
-                                    y2={endY}
+                                    points={trimRoute(dep.points, NODE_RADIUS).join(' ')}
+                                    fill="none"
                                     stroke={isSelected ? "#F59E0B" : "#6B7280"}
                                     strokeWidth={isSelected ? 3 : 2}
                                     strokeDasharray={isSelected ? "5,5" : "none"}
@@ -200,10 +196,11 @@ const GraphVisualization = () => {
                         })}
 
                         {/* Draw all task nodes */}
-                        {tasks.map((task, index) => {
-                            const position = getNodePosition(index, tasks.length);
+                        {tasks.map((task) => {
+                            const position = task.position;
+                            if (!position) return null;
                             const isSelected = selectedNode === task.id;
-                            const nodeSize = isSelected ? 30 : 25;
+                            const nodeSize = isSelected ? NODE_RADIUS + 5 : NODE_RADIUS;
 
                             return (
                                 <g key={`node-${task.id}`} onClick={() => setSelectedNode(task.id)} className="cursor-pointer">
@@ -240,7 +237,7 @@ const GraphVisualization = () => {
 
                 {/* Details panel for selected node */}
                 {selectedNode && (() => {
-                    const task = tasks.find(t => t.id === selectedNode);
+                    const task = tasksById.get(selectedNode);
                     if (!task) return null;
 
                     const taskDeps = dependencies.filter(d => d.task === task.id);
@@ -283,7 +280,7 @@ const GraphVisualization = () => {
                                         <div className="text-xs text-gray-500 mb-1">Depends On</div>
                                         <div className="space-y-1 max-h-32 overflow-y-auto pr-2">
                                             {taskDeps.map(dep => {
-                                                const depTask = tasks.find(t => t.id === dep.depends_on);
+                                                const depTask = tasksById.get(dep.depends_on);
                                                 return <div key={dep.id} className="text-xs p-1 bg-gray-50 rounded">• {depTask?.title} (ID: {dep.depends_on})</div>;
                                             })}
                                         </div>
@@ -295,7 +292,7 @@ const GraphVisualization = () => {
                                         <div className="text-xs text-gray-500 mb-1">Dependent Tasks</div>
                                         <div className="space-y-1 max-h-32 overflow-y-auto pr-2">
                                             {taskDependents.map(dep => {
-                                                const depTask = tasks.find(t => t.id === dep.task);
+                                                const depTask = tasksById.get(dep.task);
                                                 return <div key={dep.id} className="text-xs p-1 bg-gray-50 rounded">• {depTask?.title} (ID: {dep.task})</div>;
                                             })}
                                         </div>
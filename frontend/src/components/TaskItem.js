@@ -1,6 +1,7 @@
-import React, { useState } from 'react';
+import React, { useState, useEffect } from 'react';
 import { FaTrash, FaLink, FaExclamationTriangle } from 'react-icons/fa';
 import StatusBadge from './StatusBadge';
+import { taskAPI } from '../services/api';
 
 const TaskItem = ({
     task,
@@ -13,6 +14,20 @@ const TaskItem = ({
     const [selectedDependency, setSelectedDependency] = useState('');
     const [loading, setLoading] = useState(false);
     const [error, setError] = useState(null); // Changed to object to store error details
+    const [availableTasks, setAvailableTasks] = useState([]);
+    const [candidateSearch, setCandidateSearch] = useState('');
+
+    // Ask the server which tasks can be added without creating a cycle
+    useEffect(() => {
+        if (!showDependencyForm) return;
+        let cancelled = false;
+        taskAPI.getDependencyCandidates(task.id, candidateSearch)
+            .then(response => {
+                if (!cancelled) setAvailableTasks(response.data.results);
+            })
+            .catch(err => console.error('Failed to load dependency candidates:', err));
+        return () => { cancelled = true; };
+    }, [showDependencyForm, candidateSearch, task.id]);
 
     const handleStatusChange = async (newStatus) => {
         try {
@@ -51,11 +66,6 @@ const TaskItem = ({
         }
     };
 
-    // Filter out tasks that can't be dependencies (circular or self)
-    const availableTasks = allTasks.filter(otherTask =>
-        otherTask.id !== task.id
-    );
-
     // Function to render error message properly
     const renderErrorMessage = () => {
         if (!error) return null;
@@ -160,6 +170,14 @@ const TaskItem = ({
                     {/* Render error message */}
                     {renderErrorMessage()}
 
+                    <input
+                        type="text"
+                        value={candidateSearch}
+                        onChange={(e) => setCandidateSearch(e.target.value)}
+                        placeholder="Search tasks..."
+                        className="w-full mb-2 px-3 py-2 border border-gray-300 rounded-md text-sm"
+                    />
+
                     <select
                         value={selectedDependency}
                         onChange={(e) => {
@@ -1,10 +1,12 @@
 import React, { useState, useEffect } from 'react';
 import TaskItem from './TaskItem';
 import TaskForm from './TaskForm';
-import { taskAPI } from '../services/api';
+import { taskAPI, subscribeToChanges } from '../services/api';
 
 const TaskList = () => {
     const [tasks, setTasks] = useState([]);
+    const [nextPage, setNextPage] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState('');
     const [showCreateForm, setShowCreateForm] = useState(false);
@@ -12,8 +14,9 @@ const TaskList = () => {
     const fetchTasks = async () => {
         try {
             setLoading(true);
-            const response = await taskAPI.getAll();
-            setTasks(response.data);
+            const response = await taskAPI.getPage();
+            setTasks(response.data.results);
+            setNextPage(response.data.next);
             setError('');
         } catch (err) {
             setError('Failed to fetch tasks');
@@ -27,6 +30,32 @@ const TaskList = () => {
         fetchTasks();
     }, []);
 
+    // Statuses of dependent tasks are recomputed in the background after an
+    // update, apply them as the server reports them
+    useEffect(() => {
+        const unsubscribe = subscribeToChanges((kind, change) => {
+            if (kind !== 'task_updated') return;
+            setTasks(current => current.map(task =>
+                task.id === change.id ? { ...task, ...change.data } : task
+            ));
+        });
+        return unsubscribe;
+    }, []);
+
+    const fetchMoreTasks = async () => {
+        try {
+            setLoadingMore(true);
+            const response = await taskAPI.getPage(nextPage);
+            setTasks([...tasks, ...response.data.results]);
+            setNextPage(response.data.next);
+        } catch (err) {
+            setError('Failed to fetch tasks');
+            console.error(err);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     const handleTaskCreated = (newTask) => {
         setTasks([newTask, ...tasks]);
         setShowCreateForm(false);
@@ -120,6 +149,18 @@ const TaskList = () => {
                     ))}
                 </div>
             )}
+
+            {nextPage && (
+                <div className="flex justify-center mt-6">
+                    <button
+                        onClick={fetchMoreTasks}
+                        disabled={loadingMore}
+                        className="px-4 py-2 bg-gray-100 text-gray-700 rounded-md hover:bg-gray-200 disabled:opacity-50"
+                    >
+                        {loadingMore ? 'Loading...' : 'Load more'}
+                    </button>
+                </div>
+            )}
         </div>
     );
 };
@@ -11,7 +11,22 @@ const api = axios.create({
 
 // Task API calls
 export const taskAPI = {
-    getAll: () => api.get('/tasks/'),
+    // One page of tasks (newest first); pass the `next` link of the previous
+    // response to continue
+    getPage: (nextUrl = null, pageSize = 50) => (
+        nextUrl ? api.get(nextUrl) : api.get('/tasks/', { params: { page_size: pageSize } })
+    ),
+    // Follows the cursor links until every task is loaded
+    getAll: async () => {
+        const tasks = [];
+        let response = await api.get('/tasks/', { params: { page_size: 500 } });
+        tasks.push(...response.data.results);
+        while (response.data.next) {
+            response = await api.get(response.data.next);
+            tasks.push(...response.data.results);
+        }
+        return { ...response, data: tasks };
+    },
     getById: (id) => api.get(`/tasks/${id}/`),
     create: (taskData) => api.post('/tasks/', taskData),
     update: (id, taskData) => api.patch(`/tasks/${id}/`, taskData),
@@ -33,18 +48,10 @@ export const taskAPI = {
     getDependencies: (taskId) => api.get(`/tasks/${taskId}/dependencies/`),
     getDependents: (taskId) => api.get(`/tasks/${taskId}/dependents/`),
 
-    // Check circular dependency (for pre-checking)
-    checkCircular: async (taskId, dependsOnId) => {
-        try {
-            const response = await api.post(`/tasks/${taskId}/add_dependency/`, {
-                depends_on_id: dependsOnId
-            });
-            return response;
-        } catch (error) {
-            // Return the error for checking
-            return Promise.reject(error.response?.data || { error: 'Check failed' });
-        }
-    },
+    // Tasks that can be added as dependencies without creating a cycle
+    getDependencyCandidates: (taskId, search = '') => (
+        api.get(`/tasks/${taskId}/dependency_candidates/`, { params: { search, page_size: 100 } })
+    ),
 };
 
 // Dependency API calls
@@ -53,4 +60,25 @@ export const dependencyAPI = {
     delete: (id) => api.delete(`/dependencies/${id}/`),
 };
 
+// Graph API calls
+export const graphAPI = {
+    // Columnar snapshot of every task and dependency (see /api/graph/)
+    getSnapshot: () => api.get('/graph/'),
+    // Layered layout computed by the server: node coordinates and edge
+    // routes, matched to the snapshot by id (see /api/graph/layout/)
+    getLayout: () => api.get('/graph/layout/'),
+};
+
+// Live changes pushed by the server over Server-Sent Events (see /api/events/):
+// onChange(kind, { id, data }) with the id of the changed task or dependency
+// and its fields after the change. Returns a function that closes the stream.
+export const subscribeToChanges = (onChange) => {
+    const source = new EventSource(`${API_BASE_URL}/events/`);
+    const kinds = ['task_created', 'task_updated', 'task_deleted', 'dependency_added', 'dependency_removed'];
+    kinds.forEach(kind => {
+        source.addEventListener(kind, (event) => onChange(kind, JSON.parse(event.data)));
+    });
+    return () => source.close();
+};
+
 export default api;
\ No newline at end of file